@@ -6,7 +6,12 @@ Funções para gerar dados astronômicos e astrológicos
 from datetime import datetime, timedelta
 import random
 import math
-import ephem
+import zlib
+
+from app.birth_moment import MOON, SUN, observe_birth_moment
+from app.ephemeris import instant_to_day
+from app.lunations import FULL_MOON, NEW_MOON, format_date, lunation_table_for
+from app.stage_cache import cached_stage
 
 # Combine all event lists into a single ASTRONOMICAL_EVENTS list
 RECURRING_EVENTS = [
@@ -230,7 +235,7 @@ def generate_cosmic_message(zenith_star):
         f"No exato instante do seu nascimento, {star_name} ocupava a posição de honra no zênite celeste, marcando sua chegada com luz estelar."
     ]
     
-    return random.choice(messages)
+    return messages[zlib.crc32(star_name.encode('utf-8')) % len(messages)]
 
 
 def generate_star_curiosities(star_name, distance_ly, magnitude, spectral_class):
@@ -539,6 +544,12 @@ def get_astronomical_coincidences(birth_date, birth_time, latitude, longitude):
         birth_datetime = datetime.strptime(f"{birth_date} {birth_time}", "%Y-%m-%d %H:%M")
     else:
         birth_datetime = datetime.combine(birth_date, datetime.strptime(birth_time, "%H:%M").time())
+    return _astronomical_coincidences(birth_datetime.date())
+
+@cached_stage('coincidences', key=lambda day: day)
+def _astronomical_coincidences(day):
+    """Coincidências de uma data (eventos são à meia-noite, então a hora não altera os dias de diferença)"""
+    birth_datetime = datetime.combine(day, datetime.min.time())
     
     year = birth_datetime.year
     month = birth_datetime.month
@@ -610,17 +621,17 @@ def get_astronomical_coincidences(birth_date, birth_time, latitude, longitude):
                 })
 
     # Add random events using global templates
-    random.seed(f"{year}{month}{day}") # Seed for consistent randomness per day
-    if random.random() < 0.6: # 60% chance
-        days_offset = random.randint(-15, 15)
+    rng = random.Random(f"{year}{month}{day}") # Seed for consistent randomness per day (no global state)
+    if rng.random() < 0.6: # 60% chance
+        days_offset = rng.randint(-15, 15)
         coincidences.append({
-            'event': random.choice(RANDOM_EVENT_TEMPLATES),
+            'event': rng.choice(RANDOM_EVENT_TEMPLATES),
             'type': 'fenômeno_aleatório', 'days_diff': days_offset, 'during': (days_offset==0)
         })
-    if random.random() < 0.3: # 30% chance for a second one
-        days_offset = random.randint(-30, 30)
+    if rng.random() < 0.3: # 30% chance for a second one
+        days_offset = rng.randint(-30, 30)
         coincidences.append({
-            'event': random.choice(RANDOM_EVENT_TEMPLATES),
+            'event': rng.choice(RANDOM_EVENT_TEMPLATES),
             'type': 'descoberta_aleatória', 'days_diff': days_offset, 'during': (days_offset==0)
         })
 
@@ -632,320 +643,284 @@ def get_astronomical_coincidences(birth_date, birth_time, latitude, longitude):
     }]
 
 # ===== CÁLCULOS LUNARES AVANÇADOS =====
+# (nome, descrição, significado) das oito fases, na ordem de LunationTable.phase_index
+MOON_PHASES = (
+    ("🌑 Lua Nova",
+     "Um novo começo, energia de renovação e potencial infinito",
+     "Nascido sob a Lua Nova, você carrega o poder dos novos começos e da manifestação"),
+    ("🌒 Lua Crescente",
+     "Crescimento, expansão e construção de sonhos",
+     "A energia crescente da lua reflete em sua natureza progressiva e ambiciosa"),
+    ("🌓 Quarto Crescente",
+     "Momento de decisões e superação de desafios",
+     "Você possui a força para superar obstáculos e tomar decisões importantes"),
+    ("🌔 Lua Gibosa Crescente",
+     "Refinamento e preparação para a plenitude",
+     "Sua alma busca constantemente o aperfeiçoamento e a evolução"),
+    ("🌕 Lua Cheia",
+     "Plenitude, intuição máxima e realização",
+     "Nascido na Lua Cheia, você possui intuição poderosa e energia magnética"),
+    ("🌖 Lua Gibosa Minguante",
+     "Gratidão, compartilhamento e sabedoria",
+     "Você é um guardião de sabedoria, destinado a ensinar e guiar outros"),
+    ("🌗 Quarto Minguante",
+     "Liberação, perdão e transformação",
+     "Sua alma tem o dom da transformação e da cura de velhas feridas"),
+    ("🌘 Lua Minguante",
+     "Recolhimento, descanso e preparação para um novo ciclo",
+     "Você carrega a serenidade de quem sabe encerrar ciclos e recomeçar"),
+)
+
+def moon_phase_fallback():
+    """Dados lunares padrão quando o cálculo falha"""
+    return {
+        'phase': 0.5,
+        'phase_percentage': 50,
+        'phase_name': "🌕 Lua Misteriosa",
+        'phase_description': "Os segredos lunares aguardam para serem revelados",
+        'mystical_meaning': "Sua conexão com a lua transcende o tempo e o espaço",
+        'distance_km': 384400,
+        'altitude': 45,
+        'azimuth': 180,
+        'next_full_moon': "Em breve",
+        'next_new_moon': "Em breve",
+        'lunation_number': None,
+        'constellation': 'Cósmica'
+    }
+
 def calculate_moon_phase(birth_date, birth_time, latitude, longitude):
     """Calcula fase da lua e dados lunares para o momento do nascimento"""
-    try:
-        # Criar observador
-        observer = ephem.Observer()
-        observer.lat = str(latitude)
-        observer.lon = str(longitude)
-        observer.date = f"{birth_date} {birth_time}"
-        
-        # Lua
-        moon = ephem.Moon()
-        moon.compute(observer)
-        
-        # Calcular fase da lua (0 = nova, 1 = cheia)
-        phase = moon.moon_phase
-        
-        # Determinar nome da fase
-        if phase < 0.1:
-            phase_name = "🌑 Lua Nova"
-            phase_description = "Um novo começo, energia de renovação e potencial infinito"
-            mystical_meaning = "Nascido sob a Lua Nova, você carrega o poder dos novos começos e da manifestação"
-        elif phase < 0.25:
-            phase_name = "🌒 Lua Crescente"
-            phase_description = "Crescimento, expansão e construção de sonhos"
-            mystical_meaning = "A energia crescente da lua reflete em sua natureza progressiva e ambiciosa"
-        elif phase < 0.4:
-            phase_name = "🌓 Quarto Crescente"
-            phase_description = "Momento de decisões e superação de desafios"
-            mystical_meaning = "Você possui a força para superar obstáculos e tomar decisões importantes"
-        elif phase < 0.6:
-            phase_name = "🌔 Lua Gibosa Crescente"
-            phase_description = "Refinamento e preparação para a plenitude"
-            mystical_meaning = "Sua alma busca constantemente o aperfeiçoamento e a evolução"
-        elif phase < 0.75:
-            phase_name = "🌕 Lua Cheia"
-            phase_description = "Plenitude, intuição máxima e realização"
-            mystical_meaning = "Nascido na Lua Cheia, você possui intuição poderosa e energia magnética"
-        elif phase < 0.9:
-            phase_name = "🌖 Lua Gibosa Minguante"
-            phase_description = "Gratidão, compartilhamento e sabedoria"
-            mystical_meaning = "Você é um guardião de sabedoria, destinado a ensinar e guiar outros"
-        else:
-            phase_name = "🌗 Quarto Minguante"
-            phase_description = "Liberação, perdão e transformação"
-            mystical_meaning = "Sua alma tem o dom da transformação e da cura de velhas feridas"
-        
-        # Distância da Terra
-        distance_km = moon.earth_distance * 149597870.7  # Converter UA para km
-        
-        # Próxima lua cheia/nova
-        next_full = ephem.next_full_moon(observer.date)
-        next_new = ephem.next_new_moon(observer.date)
-        
-        return {
-            'phase': phase,
-            'phase_percentage': round(phase * 100, 1),
-            'phase_name': phase_name,
-            'phase_description': phase_description,
-            'mystical_meaning': mystical_meaning,
-            'distance_km': round(distance_km),
-            'altitude': round(math.degrees(moon.alt), 1),
-            'azimuth': round(math.degrees(moon.az), 1),
-            'next_full_moon': str(next_full)[:10],
-            'next_new_moon': str(next_new)[:10],
-            'constellation': moon.constellation[1] if hasattr(moon, 'constellation') else 'N/A'
-        }
-        
-    except Exception as e:
-        print(f"Erro no cálculo lunar: {e}")
-        return {
-            'phase': 0.5,
-            'phase_percentage': 50,
-            'phase_name': "🌕 Lua Misteriosa",
-            'phase_description': "Os segredos lunares aguardam para serem revelados",
-            'mystical_meaning': "Sua conexão com a lua transcende o tempo e o espaço",
-            'distance_km': 384400,
-            'altitude': 45,
-            'azimuth': 180,
-            'next_full_moon': "Em breve",
-            'next_new_moon': "Em breve",
-            'constellation': 'Cósmica'
-        }
+    # Céu topocêntrico do observador (posições compartilhadas por instante)
+    sky = observe_birth_moment(birth_date, birth_time, latitude, longitude)
+    
+    # Calcular fase da lua (0 = nova, 1 = cheia)
+    phase = sky.moment.moon_phase
+    
+    # Fase do ciclo e lunação pela tabela pré-calculada (distingue crescente de minguante)
+    date = instant_to_day(f"{birth_date} {birth_time}")
+    lunations = lunation_table_for(date)
+    phase_name, phase_description, mystical_meaning = MOON_PHASES[lunations.phase_index(date)]
+    
+    # Distância da Terra
+    distance_km = float(sky.distance[MOON]) * 149597870.7  # Converter UA para km
+    
+    # Próxima lua cheia/nova (busca binária na tabela)
+    next_full = format_date(lunations.next_event(date, FULL_MOON))
+    next_new = format_date(lunations.next_event(date, NEW_MOON))
+    
+    return {
+        'phase': phase,
+        'phase_percentage': round(phase * 100, 1),
+        'phase_name': phase_name,
+        'phase_description': phase_description,
+        'mystical_meaning': mystical_meaning,
+        'distance_km': round(distance_km),
+        'altitude': round(math.degrees(sky.alt[MOON]), 1),
+        'azimuth': round(math.degrees(sky.az[MOON]), 1),
+        'next_full_moon': next_full,
+        'next_new_moon': next_new,
+        'lunation_number': lunations.lunation_number(date),
+        'constellation': 'N/A'
+    }
 
 # ===== CÁLCULOS DE MARÉS =====
+def tidal_influence_fallback():
+    """Dados de marés padrão quando o cálculo falha"""
+    return {
+        'type': "🌊 Maré Cósmica",
+        'description': "Influências gravitacionais misteriosas",
+        'personal_influence': "Você está conectado aos ritmos profundos do oceano cósmico",
+        'moon_force': 2.5,
+        'sun_force': 1.1,
+        'total_force': 3.6,
+        'gravitational_intensity': 'Mística'
+    }
+
 def calculate_tidal_influence(birth_date, birth_time, latitude, longitude):
     """Calcula influência das marés no momento do nascimento"""
-    try:
-        observer = ephem.Observer()
-        observer.lat = str(latitude)
-        observer.lon = str(longitude)
-        observer.date = f"{birth_date} {birth_time}"
-        
-        # Lua e Sol para cálculo das marés
-        moon = ephem.Moon()
-        sun = ephem.Sun()
-        moon.compute(observer)
-        sun.compute(observer)
-        
-        # Força gravitacional da lua (simplificado)
-        moon_distance = moon.earth_distance
-        moon_force = 1 / (moon_distance ** 3)  # Lei do inverso do quadrado
-        
-        # Força gravitacional do sol
-        sun_distance = sun.earth_distance
-        sun_force = 0.46 / (sun_distance ** 3)  # Sol tem 0.46x a força das marés da lua
-        
-        # Combinação das forças
-        total_force = moon_force + sun_force
-        
-        # Tipo de maré baseado na posição relativa
-        moon_sun_angle = abs(moon.ra - sun.ra)
-        if moon_sun_angle < 0.5 or moon_sun_angle > 5.8:
-            tide_type = "🌊 Maré de Sizígia"
-            tide_description = "Marés extremas - força gravitacional máxima"
-            personal_influence = "Você nasceu sob influência gravitacional intensa, o que pode indicar uma personalidade magnética e impactante"
-        elif 1.4 < moon_sun_angle < 1.8 or 4.6 < moon_sun_angle < 5.0:
-            tide_type = "🌀 Maré de Quadratura"
-            tide_description = "Marés moderadas - forças em equilíbrio"
-            personal_influence = "As forças cósmicas em equilíbrio no seu nascimento sugerem uma natureza equilibrada e harmoniosa"
-        else:
-            tide_type = "🌊 Maré Mista"
-            tide_description = "Marés variadas - influências cósmicas complexas"
-            personal_influence = "A complexidade das forças cósmicas reflete em sua personalidade multifacetada e única"
-        
-        return {
-            'type': tide_type,
-            'description': tide_description,
-            'personal_influence': personal_influence,
-            'moon_force': round(moon_force * 1000, 2),
-            'sun_force': round(sun_force * 1000, 2),
-            'total_force': round(total_force * 1000, 2),
-            'gravitational_intensity': 'Alta' if total_force > 0.003 else 'Moderada' if total_force > 0.002 else 'Suave'
-        }
-        
-    except Exception as e:
-        print(f"Erro no cálculo de marés: {e}")
-        return {
-            'type': "🌊 Maré Cósmica",
-            'description': "Influências gravitacionais misteriosas",
-            'personal_influence': "Você está conectado aos ritmos profundos do oceano cósmico",
-            'moon_force': 2.5,
-            'sun_force': 1.1,
-            'total_force': 3.6,
-            'gravitational_intensity': 'Mística'
-        }
+    return _tidal_influence(birth_date, birth_time, latitude, longitude)
+
+@cached_stage('tides', key=lambda *args: args)
+def _tidal_influence(birth_date, birth_time, latitude, longitude):
+    """Marés do instante e observador (distância e RA topocêntricas da Lua)"""
+    sky = observe_birth_moment(birth_date, birth_time, latitude, longitude)
+    
+    # Força gravitacional da lua (simplificado)
+    moon_distance = float(sky.distance[MOON])
+    moon_force = 1 / (moon_distance ** 3)  # Lei do inverso do quadrado
+    
+    # Força gravitacional do sol
+    sun_distance = float(sky.distance[SUN])
+    sun_force = 0.46 / (sun_distance ** 3)  # Sol tem 0.46x a força das marés da lua
+    
+    # Combinação das forças
+    total_force = moon_force + sun_force
+    
+    # Tipo de maré baseado na posição relativa
+    moon_sun_angle = abs(float(sky.ra[MOON] - sky.ra[SUN]))
+    if moon_sun_angle < 0.5 or moon_sun_angle > 5.8:
+        tide_type = "🌊 Maré de Sizígia"
+        tide_description = "Marés extremas - força gravitacional máxima"
+        personal_influence = "Você nasceu sob influência gravitacional intensa, o que pode indicar uma personalidade magnética e impactante"
+    elif 1.4 < moon_sun_angle < 1.8 or 4.6 < moon_sun_angle < 5.0:
+        tide_type = "🌀 Maré de Quadratura"
+        tide_description = "Marés moderadas - forças em equilíbrio"
+        personal_influence = "As forças cósmicas em equilíbrio no seu nascimento sugerem uma natureza equilibrada e harmoniosa"
+    else:
+        tide_type = "🌊 Maré Mista"
+        tide_description = "Marés variadas - influências cósmicas complexas"
+        personal_influence = "A complexidade das forças cósmicas reflete em sua personalidade multifacetada e única"
+    
+    return {
+        'type': tide_type,
+        'description': tide_description,
+        'personal_influence': personal_influence,
+        'moon_force': round(moon_force * 1000, 2),
+        'sun_force': round(sun_force * 1000, 2),
+        'total_force': round(total_force * 1000, 2),
+        'gravitational_intensity': 'Alta' if total_force > 0.003 else 'Moderada' if total_force > 0.002 else 'Suave'
+    }
 
 # ===== HORÓSCOPO E ASTROLOGIA =====
+def astrological_profile_fallback():
+    """Perfil astrológico padrão quando o cálculo falha"""
+    return {
+        'sun_sign': "⭐ Cósmico",
+        'sun_description': "Energia estelar única que transcende classificações terrestres",
+        'element': 'Éter',
+        'quality': 'Transcendente',
+        'planets': {},
+        'dominant_planet': 'Estrela Zenital',
+        'astrological_summary': "Sua essência cósmica vai além dos signos tradicionais, conectando-se diretamente às estrelas."
+    }
+
 def calculate_astrological_profile(birth_date, birth_time, latitude, longitude):
     """Calcula perfil astrológico completo"""
-    try:
-        observer = ephem.Observer()
-        observer.lat = str(latitude)
-        observer.lon = str(longitude)
-        observer.date = f"{birth_date} {birth_time}"
-        
-        # Calcular posições planetárias
-        planets_data = {}
-        
-        planets = {
-            'Sol': ephem.Sun(),
-            'Lua': ephem.Moon(),
-            'Mercúrio': ephem.Mercury(),
-            'Vênus': ephem.Venus(),
-            'Marte': ephem.Mars(),
-            'Júpiter': ephem.Jupiter(),
-            'Saturno': ephem.Saturn(),
-            'Urano': ephem.Uranus(),
-            'Netuno': ephem.Neptune()
-        }
-        
-        for name, planet in planets.items():
-            planet.compute(observer)
-            
-            # Obter constelação de forma mais robusta
-            try:
-                if hasattr(planet, 'constellation') and planet.constellation:
-                    # Tentar diferentes formatos de constellation
-                    if isinstance(planet.constellation, tuple) and len(planet.constellation) > 1:
-                        constellation = planet.constellation[1]
-                    elif isinstance(planet.constellation, str):
-                        constellation = planet.constellation
-                    else:
-                        constellation = str(planet.constellation)
-                else:
-                    # Fallback: calcular constelação baseada na posição
-                    constellation = _get_constellation_from_position(planet.ra, planet.dec)
-            except:
-                constellation = _get_constellation_from_position(planet.ra, planet.dec)
-            
-            # Calcular visibilidade mais precisa
-            altitude_degrees = math.degrees(planet.alt)
-            is_visible = altitude_degrees > 0  # Acima do horizonte
-            
-            # Considerar crepúsculo para melhor precisão
-            sun = ephem.Sun()
-            sun.compute(observer)
-            sun_altitude = math.degrees(sun.alt)
-            
-            # Ajustar visibilidade baseada na posição do sol
-            if name != 'Sol':
-                if sun_altitude > -6:  # Sol ainda não está baixo o suficiente
-                    if name in ['Mercúrio', 'Vênus']:
-                        # Planetas interiores podem ser visíveis perto do horizonte
-                        is_visible = is_visible and altitude_degrees > 5
-                    else:
-                        # Outros planetas precisam estar bem acima do horizonte
-                        is_visible = is_visible and altitude_degrees > 15
+    return _astrological_profile(birth_date, birth_time, latitude, longitude)
+
+@cached_stage('astrology', key=lambda *args: args)
+def _astrological_profile(birth_date, birth_time, latitude, longitude):
+    """Perfil do instante e observador (altitudes e visibilidade dependem do local)"""
+    sky = observe_birth_moment(birth_date, birth_time, latitude, longitude)
+    
+    # Calcular posições planetárias
+    planets_data = {}
+    
+    # Considerar crepúsculo para melhor precisão
+    sun_altitude = math.degrees(sky.alt[SUN])
+    
+    for index, name in enumerate(sky.names):
+        # As posições não trazem a constelação: calcular pela posição
+        constellation = _get_constellation_from_position(sky.ra[index], sky.dec[index])
+    
+        # Calcular visibilidade mais precisa
+        altitude_degrees = math.degrees(sky.alt[index])
+        is_visible = altitude_degrees > 0  # Acima do horizonte
+    
+        # Ajustar visibilidade baseada na posição do sol
+        if name != 'Sol':
+            if sun_altitude > -6:  # Sol ainda não está baixo o suficiente
+                if name in ['Mercúrio', 'Vênus']:
+                    # Planetas interiores podem ser visíveis perto do horizonte
+                    is_visible = is_visible and altitude_degrees > 5
                 else:
-                    # Céu escuro - critério mais relaxado
-                    is_visible = altitude_degrees > 0
+                    # Outros planetas precisam estar bem acima do horizonte
+                    is_visible = is_visible and altitude_degrees > 15
             else:
-                # Sol sempre "visível" se acima do horizonte
+                # Céu escuro - critério mais relaxado
                 is_visible = altitude_degrees > 0
-            
-            planets_data[name] = {
-                'constellation': constellation,
-                'altitude': round(altitude_degrees, 1),
-                'azimuth': round(math.degrees(planet.az), 1),
-                'visible': is_visible
-            }
-        
-        # CORRIGIR CÁLCULO DO SIGNO SOLAR - usar mês e dia corretos
-        birth_dt = datetime.strptime(birth_date, "%Y-%m-%d")
-        month = birth_dt.month
-        day = birth_dt.day
-        
-        # Signos zodiacais com datas corretas (aproximadas)
-        sun_sign = "♈ Áries"
-        sun_description = "Energia cósmica única"
-        
-        if (month == 3 and day >= 21) or (month == 4 and day <= 19):
-            sun_sign = "♈ Áries"
-            sun_description = "Energia de fogo, liderança natural, pioneirismo"
-        elif (month == 4 and day >= 20) or (month == 5 and day <= 20):
-            sun_sign = "♉ Touro"
-            sun_description = "Estabilidade terrena, determinação, sensualidade"
-        elif (month == 5 and day >= 21) or (month == 6 and day <= 20):
-            sun_sign = "♊ Gêmeos"
-            sun_description = "Versatilidade mental, comunicação, curiosidade"
-        elif (month == 6 and day >= 21) or (month == 7 and day <= 22):
-            sun_sign = "♋ Câncer"
-            sun_description = "Intuição emocional, proteção, sensibilidade"
-        elif (month == 7 and day >= 23) or (month == 8 and day <= 22):
-            sun_sign = "♌ Leão"
-            sun_description = "Criatividade radiante, generosidade, liderança"
-        elif (month == 8 and day >= 23) or (month == 9 and day <= 22):
-            sun_sign = "♍ Virgem"
-            sun_description = "Precisão analítica, serviço, perfeição"
-        elif (month == 9 and day >= 23) or (month == 10 and day <= 22):
-            sun_sign = "♎ Libra"
-            sun_description = "Harmonia social, beleza, diplomacia"
-        elif (month == 10 and day >= 23) or (month == 11 and day <= 21):
-            sun_sign = "♏ Escorpião"
-            sun_description = "Intensidade transformadora, mistério, paixão"
-        elif (month == 11 and day >= 22) or (month == 12 and day <= 21):
-            sun_sign = "♐ Sagitário"
-            sun_description = "Expansão filosófica, aventura, sabedoria"
-        elif (month == 12 and day >= 22) or (month == 1 and day <= 19):
-            sun_sign = "♑ Capricórnio"
-            sun_description = "Ambição estrutural, responsabilidade, tradição"
-        elif (month == 1 and day >= 20) or (month == 2 and day <= 18):
-            sun_sign = "♒ Aquário"
-            sun_description = "Inovação humanitária, independência, visão futura"
-        elif (month == 2 and day >= 19) or (month == 3 and day <= 20):
-            sun_sign = "♓ Peixes"
-            sun_description = "Intuição oceânica, compaixão, espiritualidade"
-        
-        # Elemento e qualidade corretos
-        elements = {
-            '♈': ('Fogo', 'Cardial'),
-            '♌': ('Fogo', 'Fixo'),
-            '♐': ('Fogo', 'Mutável'),
-            '♉': ('Terra', 'Fixo'),
-            '♍': ('Terra', 'Mutável'),
-            '♑': ('Terra', 'Cardial'),
-            '♊': ('Ar', 'Mutável'),
-            '♎': ('Ar', 'Cardial'),
-            '♒': ('Ar', 'Fixo'),
-            '♋': ('Água', 'Cardial'),
-            '♏': ('Água', 'Fixo'),
-            '♓': ('Água', 'Mutável')
-        }
-        
-        sign_symbol = sun_sign.split()[0]
-        element, quality = elements.get(sign_symbol, ('Éter', 'Transcendente'))
-        
-        # Calcular planeta dominante (mais alto no céu)
-        visible_planets = {k: v for k, v in planets_data.items() if v['visible']}
-        if visible_planets:
-            dominant_planet = max(visible_planets.keys(), key=lambda p: visible_planets[p]['altitude'])
         else:
-            dominant_planet = max(planets_data.keys(), key=lambda p: planets_data[p]['altitude'])
-        
-        return {
-            'sun_sign': sun_sign,
-            'sun_description': sun_description,
-            'element': element,
-            'quality': quality,
-            'planets': planets_data,
-            'dominant_planet': dominant_planet,
-            'astrological_summary': f"Nascido sob {sun_sign}, com elemento {element} dominante, você carrega a essência cósmica da {quality.lower()}."
-        }
-        
-    except Exception as e:
-        print(f"Erro no cálculo astrológico: {e}")
-        return {
-            'sun_sign': "⭐ Cósmico",
-            'sun_description': "Energia estelar única que transcende classificações terrestres",
-            'element': 'Éter',
-            'quality': 'Transcendente',
-            'planets': {},
-            'dominant_planet': 'Estrela Zenital',
-            'astrological_summary': "Sua essência cósmica vai além dos signos tradicionais, conectando-se diretamente às estrelas."
+            # Sol sempre "visível" se acima do horizonte
+            is_visible = altitude_degrees > 0
+    
+        planets_data[name] = {
+            'constellation': constellation,
+            'altitude': round(altitude_degrees, 1),
+            'azimuth': round(math.degrees(sky.az[index]), 1),
+            'visible': is_visible
         }
+    
+    # CORRIGIR CÁLCULO DO SIGNO SOLAR - usar mês e dia corretos
+    birth_dt = datetime.strptime(birth_date, "%Y-%m-%d")
+    month = birth_dt.month
+    day = birth_dt.day
+    
+    # Signos zodiacais com datas corretas (aproximadas)
+    sun_sign = "♈ Áries"
+    sun_description = "Energia cósmica única"
+    
+    if (month == 3 and day >= 21) or (month == 4 and day <= 19):
+        sun_sign = "♈ Áries"
+        sun_description = "Energia de fogo, liderança natural, pioneirismo"
+    elif (month == 4 and day >= 20) or (month == 5 and day <= 20):
+        sun_sign = "♉ Touro"
+        sun_description = "Estabilidade terrena, determinação, sensualidade"
+    elif (month == 5 and day >= 21) or (month == 6 and day <= 20):
+        sun_sign = "♊ Gêmeos"
+        sun_description = "Versatilidade mental, comunicação, curiosidade"
+    elif (month == 6 and day >= 21) or (month == 7 and day <= 22):
+        sun_sign = "♋ Câncer"
+        sun_description = "Intuição emocional, proteção, sensibilidade"
+    elif (month == 7 and day >= 23) or (month == 8 and day <= 22):
+        sun_sign = "♌ Leão"
+        sun_description = "Criatividade radiante, generosidade, liderança"
+    elif (month == 8 and day >= 23) or (month == 9 and day <= 22):
+        sun_sign = "♍ Virgem"
+        sun_description = "Precisão analítica, serviço, perfeição"
+    elif (month == 9 and day >= 23) or (month == 10 and day <= 22):
+        sun_sign = "♎ Libra"
+        sun_description = "Harmonia social, beleza, diplomacia"
+    elif (month == 10 and day >= 23) or (month == 11 and day <= 21):
+        sun_sign = "♏ Escorpião"
+        sun_description = "Intensidade transformadora, mistério, paixão"
+    elif (month == 11 and day >= 22) or (month == 12 and day <= 21):
+        sun_sign = "♐ Sagitário"
+        sun_description = "Expansão filosófica, aventura, sabedoria"
+    elif (month == 12 and day >= 22) or (month == 1 and day <= 19):
+        sun_sign = "♑ Capricórnio"
+        sun_description = "Ambição estrutural, responsabilidade, tradição"
+    elif (month == 1 and day >= 20) or (month == 2 and day <= 18):
+        sun_sign = "♒ Aquário"
+        sun_description = "Inovação humanitária, independência, visão futura"
+    elif (month == 2 and day >= 19) or (month == 3 and day <= 20):
+        sun_sign = "♓ Peixes"
+        sun_description = "Intuição oceânica, compaixão, espiritualidade"
+    
+    # Elemento e qualidade corretos
+    elements = {
+        '♈': ('Fogo', 'Cardial'),
+        '♌': ('Fogo', 'Fixo'),
+        '♐': ('Fogo', 'Mutável'),
+        '♉': ('Terra', 'Fixo'),
+        '♍': ('Terra', 'Mutável'),
+        '♑': ('Terra', 'Cardial'),
+        '♊': ('Ar', 'Mutável'),
+        '♎': ('Ar', 'Cardial'),
+        '♒': ('Ar', 'Fixo'),
+        '♋': ('Água', 'Cardial'),
+        '♏': ('Água', 'Fixo'),
+        '♓': ('Água', 'Mutável')
+    }
+    
+    sign_symbol = sun_sign.split()[0]
+    element, quality = elements.get(sign_symbol, ('Éter', 'Transcendente'))
+    
+    # Calcular planeta dominante (mais alto no céu)
+    visible_planets = {k: v for k, v in planets_data.items() if v['visible']}
+    if visible_planets:
+        dominant_planet = max(visible_planets.keys(), key=lambda p: visible_planets[p]['altitude'])
+    else:
+        dominant_planet = max(planets_data.keys(), key=lambda p: planets_data[p]['altitude'])
+    
+    return {
+        'sun_sign': sun_sign,
+        'sun_description': sun_description,
+        'element': element,
+        'quality': quality,
+        'planets': planets_data,
+        'dominant_planet': dominant_planet,
+        'astrological_summary': f"Nascido sob {sun_sign}, com elemento {element} dominante, você carrega a essência cósmica da {quality.lower()}."
+    }
 
 def _get_constellation_from_position(ra, dec):
     """Determina constelação aproximada baseada em RA/Dec"""
@@ -980,85 +955,89 @@ def _get_constellation_from_position(ra, dec):
     return "Desconhecida"
 
 # ===== EVENTOS ESTELARES HISTÓRICOS =====
+def stellar_events_fallback(birth_date):
+    """Eventos estelares padrão quando o cálculo falha"""
+    return {
+        'historical_event': {
+            'name': "🌟 Evento Cósmico Único",
+            'description': "Seu nascimento é um marco no tempo cósmico",
+            'date': birth_date,
+            'cosmic_connection': "Você é parte da grande narrativa do cosmos."
+        },
+        'seasonal_energy': "✨ Energia Cósmica Universal",
+        'birth_year_significance': "Cada nascimento é um evento único no universo."
+    }
+
 def calculate_stellar_events(birth_date, birth_time):
     """Calcula eventos estelares significativos próximos à data de nascimento"""
-    try:
-        birth_dt = datetime.strptime(birth_date, "%Y-%m-%d")
-        
-        # Eventos astronômicos históricos marcantes
-        historical_events = [
-            (datetime(1969, 7, 20), "🚀 Primeira Caminhada Lunar", "A humanidade deu seus primeiros passos na Lua"),
-            (datetime(1977, 8, 20), "🛸 Lançamento da Voyager", "Mensageiro da Terra rumo às estrelas"),
-            (datetime(1990, 4, 24), "🔭 Lançamento do Hubble", "Olhos da humanidade no cosmos"),
-            (datetime(1995, 12, 7), "🌍 Primeiro Exoplaneta", "Descoberta de mundos além do Sistema Solar"),
-            (datetime(2012, 8, 5), "🤖 Curiosity em Marte", "Robô explorador alcança o Planeta Vermelho"),
-            (datetime(2019, 4, 10), "⚫ Primeira Foto de Buraco Negro", "A humanidade vê o invisível"),
-            (datetime(2021, 2, 18), "🚁 Helicóptero em Marte", "Primeiro voo em outro planeta"),
-            (datetime(1986, 1, 28), "🚀 Desafio da Tragédia Challenger", "Lembrete da coragem dos exploradores espaciais"),
-            (datetime(1997, 7, 4), "🛸 Mars Pathfinder", "Primeiro rover moderno em Marte"),
-            (datetime(2003, 2, 1), "🛸 Columbia", "Honrando os heróis da exploração espacial")
-        ]
-        
-        # Encontrar evento mais próximo
-        closest_event = None
-        min_diff = float('inf')
-        
-        for event_date, event_name, event_description in historical_events:
-            diff = abs((birth_dt - event_date).days)
-            if diff < min_diff:
-                min_diff = diff
-                closest_event = {
-                    'name': event_name,
-                    'description': event_description,
-                    'date': event_date.strftime("%d/%m/%Y"),
-                    'days_difference': min_diff,
-                    'cosmic_connection': ""
-                }
-        
-        if closest_event and min_diff <= 365:  # Evento no mesmo ano
-            if min_diff <= 30:
-                closest_event['cosmic_connection'] = f"Apenas {min_diff} dias separam seu nascimento deste marco cósmico. Uma sincronia extraordinária!"
-            elif min_diff <= 90:
-                closest_event['cosmic_connection'] = f"Nascido {min_diff} dias após este evento histórico, você carrega sua energia transformadora."
-            else:
-                closest_event['cosmic_connection'] = f"O mesmo ano cósmico que testemunhou {closest_event['name']} também celebrou seu nascimento."
-        
-        # Eventos astronômicos por período do ano
-        seasonal_events = {
-            'primavera': "🌸 Equinócio de Primavera - Renovação e crescimento cósmico",
-            'verao': "☀️ Solstício de Verão - Energia solar máxima",
-            'outono': "🍂 Equinócio de Outono - Equilíbrio e transformação",
-            'inverno': "❄️ Solstício de Inverno - Introspecção e renascimento"
-        }
-        
-        month = birth_dt.month
-        if month in [3, 4, 5]:
-            seasonal_event = seasonal_events['primavera']
-        elif month in [6, 7, 8]:
-            seasonal_event = seasonal_events['verao']
-        elif month in [9, 10, 11]:
-            seasonal_event = seasonal_events['outono']
+    return _stellar_events(birth_date)
+
+@cached_stage('stellar_events', key=lambda birth_date: birth_date)
+def _stellar_events(birth_date):
+    """Eventos estelares de uma data"""
+    birth_dt = datetime.strptime(birth_date, "%Y-%m-%d")
+    
+    # Eventos astronômicos históricos marcantes
+    historical_events = [
+        (datetime(1969, 7, 20), "🚀 Primeira Caminhada Lunar", "A humanidade deu seus primeiros passos na Lua"),
+        (datetime(1977, 8, 20), "🛸 Lançamento da Voyager", "Mensageiro da Terra rumo às estrelas"),
+        (datetime(1990, 4, 24), "🔭 Lançamento do Hubble", "Olhos da humanidade no cosmos"),
+        (datetime(1995, 12, 7), "🌍 Primeiro Exoplaneta", "Descoberta de mundos além do Sistema Solar"),
+        (datetime(2012, 8, 5), "🤖 Curiosity em Marte", "Robô explorador alcança o Planeta Vermelho"),
+        (datetime(2019, 4, 10), "⚫ Primeira Foto de Buraco Negro", "A humanidade vê o invisível"),
+        (datetime(2021, 2, 18), "🚁 Helicóptero em Marte", "Primeiro voo em outro planeta"),
+        (datetime(1986, 1, 28), "🚀 Desafio da Tragédia Challenger", "Lembrete da coragem dos exploradores espaciais"),
+        (datetime(1997, 7, 4), "🛸 Mars Pathfinder", "Primeiro rover moderno em Marte"),
+        (datetime(2003, 2, 1), "🛸 Columbia", "Honrando os heróis da exploração espacial")
+    ]
+    
+    # Encontrar evento mais próximo
+    closest_event = None
+    min_diff = float('inf')
+    
+    for event_date, event_name, event_description in historical_events:
+        diff = abs((birth_dt - event_date).days)
+        if diff < min_diff:
+            min_diff = diff
+            closest_event = {
+                'name': event_name,
+                'description': event_description,
+                'date': event_date.strftime("%d/%m/%Y"),
+                'days_difference': min_diff,
+                'cosmic_connection': ""
+            }
+    
+    if closest_event and min_diff <= 365:  # Evento no mesmo ano
+        if min_diff <= 30:
+            closest_event['cosmic_connection'] = f"Apenas {min_diff} dias separam seu nascimento deste marco cósmico. Uma sincronia extraordinária!"
+        elif min_diff <= 90:
+            closest_event['cosmic_connection'] = f"Nascido {min_diff} dias após este evento histórico, você carrega sua energia transformadora."
         else:
-            seasonal_event = seasonal_events['inverno']
-        
-        return {
-            'historical_event': closest_event,
-            'seasonal_energy': seasonal_event,
-            'birth_year_significance': f"O ano de {birth_dt.year} marca um momento único na jornada cósmica da humanidade."
-        }
-        
-    except Exception as e:
-        print(f"Erro no cálculo de eventos estelares: {e}")
-        return {
-            'historical_event': {
-                'name': "🌟 Evento Cósmico Único",
-                'description': "Seu nascimento é um marco no tempo cósmico",
-                'date': birth_date,
-                'cosmic_connection': "Você é parte da grande narrativa do cosmos."
-            },
-            'seasonal_energy': "✨ Energia Cósmica Universal",
-            'birth_year_significance': "Cada nascimento é um evento único no universo."
-        }
+            closest_event['cosmic_connection'] = f"O mesmo ano cósmico que testemunhou {closest_event['name']} também celebrou seu nascimento."
+    
+    # Eventos astronômicos por período do ano
+    seasonal_events = {
+        'primavera': "🌸 Equinócio de Primavera - Renovação e crescimento cósmico",
+        'verao': "☀️ Solstício de Verão - Energia solar máxima",
+        'outono': "🍂 Equinócio de Outono - Equilíbrio e transformação",
+        'inverno': "❄️ Solstício de Inverno - Introspecção e renascimento"
+    }
+    
+    month = birth_dt.month
+    if month in [3, 4, 5]:
+        seasonal_event = seasonal_events['primavera']
+    elif month in [6, 7, 8]:
+        seasonal_event = seasonal_events['verao']
+    elif month in [9, 10, 11]:
+        seasonal_event = seasonal_events['outono']
+    else:
+        seasonal_event = seasonal_events['inverno']
+    
+    return {
+        'historical_event': closest_event,
+        'seasonal_energy': seasonal_event,
+        'birth_year_significance': f"O ano de {birth_dt.year} marca um momento único na jornada cósmica da humanidade."
+    }
 
 __all__ = [
     'generate_cosmic_message', 
@@ -1074,5 +1053,9 @@ __all__ = [
     'calculate_moon_phase',
     'calculate_tidal_influence',
     'calculate_astrological_profile',
-    'calculate_stellar_events'
+    'calculate_stellar_events',
+    'moon_phase_fallback',
+    'tidal_influence_fallback',
+    'astrological_profile_fallback',
+    'stellar_events_fallback'
 ] 
\ No newline at end of file
@@ -0,0 +1,252 @@
+"""
+Birth Moment - Posições dos corpos calculadas uma vez por instante
+
+Lua, marés e perfil astrológico precisavam, a cada requisição, de um
+observador e do cálculo completo de Sol, Lua e planetas (o perfil ainda
+recalculava o Sol dentro do laço dos planetas). As posições geocêntricas
+aparentes dependem apenas do instante, então são calculadas uma vez por
+minuto e compartilhadas entre requisições (cache da etapa 'birth_moment').
+
+As posições saem do mesmo de421 usado pelo resto do app: das tabelas de
+Chebyshev (app/position_tables.py) dentro da cobertura delas e do Skyfield
+diretamente fora dela ou com MURPHY_EPHEMERIS_MODE=skyfield. O tempo
+sideral vem da forma fechada de app.sidereal.
+
+Para cada observador resta um passo vetorizado sobre todos os corpos:
+paralaxe (relevante para a Lua), rotação para altitude/azimute e refração,
+com as mesmas fórmulas e constantes do libastro, de modo que os resultados
+coincidem com Body.compute(observer) do pyephem, usado antes por estas
+etapas e agora só como referência do verify.
+
+Uso:
+    python -m app.birth_moment verify [amostras]
+"""
+
+import sys
+
+import numpy as np
+
+from app.config import EPHEMERIS_MODE
+from app.ephemeris import (
+    DAY_EPOCH_JD,
+    apparent_geocentric,
+    current_day,
+    day_to_datetime,
+    ephemeris_days,
+    instant_to_day,
+)
+from app.geometry import hour_angle_to_altaz
+from app.position_tables import BODIES, get_position_tables
+from app.sidereal import gast_degrees
+from app.stage_cache import cached_stage
+
+SUN, MOON = 0, 1
+
+# Constantes do libastro (raio equatorial, UA e achatamento da Terra)
+EARTH_RADIUS_M = 6.37816e6
+AU_M = 1.4959787e11
+_E2 = (2 - 1 / 298.257) / 298.257
+
+# Tolerâncias do verify contra o pyephem: as teorias truncadas do pyephem
+# diferem do de421 em alguns segundos de arco (mais no azimute perto do
+# zênite) e em dezenas de km na distância da Lua
+ANGLE_TOLERANCE_ARCSEC = 30.0
+MOON_DISTANCE_TOLERANCE_KM = 60.0
+VERIFY_TOLERANCES = {
+    'alt_arcsec': ANGLE_TOLERANCE_ARCSEC,
+    'az_arcsec': ANGLE_TOLERANCE_ARCSEC,
+    'ra_arcsec': ANGLE_TOLERANCE_ARCSEC,
+    'moon_distance_km': MOON_DISTANCE_TOLERANCE_KM,
+}
+
+# Atmosfera padrão do ephem.Observer (mbar, °C) usada na refração
+PRESSURE_MBAR = 1010.0
+TEMPERATURE_C = 15.0
+
+
+class TopocentricSky:
+    """Posições topocêntricas (radianos, UA) de todos os corpos para um observador"""
+
+    def __init__(self, moment, ra, dec, distance, alt, az):
+        self.moment = moment
+        self.names = moment.names
+        self.ra = ra
+        self.dec = dec
+        self.distance = distance
+        self.alt = alt
+        self.az = az
+
+
+class BirthMoment:
+    """Posições geocêntricas aparentes (equinócio da data) de todos os corpos num instante"""
+
+    def __init__(self, instant, mode=EPHEMERIS_MODE):
+        day = instant_to_day(instant)
+        self.instant = instant
+        self.names = [body[0] for body in BODIES]
+
+        tables = get_position_tables() if mode == 'chebyshev' else None
+        if tables is not None and tables.covers(day):
+            xyz = tables.positions(day)
+        else:
+            xyz = np.array([apparent_geocentric(body[1], day) for body in BODIES])
+        self.distance = np.sqrt(np.sum(xyz * xyz, axis=1))
+        self.ra = np.mod(np.arctan2(xyz[:, 1], xyz[:, 0]), 2 * np.pi)
+        self.dec = np.arcsin(xyz[:, 2] / self.distance)
+        self.moon_phase = illuminated_fraction(xyz[SUN], xyz[MOON])
+        for array in (self.ra, self.dec, self.distance):
+            array.flags.writeable = False  # compartilhado entre requisições pelo cache
+
+        # Tempo sideral aparente de Greenwich (o LST de cada observador é GAST + longitude)
+        self.gast = float(np.radians(gast_degrees(day + DAY_EPOCH_JD)))
+
+    def observe(self, latitude, longitude, refraction=True):
+        """Paralaxe, alt/az e refração para o observador (latitude/longitude em graus)"""
+        phi = np.radians(latitude)
+        lst = self.gast + np.radians(longitude)
+        ha = lst - self.ra
+
+        # Paralaxe (ta_par do libastro), com coordenadas em raios terrestres
+        sin_phi, cos_phi = np.sin(phi), np.cos(phi)
+        robs = 1 / np.sqrt(1 - _E2 * sin_phi * sin_phi)
+        xobs = robs * cos_phi
+        zobs = robs * (1 - _E2) * sin_phi
+
+        rho = self.distance * (AU_M / EARTH_RADIUS_M)
+        x = rho * np.cos(self.dec) * np.cos(ha) - xobs
+        y = -rho * np.cos(self.dec) * np.sin(ha)
+        z = rho * np.sin(self.dec) - zobs
+        rho = np.sqrt(x * x + y * y + z * z)
+        ha = np.arctan2(-y, x)
+        dec = np.arcsin(z / rho)
+        ra = np.mod(lst - ha, 2 * np.pi)
+
+        # Rotação equatorial → horizontal
+        alt, az = hour_angle_to_altaz(ha, dec, phi)
+        if refraction:
+            alt = refract(alt)
+        return TopocentricSky(self, ra, dec, rho * (EARTH_RADIUS_M / AU_M), alt, az)
+
+
+def illuminated_fraction(sun, moon):
+    """Fração iluminada da Lua a partir dos vetores geocêntricos de Sol e Lua"""
+    to_sun = sun - moon
+    cos_phase_angle = -np.dot(to_sun, moon) / (np.linalg.norm(to_sun) * np.linalg.norm(moon))
+    return float((1 + cos_phase_angle) / 2)
+
+
+def _unrefract(apparent, pressure=PRESSURE_MBAR, temperature=TEMPERATURE_C):
+    """Altitude verdadeira a partir da aparente (unrefract do libastro)"""
+    degrees = np.degrees(apparent)
+
+    # Abaixo de 15°
+    a = ((2e-5 * degrees + 1.96e-2) * degrees + 1.594e-1) * pressure
+    b = (273 + temperature) * ((8.45e-2 * degrees + 5.05e-1) * degrees + 1)
+    r = np.radians(a / b)
+    low = np.where((apparent < 0) & (r < 0), apparent, apparent - r)
+
+    # A partir de 15° (tan(0) só aparece em ramos descartados por np.where)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        high = apparent - 7.888888e-5 * pressure / ((273 + temperature) * np.tan(apparent))
+
+        # Transição suave entre 14.5° e 15.5°
+        weight = np.minimum(np.maximum(degrees - 14.5, 0.0), 1.0)
+        return np.where(degrees < 14.5, low, np.where(degrees > 15.5, high, low + weight * (high - low)))
+
+
+def _invert_unrefract(true_altitude, pressure=PRESSURE_MBAR, temperature=TEMPERATURE_C):
+    """
+    Altitude aparente a partir da verdadeira (inversa de _unrefract, como no libastro).
+
+    Parte da fórmula de Sæmundsson e refina por Newton com derivada numérica:
+    perto do horizonte a iteração simples do libastro precisa de ~15 passos.
+    """
+    true_altitude = np.asarray(true_altitude, dtype=float)
+    degrees = np.degrees(true_altitude)
+    scale = pressure / 1010.0 * 283.0 / (273.0 + temperature)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        seed = np.radians(scale * 1.02 / np.tan(np.radians(degrees + 10.3 / (degrees + 5.11))) / 60.0)
+    apparent = true_altitude + np.where((degrees > -1.0) & np.isfinite(seed), np.maximum(seed, 0.0), 0.0)
+
+    tolerance = np.radians(0.001 / 3600.0)
+    step = 1e-6
+    for _ in range(10):
+        error = _unrefract(apparent, pressure, temperature) - true_altitude
+        if np.all(np.abs(error) < tolerance):
+            break
+        slope = (_unrefract(apparent + step, pressure, temperature) - true_altitude - error) / step
+        apparent = apparent - error / np.where(np.abs(slope) > 1e-3, slope, 1.0)
+    return apparent
+
+
+# Tabela da atmosfera padrão (passo de 0.01°): a refração de cada requisição é
+# uma interpolação, em vez de várias iterações de numpy sobre nove corpos
+_REFRACTION_TRUE = np.radians(np.linspace(-90.0, 90.0, 18001))
+_REFRACTION_APPARENT = _invert_unrefract(_REFRACTION_TRUE)
+
+
+def refract(true_altitude, pressure=PRESSURE_MBAR, temperature=TEMPERATURE_C):
+    """Altitude aparente a partir da verdadeira (radianos)"""
+    if pressure == PRESSURE_MBAR and temperature == TEMPERATURE_C:
+        return np.interp(true_altitude, _REFRACTION_TRUE, _REFRACTION_APPARENT)
+    return _invert_unrefract(true_altitude, pressure, temperature)
+
+
+@cached_stage('birth_moment', key=lambda instant: instant, copy=False)
+def get_birth_moment(instant):
+    """BirthMoment do instante "AAAA-MM-DD HH:MM" (compartilhado entre requisições)"""
+    return BirthMoment(instant)
+
+
+def observe_birth_moment(birth_date, birth_time, latitude, longitude):
+    """Céu topocêntrico do observador no momento do nascimento"""
+    return get_birth_moment(f"{birth_date} {birth_time}").observe(latitude, longitude)
+
+
+def verify_against_ephem(samples=2000, seed=0):
+    """Maiores diferenças contra Body.compute(observer) do pyephem"""
+    import ephem
+
+    rng = np.random.default_rng(seed)
+    first, last = ephemeris_days()[0], current_day()
+    worst = {'alt_arcsec': 0.0, 'az_arcsec': 0.0, 'ra_arcsec': 0.0, 'moon_distance_km': 0.0}
+    for _ in range(samples):
+        instant = f"{day_to_datetime(rng.uniform(first, last)):%Y-%m-%d %H:%M:%S}"
+        latitude = float(np.degrees(np.arcsin(rng.uniform(-0.99, 0.99))))
+        longitude = float(rng.uniform(-180, 180))
+        sky = BirthMoment(instant).observe(latitude, longitude)
+
+        observer = ephem.Observer()
+        observer.lat = str(latitude)
+        observer.lon = str(longitude)
+        observer.date = instant.replace('-', '/')
+        for index, (_, _, ephem_name, _, _) in enumerate(BODIES):
+            body = getattr(ephem, ephem_name)(observer)
+            d_ra = (sky.ra[index] - float(body.ra) + np.pi) % (2 * np.pi) - np.pi
+            d_az = (sky.az[index] - float(body.az) + np.pi) % (2 * np.pi) - np.pi
+            if abs(float(body.alt)) < np.radians(89):
+                worst['az_arcsec'] = max(worst['az_arcsec'], abs(np.degrees(d_az)) * 3600)
+            worst['alt_arcsec'] = max(worst['alt_arcsec'], abs(np.degrees(sky.alt[index] - float(body.alt))) * 3600)
+            worst['ra_arcsec'] = max(worst['ra_arcsec'], abs(np.degrees(d_ra)) * 3600)
+            if index == MOON:
+                # Distâncias dos planetas no ephem têm precisão de float (~15 km por UA)
+                worst['moon_distance_km'] = max(
+                    worst['moon_distance_km'], abs(sky.distance[index] - body.earth_distance) * AU_M / 1000
+                )
+    return worst
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command == 'verify':
+        samples = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+        ok = True
+        for name, value in verify_against_ephem(samples).items():
+            passed = value <= VERIFY_TOLERANCES[name]
+            ok = ok and passed
+            print(f"   {'✅' if passed else '❌'} {name}: {value:.4f} (tolerância {VERIFY_TOLERANCES[name]})")
+        print(f"{'✅' if ok else '❌'} {samples} amostras")
+        sys.exit(0 if ok else 1)
+    else:
+        print("Uso: python -m app.birth_moment verify [amostras]")
+        sys.exit(1)
@@ -0,0 +1,187 @@
+"""
+Star Catalog - Snapshot binário e colunar do catálogo Hipparcos
+
+O catálogo é convertido uma única vez (no build) em arquivos .npy por coluna,
+que cada processo abre com memory-map. Assim o CSV do Hipparcos não é mais
+lido no import e todos os workers compartilham as mesmas páginas em memória.
+
+Se o snapshot falta (bundle não gerado), o primeiro acesso o gera sob um
+lock de arquivo: workers que sobem juntos num diretório de dados vazio
+esperam o primeiro terminar, e cada geração grava num diretório temporário
+próprio antes da troca.
+
+Uso:
+    python -m app.catalog build [diretório]
+"""
+
+import fcntl
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+from app.config import data_path
+from app.geometry import radec_to_unit_vectors
+
+SNAPSHOT_DIR = data_path('hipparcos')
+HIPPARCOS_FILE = 'hip_main.dat'
+SNAPSHOT_FORMAT = 1
+
+# Colunas do snapshot e seus tipos em disco
+COLUMNS = {
+    'hip': np.int32,
+    'ra_degrees': np.float32,
+    'dec_degrees': np.float32,
+    'magnitude': np.float32,
+    'parallax_mas': np.float32,
+    'xyz': np.float32,
+}
+
+
+class StarCatalog:
+    """Catálogo estelar em colunas NumPy (somente leitura, memory-mapped)"""
+
+    def __init__(self, hip, ra_degrees, dec_degrees, magnitude, parallax_mas, xyz, meta=None):
+        self.hip = hip
+        self.ra_degrees = ra_degrees
+        self.dec_degrees = dec_degrees
+        self.magnitude = magnitude
+        self.parallax_mas = parallax_mas
+        self.xyz = xyz  # Vetores unitários (N, 3) no ICRS
+        self.meta = meta or {}
+
+    def __len__(self):
+        return len(self.hip)
+
+    def brighter_than(self, max_magnitude):
+        """Índices das estrelas com magnitude menor que o limite"""
+        return np.flatnonzero(self.magnitude < max_magnitude)
+
+    def to_dataframe(self, indices=None):
+        """Monta um DataFrame no formato de skyfield.data.hipparcos.load_dataframe"""
+        import pandas as pd
+
+        if indices is None:
+            indices = slice(None)
+        ra_degrees = np.asarray(self.ra_degrees[indices], dtype=np.float64)
+        df = pd.DataFrame({
+            'magnitude': np.asarray(self.magnitude[indices], dtype=np.float64),
+            'ra_degrees': ra_degrees,
+            'dec_degrees': np.asarray(self.dec_degrees[indices], dtype=np.float64),
+            'parallax_mas': np.asarray(self.parallax_mas[indices], dtype=np.float64),
+            'ra_hours': ra_degrees / 15.0,
+        }, index=pd.Index(np.asarray(self.hip[indices]), name='hip'))
+        return df
+
+
+def write_snapshot(df, directory=SNAPSHOT_DIR):
+    """Grava um DataFrame do Hipparcos (índice hip) como snapshot colunar"""
+    directory = Path(directory)
+    df = df.dropna(subset=['ra_degrees', 'dec_degrees', 'magnitude'])
+
+    columns = {
+        'hip': df.index.to_numpy(),
+        'ra_degrees': df['ra_degrees'].to_numpy(),
+        'dec_degrees': df['dec_degrees'].to_numpy(),
+        'magnitude': df['magnitude'].to_numpy(),
+        'parallax_mas': df['parallax_mas'].fillna(0.0).to_numpy(),
+        'xyz': radec_to_unit_vectors(df['ra_degrees'], df['dec_degrees']),
+    }
+
+    # Gravar num diretório temporário único ao lado do destino e trocar de uma vez
+    directory.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(prefix=directory.name + '.', suffix='.tmp', dir=directory.parent))
+    for name, dtype in COLUMNS.items():
+        np.save(tmp_dir / f'{name}.npy', np.ascontiguousarray(columns[name], dtype=dtype))
+
+    meta = {
+        'format': SNAPSHOT_FORMAT,
+        'count': int(len(df)),
+        'source': 'hip_main.dat',
+        'built_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+    }
+    (tmp_dir / 'meta.json').write_text(json.dumps(meta, indent=2))
+
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp_dir, directory)
+    return meta
+
+
+_build_thread_lock = threading.Lock()
+
+
+@contextmanager
+def _build_lock(directory):
+    """Lock exclusivo (entre threads e processos) da geração do snapshot em directory"""
+    lock_path = directory.with_name(directory.name + '.lock')
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with _build_thread_lock, open(lock_path, 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def build_snapshot(directory=SNAPSHOT_DIR, if_missing=False):
+    """
+    Lê o hip_main.dat do bundle (baixando se preciso) e grava o snapshot
+    binário. Com if_missing, não faz nada se outro processo já o gerou.
+    """
+    from skyfield.data import hipparcos
+    from app.ephemeris import get_loader, require_local
+
+    directory = Path(directory)
+    with _build_lock(directory):
+        if if_missing and (directory / 'meta.json').exists():
+            return json.loads((directory / 'meta.json').read_text())
+        require_local(HIPPARCOS_FILE)
+        with get_loader().open(hipparcos.URL) as f:
+            df = hipparcos.load_dataframe(f)
+        return write_snapshot(df, directory)
+
+
+def open_snapshot(directory=SNAPSHOT_DIR):
+    """Abre o snapshot com memory-map, sem copiar os dados"""
+    directory = Path(directory)
+    meta = json.loads((directory / 'meta.json').read_text())
+    if meta.get('format') != SNAPSHOT_FORMAT:
+        raise ValueError(f"Formato de snapshot incompatível: {meta.get('format')}")
+
+    columns = {
+        name: np.load(directory / f'{name}.npy', mmap_mode='r')
+        for name in COLUMNS
+    }
+    return StarCatalog(meta=meta, **columns)
+
+
+# Cache global do catálogo (um memory-map por processo)
+_catalog = None
+
+
+def get_star_catalog():
+    """Retorna o catálogo memory-mapped, gerando o snapshot se ainda não existir"""
+    global _catalog
+    if _catalog is None:
+        if not (SNAPSHOT_DIR / 'meta.json').exists():
+            print(f"⚠️ Snapshot do Hipparcos ausente em {SNAPSHOT_DIR}, gerando agora...")
+            build_snapshot(SNAPSHOT_DIR, if_missing=True)
+        _catalog = open_snapshot(SNAPSHOT_DIR)
+        print(f"✨ Catálogo Hipparcos mapeado: {len(_catalog)} estrelas")
+    return _catalog
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != 'build':
+        print("Uso: python -m app.catalog build [diretório]")
+        sys.exit(1)
+    target = Path(sys.argv[2]) if len(sys.argv) > 2 else SNAPSHOT_DIR
+    meta = build_snapshot(target)
+    print(f"✅ Snapshot gravado em {target}: {meta['count']} estrelas")
@@ -0,0 +1,88 @@
+"""
+City Index - Autocomplete de cidades por prefixo
+
+As cidades do gazetteer ficam em memória num array ordenado pelo nome
+normalizado (sem acentos, minúsculas). Um prefixo vira um intervalo
+contíguo encontrado por busca binária, e as sugestões são as cidades mais
+populosas desse intervalo. Para prefixos curtos (os mais digitados e os de
+intervalo maior) a resposta JSON é gerada uma única vez na construção.
+"""
+
+import heapq
+import json
+import threading
+from bisect import bisect_left
+
+from app.gazetteer import get_gazetteer, normalize_name
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+# Prefixos com até este número de caracteres têm resposta pré-serializada
+PRECOMPUTED_PREFIX_LENGTH = 2
+
+
+class CityIndex:
+    """Array ordenado de cidades com busca por prefixo"""
+
+    def __init__(self, cities):
+        rows = sorted(
+            (normalize_name(name), -population, name, country)
+            for name, country, population in cities
+        )
+        self.keys = [row[0] for row in rows]
+        self.populations = [-row[1] for row in rows]
+        self.suggestions = [{'city': row[2], 'country': row[3]} for row in rows]
+        self._serialized = self._precompute()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _range(self, prefix):
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + '\uffff', lo)
+        return lo, hi
+
+    def search(self, prefix, limit=DEFAULT_LIMIT):
+        """Sugestões {city, country} para o prefixo, das mais populosas às menores"""
+        prefix = normalize_name(prefix)
+        if not prefix:
+            return []
+        lo, hi = self._range(prefix)
+        best = heapq.nlargest(limit, range(lo, hi), key=self.populations.__getitem__)
+        return [self.suggestions[i] for i in best]
+
+    def _precompute(self):
+        """JSON pronto para todos os prefixos curtos presentes no índice"""
+        prefixes = {
+            key[:length]
+            for key in self.keys
+            for length in range(1, PRECOMPUTED_PREFIX_LENGTH + 1)
+            if len(key) >= length
+        }
+        return {
+            prefix: json.dumps(self.search(prefix), ensure_ascii=False).encode('utf-8')
+            for prefix in prefixes
+        }
+
+    def search_json(self, prefix, limit=DEFAULT_LIMIT):
+        """Resposta serializada (bytes UTF-8), pré-calculada para prefixos curtos"""
+        normalized = normalize_name(prefix)
+        if limit == DEFAULT_LIMIT and len(normalized) <= PRECOMPUTED_PREFIX_LENGTH:
+            return self._serialized.get(normalized, b'[]')
+        return json.dumps(self.search(normalized, limit), ensure_ascii=False).encode('utf-8')
+
+
+_city_index = None
+_lock = threading.Lock()
+
+
+def get_city_index():
+    """Retorna o índice de cidades do processo (vazio se não houver gazetteer)"""
+    global _city_index
+    if _city_index is None:
+        with _lock:
+            if _city_index is None:
+                gazetteer = get_gazetteer()
+                _city_index = CityIndex(gazetteer.cities() if gazetteer else [])
+    return _city_index
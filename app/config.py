@@ -0,0 +1,82 @@
+"""
+Config - Configurações do Murphy-1 lidas de variáveis de ambiente
+"""
+
+import os
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+
+# Versão do bundle de dados (catálogos, efemérides, timescale)
+DATA_BUNDLE_VERSION = '1'
+
+# Diretório versionado com os artefatos de dados gerados no build
+DATA_DIR = Path(os.environ.get('MURPHY_DATA_DIR', BASE_DIR / 'data' / f'v{DATA_BUNDLE_VERSION}'))
+
+# Modo offline estrito: nenhum download em tempo de execução
+OFFLINE = os.environ.get('MURPHY_OFFLINE', '').lower() in ('1', 'true', 'yes')
+
+# Fonte da estrela zenital: 'named' (NAMED_STARS) ou 'catalog' (Hipparcos completo)
+ZENITH_SOURCE = os.environ.get('MURPHY_ZENITH_SOURCE', 'named')
+
+# Posições de Sol, Lua e planetas: 'chebyshev' (tabelas pré-calculadas do de421) ou 'skyfield' (de421 direto)
+EPHEMERIS_MODE = os.environ.get('MURPHY_EPHEMERIS_MODE', 'chebyshev')
+
+# Céu visível enviado ao visualizador: altitude mínima (graus) e magnitude limite
+# de cada camada, da mais brilhante para a mais fraca (a última limita o índice)
+SKY_MIN_ALTITUDE = float(os.environ.get('MURPHY_SKY_MIN_ALTITUDE', '0.0'))
+SKY_TIER_MAGNITUDES = tuple(
+    float(m) for m in os.environ.get('MURPHY_SKY_TIER_MAGNITUDES', '3.5,5.0,6.5').split(',')
+)
+
+# Limite de registros por requisição no endpoint de lote
+MAX_BATCH_RECORDS = int(os.environ.get('MURPHY_MAX_BATCH_RECORDS', '100000'))
+
+# Threads do executor que roda as etapas do /calculate fora do event loop
+PIPELINE_WORKERS = int(os.environ.get('MURPHY_PIPELINE_WORKERS', '8'))
+
+# Onde rodam as etapas: 'thread' (executor de threads) ou 'process' (pool de processos pré-aquecidos)
+PIPELINE_MODE = os.environ.get('MURPHY_PIPELINE_MODE', 'thread')
+
+# Processos do pool no modo 'process' (padrão: um por núcleo)
+PIPELINE_PROCESSES = int(os.environ.get('MURPHY_PIPELINE_PROCESSES', '0')) or os.cpu_count() or 1
+
+# Tempo máximo (segundos) de cada etapa antes de usar o fallback
+STAGE_TIMEOUT_SECONDS = float(os.environ.get('MURPHY_STAGE_TIMEOUT', '5.0'))
+
+# Cache de geocodificação (SQLite local, fora do bundle versionado)
+GEOCODE_CACHE_FILE = Path(os.environ.get('MURPHY_GEOCODE_CACHE', BASE_DIR / 'data' / 'geocode_cache.sqlite3'))
+
+# Validade (segundos) das coordenadas em cache: padrão 30 dias
+GEOCODE_CACHE_TTL = float(os.environ.get('MURPHY_GEOCODE_TTL', str(30 * 24 * 3600)))
+
+# Entradas mantidas no LRU em memória na frente do SQLite
+GEOCODE_MEMORY_ENTRIES = int(os.environ.get('MURPHY_GEOCODE_MEMORY_ENTRIES', '1024'))
+
+# Orçamento total (segundos) de uma geocodificação externa, incluindo a espera do limitador
+GEOCODE_BUDGET_SECONDS = float(os.environ.get('MURPHY_GEOCODE_BUDGET', '2.0'))
+
+# Tempo mínimo (segundos) do orçamento reservado à requisição em si: com menos, a
+# consulta é recusada pelo limitador sem contar como falha do Nominatim
+GEOCODE_MIN_REQUEST_SECONDS = float(os.environ.get('MURPHY_GEOCODE_MIN_REQUEST', '0.5'))
+
+# Requisições por segundo ao Nominatim, somando todos os workers (política de uso: 1/s)
+GEOCODE_RATE_PER_SECOND = float(os.environ.get('MURPHY_GEOCODE_RATE', '1.0'))
+
+# Circuit breaker: falhas consecutivas para abrir e segundos até tentar de novo
+GEOCODE_BREAKER_FAILURES = int(os.environ.get('MURPHY_GEOCODE_BREAKER_FAILURES', '5'))
+GEOCODE_BREAKER_COOLDOWN = float(os.environ.get('MURPHY_GEOCODE_BREAKER_COOLDOWN', '30.0'))
+
+# Respostas completas (/calculate, /calculate-json) mantidas no cache LRU de resultados
+RESULT_CACHE_ENTRIES = int(os.environ.get('MURPHY_RESULT_CACHE_ENTRIES', '512'))
+
+# Camadas do céu (/api/sky) mantidas num LRU próprio, para não empurrar as páginas para fora
+SKY_CACHE_ENTRIES = int(os.environ.get('MURPHY_SKY_CACHE_ENTRIES', '512'))
+
+# Entradas por cache de etapa (cada etapa chaveada só pelas entradas que usa)
+STAGE_CACHE_ENTRIES = int(os.environ.get('MURPHY_STAGE_CACHE_ENTRIES', '4096'))
+
+
+def data_path(*parts):
+    """Retorna o caminho de um artefato dentro do diretório de dados"""
+    return DATA_DIR.joinpath(*parts)
@@ -0,0 +1,130 @@
+"""
+Data Bundle - Prepara e verifica todos os arquivos de dados do Murphy-1
+
+Baixa uma única vez (no build) o catálogo Hipparcos, as efemérides de421,
+os dados de rotação da Terra do IERS e o dump de cidades GeoNames para o
+diretório versionado app.config.DATA_DIR, gera os artefatos derivados (tabela
+zenital, gazetteer, lunações, tabelas de Chebyshev) e grava um manifest.json
+com o SHA-256 de cada arquivo. Em produção, com MURPHY_OFFLINE=1, o app usa
+apenas esses arquivos e nunca acessa a rede.
+
+Uso:
+    python -m app.data_bundle build
+    python -m app.data_bundle verify
+"""
+
+import hashlib
+import json
+import sys
+import time
+
+from app.config import DATA_DIR, DATA_BUNDLE_VERSION
+from app.catalog import HIPPARCOS_FILE, SNAPSHOT_DIR, build_snapshot
+from app.ephemeris import EPHEMERIS_FILE, TIMESCALE_FILE, get_loader
+from app.zenith_lut import LUT_FILE, build_lut, save_lut
+from app.gazetteer import GAZETTEER_FILE, build_gazetteer, fetch_sources
+from app.lunations import LUNATIONS_FILE, build_table, save_table
+from app.position_tables import TABLES_FILE, build_tables, save_tables
+
+MANIFEST_FILE = 'manifest.json'
+
+
+def _sha256(path):
+    """Calcula o SHA-256 de um arquivo em blocos"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _bundle_files():
+    """Lista (caminho relativo) de todos os arquivos que compõem o bundle"""
+    files = [
+        HIPPARCOS_FILE, EPHEMERIS_FILE, TIMESCALE_FILE,
+        LUT_FILE.name, GAZETTEER_FILE.name, LUNATIONS_FILE.name, TABLES_FILE.name,
+    ]
+    files += sorted(
+        str(path.relative_to(DATA_DIR)) for path in SNAPSHOT_DIR.iterdir()
+    )
+    return files
+
+
+def build_bundle():
+    """Baixa os arquivos fonte, gera os artefatos e grava o manifest"""
+    from skyfield.data import hipparcos
+
+    loader = get_loader()
+    print(f"📦 Preparando bundle v{DATA_BUNDLE_VERSION} em {DATA_DIR}")
+
+    # Arquivos fonte (download apenas se ainda não existirem)
+    with loader.open(hipparcos.URL):
+        pass
+    loader(EPHEMERIS_FILE)
+    if not loader.exists(TIMESCALE_FILE):
+        loader.download(loader.build_url(TIMESCALE_FILE))
+
+    # Artefatos derivados
+    build_snapshot(SNAPSHOT_DIR)
+    save_lut(build_lut(), LUT_FILE)
+    build_gazetteer(*fetch_sources())
+    save_table(build_table())
+    save_tables(build_tables())
+
+    manifest = {
+        'version': DATA_BUNDLE_VERSION,
+        'built_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'files': {},
+    }
+    for name in _bundle_files():
+        path = DATA_DIR / name
+        manifest['files'][name] = {
+            'sha256': _sha256(path),
+            'size': path.stat().st_size,
+        }
+        print(f"   ✅ {name} ({path.stat().st_size} bytes)")
+
+    (DATA_DIR / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+def verify_bundle(checksums=True):
+    """Verifica o bundle contra o manifest e retorna a lista de problemas"""
+    manifest_path = DATA_DIR / MANIFEST_FILE
+    if not manifest_path.exists():
+        return [f"{MANIFEST_FILE} ausente em {DATA_DIR}"]
+
+    manifest = json.loads(manifest_path.read_text())
+    problems = []
+    if manifest.get('version') != DATA_BUNDLE_VERSION:
+        problems.append(
+            f"versão do bundle {manifest.get('version')} difere da esperada {DATA_BUNDLE_VERSION}"
+        )
+
+    for name, info in manifest['files'].items():
+        path = DATA_DIR / name
+        if not path.exists():
+            problems.append(f"{name} ausente")
+        elif path.stat().st_size != info['size']:
+            problems.append(f"{name} com tamanho inesperado")
+        elif checksums and _sha256(path) != info['sha256']:
+            problems.append(f"{name} com checksum inválido")
+    return problems
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command == 'build':
+        build_bundle()
+        problems = verify_bundle()
+    elif command == 'verify':
+        problems = verify_bundle()
+    else:
+        print("Uso: python -m app.data_bundle build|verify")
+        sys.exit(1)
+
+    for problem in problems:
+        print(f"❌ {problem}")
+    if problems:
+        sys.exit(1)
+    print(f"✅ Bundle v{DATA_BUNDLE_VERSION} íntegro em {DATA_DIR}")
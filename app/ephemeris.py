@@ -0,0 +1,135 @@
+"""
+Ephemeris Registry - Timescale e efemérides compartilhados pelo processo
+
+Carrega uma única vez por processo a escala de tempo do Skyfield (com a
+tabela de leap seconds) e o arquivo de efemérides de421.bsp. Todos os
+calculadores pegam seus objetos daqui, então nenhuma requisição paga por
+I/O de arquivo ou construção de objetos.
+
+Os arquivos são lidos do bundle de dados (app.config.DATA_DIR). Em modo
+offline (MURPHY_OFFLINE=1) nenhum download é feito: arquivos ausentes
+geram OfflineDataError imediatamente.
+
+É o único motor de efemérides do app: posições de Sol, Lua e planetas e as
+tabelas pré-calculadas (lunações, Chebyshev) saem daqui. As tabelas usam
+como escala de tempo dias (UT) desde 1899/12/31 12:00, a mesma do ephem.Date.
+"""
+
+import threading
+from datetime import datetime, timedelta, timezone
+
+from skyfield.api import Loader
+
+from app.config import DATA_DIR, OFFLINE
+
+EPHEMERIS_FILE = 'de421.bsp'
+TIMESCALE_FILE = 'finals2000A.all'
+
+# Origem dos "dias" das tabelas (data juliana 2415020.0)
+DAY_EPOCH = datetime(1899, 12, 31, 12)
+DAY_EPOCH_JD = 2415020.0
+
+_lock = threading.Lock()
+_loader = None
+_timescale = None
+_ephemeris = None
+
+
+class OfflineDataError(RuntimeError):
+    """Arquivo de dados ausente com o modo offline ativo"""
+
+
+def get_loader():
+    """Retorna o Loader do Skyfield apontando para o diretório do bundle"""
+    global _loader
+    if _loader is None:
+        with _lock:
+            if _loader is None:
+                DATA_DIR.mkdir(parents=True, exist_ok=True)
+                _loader = Loader(str(DATA_DIR), verbose=False)
+    return _loader
+
+
+def require_local(filename):
+    """Garante que o arquivo existe localmente quando o modo offline está ativo"""
+    loader = get_loader()
+    if OFFLINE and not loader.exists(filename):
+        raise OfflineDataError(
+            f"Modo offline: {filename} ausente em {DATA_DIR}. "
+            f"Gere o bundle com `python -m app.data_bundle build`."
+        )
+    return loader.path_to(filename)
+
+
+def get_timescale():
+    """Retorna a escala de tempo compartilhada (inicialização lazy e thread-safe)"""
+    global _timescale
+    if _timescale is None:
+        loader = get_loader()
+        with _lock:
+            if _timescale is None:
+                # Com finals2000A.all no bundle, usar os dados do IERS; senão as
+                # tabelas embutidas no Skyfield (nenhuma das opções acessa a rede)
+                builtin = not loader.exists(TIMESCALE_FILE)
+                _timescale = loader.timescale(builtin=builtin)
+    return _timescale
+
+
+def get_ephemeris():
+    """Retorna as efemérides de421 compartilhadas (inicialização lazy e thread-safe)"""
+    global _ephemeris
+    if _ephemeris is None:
+        require_local(EPHEMERIS_FILE)
+        loader = get_loader()
+        with _lock:
+            if _ephemeris is None:
+                _ephemeris = loader(EPHEMERIS_FILE)
+    return _ephemeris
+
+
+def warm_up():
+    """Carrega timescale e efemérides antecipadamente (startup do servidor)"""
+    return get_timescale(), get_ephemeris()
+
+
+def instant_to_day(instant):
+    """Instante "AAAA-MM-DD HH:MM[:SS]" (UT) em dias desde 1899/12/31 12:00"""
+    return (datetime.fromisoformat(instant) - DAY_EPOCH) / timedelta(days=1)
+
+
+def day_to_datetime(day):
+    """Dias desde 1899/12/31 12:00 de volta para datetime (UT)"""
+    return DAY_EPOCH + timedelta(days=float(day))
+
+
+def current_day():
+    """Instante atual em dias desde 1899/12/31 12:00"""
+    return (datetime.now(timezone.utc).replace(tzinfo=None) - DAY_EPOCH) / timedelta(days=1)
+
+
+def ephemeris_days():
+    """Intervalo (início, fim) em dias coberto por todos os segmentos do de421"""
+    segments = get_ephemeris().segments
+    start = max(segment.spk_segment.start_jd for segment in segments)
+    end = min(segment.spk_segment.end_jd for segment in segments)
+    # Um dia de margem: os segmentos são em TDB e o tempo de luz recua a consulta
+    return start - DAY_EPOCH_JD + 1, end - DAY_EPOCH_JD - 1
+
+
+def supported_dates():
+    """Primeira e última data (datetime.date) com o dia inteiro dentro do de421"""
+    first, last = ephemeris_days()
+    return (day_to_datetime(first) + timedelta(days=1)).date(), (day_to_datetime(last) - timedelta(days=1)).date()
+
+
+def apparent_geocentric(target, days):
+    """
+    Posição geocêntrica aparente (3, n) em UA no equador e equinócio
+    verdadeiros da data, com tempo de luz e aberração, para dias (UT1).
+    """
+    from skyfield.framelib import true_equator_and_equinox_of_date
+
+    ephemeris = get_ephemeris()
+    t = get_timescale().ut1_jd(days + DAY_EPOCH_JD)
+    apparent = ephemeris['earth'].at(t).observe(ephemeris[target]).apparent()
+    return apparent.frame_xyz(true_equator_and_equinox_of_date).au
@@ -0,0 +1,259 @@
+"""
+Gazetteer - Geocodificação local a partir de um dump de cidades GeoNames
+
+O dump (cities15000.zip + countryInfo.txt) é convertido uma única vez num
+SQLite indexado com a chave (nome normalizado, código do país). Nomes são
+normalizados sem acentos e sem diferença de maiúsculas, e cada cidade entra
+também pelos nomes alternativos. Em caso de homônimos o nome principal de uma
+cidade vence qualquer nome alternativo de outra; entre nomes do mesmo tipo
+vence a mais populosa.
+Países são aceitos pelo código ISO, pelo nome em inglês ou em português.
+
+Uso:
+    python -m app.gazetteer build [cities15000.zip|.txt] [countryInfo.txt]
+    python -m app.gazetteer lookup "São Paulo" Brasil
+"""
+
+import io
+import sqlite3
+import sys
+import threading
+import unicodedata
+import zipfile
+from pathlib import Path
+
+from app.config import data_path
+
+GAZETTEER_FILE = data_path('gazetteer.sqlite3')
+SOURCE_DIR = data_path('geonames')
+CITIES_URL = 'https://download.geonames.org/export/dump/cities15000.zip'
+COUNTRY_INFO_URL = 'https://download.geonames.org/export/dump/countryInfo.txt'
+
+# Nomes em português dos países mais comuns no formulário
+COUNTRY_ALIASES = {
+    'brasil': 'BR',
+    'estados unidos': 'US',
+    'estados unidos da america': 'US',
+    'eua': 'US',
+    'reino unido': 'GB',
+    'inglaterra': 'GB',
+    'alemanha': 'DE',
+    'franca': 'FR',
+    'espanha': 'ES',
+    'italia': 'IT',
+    'holanda': 'NL',
+    'paises baixos': 'NL',
+    'belgica': 'BE',
+    'suica': 'CH',
+    'suecia': 'SE',
+    'noruega': 'NO',
+    'dinamarca': 'DK',
+    'finlandia': 'FI',
+    'irlanda': 'IE',
+    'polonia': 'PL',
+    'grecia': 'GR',
+    'russia': 'RU',
+    'japao': 'JP',
+    'china': 'CN',
+    'coreia do sul': 'KR',
+    'india': 'IN',
+    'africa do sul': 'ZA',
+    'mocambique': 'MZ',
+    'canada': 'CA',
+    'mexico': 'MX',
+    'peru': 'PE',
+    'colombia': 'CO',
+    'equador': 'EC',
+    'bolivia': 'BO',
+    'paraguai': 'PY',
+    'uruguai': 'UY',
+    'venezuela': 'VE',
+    'argentina': 'AR',
+    'chile': 'CL',
+    'cabo verde': 'CV',
+    'guine-bissau': 'GW',
+    'sao tome e principe': 'ST',
+    'timor-leste': 'TL',
+    'nova zelandia': 'NZ',
+    'australia': 'AU',
+}
+
+
+def normalize_name(text):
+    """Minúsculas, sem acentos e com espaços simples"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(text.lower().split())
+
+
+def _read_lines(path):
+    """Linhas de um arquivo texto ou do primeiro .txt de um .zip"""
+    path = Path(path)
+    if path.suffix == '.zip':
+        with zipfile.ZipFile(path) as archive:
+            member = next(name for name in archive.namelist() if name.endswith('.txt'))
+            with archive.open(member) as f:
+                yield from io.TextIOWrapper(f, encoding='utf-8')
+    else:
+        with open(path, encoding='utf-8') as f:
+            yield from f
+
+
+def _country_aliases(country_info_path):
+    """Mapa nome/código normalizado → código ISO"""
+    aliases = {}
+    for line in _read_lines(country_info_path):
+        if line.startswith('#'):
+            continue
+        fields = line.rstrip('\n').split('\t')
+        if len(fields) < 5:
+            continue
+        code = fields[0]
+        aliases[normalize_name(code)] = code
+        aliases[normalize_name(fields[1])] = code
+        aliases[normalize_name(fields[4])] = code
+    aliases.update(COUNTRY_ALIASES)
+    return aliases
+
+
+def _country_names(country_info_path):
+    """Mapa código ISO → nome do país (para exibição)"""
+    names = {}
+    for line in _read_lines(country_info_path):
+        fields = line.rstrip('\n').split('\t')
+        if not line.startswith('#') and len(fields) >= 5:
+            names[fields[0]] = fields[4]
+    return names
+
+
+def fetch_sources(directory=SOURCE_DIR):
+    """Baixa o dump de cidades e a tabela de países (se ainda não existirem)"""
+    from app.ephemeris import get_loader
+
+    directory.mkdir(parents=True, exist_ok=True)
+    loader = get_loader()
+    paths = []
+    for url in (CITIES_URL, COUNTRY_INFO_URL):
+        path = directory / url.rsplit('/', 1)[-1]
+        if not path.exists():
+            loader.download(url, str(path))
+        paths.append(path)
+    return paths
+
+
+def build_gazetteer(cities_path, country_info_path, path=GAZETTEER_FILE):
+    """Converte o dump GeoNames no índice SQLite (gravação atômica)"""
+    places = {}
+    cities = {}
+    for line in _read_lines(cities_path):
+        fields = line.rstrip('\n').split('\t')
+        if len(fields) < 15:
+            continue
+        country = fields[8]
+        latitude, longitude = float(fields[4]), float(fields[5])
+        population = int(fields[14] or 0)
+        key = (normalize_name(fields[1]), country)
+        if key not in cities or population > cities[key][0]:
+            cities[key] = (population, fields[1])
+        # Nome principal (e sua forma ASCII) antes dos alternativos, depois população
+        primary = {normalize_name(fields[1]), normalize_name(fields[2])}
+        for name in {fields[1], fields[2], *fields[3].split(',')}:
+            key = (normalize_name(name), country)
+            rank = (key[0] in primary, population)
+            if key[0] and (key not in places or rank > places[key][0]):
+                places[key] = (rank, latitude, longitude)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    tmp.unlink(missing_ok=True)
+    db = sqlite3.connect(str(tmp))
+    db.execute(
+        "CREATE TABLE places (name TEXT, country TEXT, latitude REAL, longitude REAL, "
+        "population INTEGER, PRIMARY KEY (name, country)) WITHOUT ROWID"
+    )
+    db.execute("CREATE TABLE countries (alias TEXT PRIMARY KEY, code TEXT) WITHOUT ROWID")
+    db.execute("CREATE TABLE country_names (code TEXT PRIMARY KEY, name TEXT) WITHOUT ROWID")
+    db.execute("CREATE TABLE cities (name TEXT, country TEXT, population INTEGER)")
+    db.executemany(
+        "INSERT INTO places VALUES (?, ?, ?, ?, ?)",
+        ((name, country, lat, lon, pop) for (name, country), ((_, pop), lat, lon) in places.items()),
+    )
+    db.executemany("INSERT INTO countries VALUES (?, ?)", _country_aliases(country_info_path).items())
+    db.executemany("INSERT INTO country_names VALUES (?, ?)", _country_names(country_info_path).items())
+    db.executemany(
+        "INSERT INTO cities VALUES (?, ?, ?)",
+        ((name, country, pop) for (_, country), (pop, name) in cities.items()),
+    )
+    db.commit()
+    db.close()
+    tmp.replace(path)
+    return len(places)
+
+
+class Gazetteer:
+    """Consulta somente-leitura ao índice (cidade, país) gerado por build_gazetteer"""
+
+    def __init__(self, path=GAZETTEER_FILE):
+        self._db = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        self._lock = threading.Lock()
+
+    def country_code(self, country):
+        """Código ISO para um nome ou código de país, ou None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT code FROM countries WHERE alias = ?", (normalize_name(country),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def lookup(self, city, country):
+        """(latitude, longitude) da cidade, ou None se não estiver no índice"""
+        code = self.country_code(country)
+        if code is None:
+            return None
+        with self._lock:
+            row = self._db.execute(
+                "SELECT latitude, longitude FROM places WHERE name = ? AND country = ?",
+                (normalize_name(city), code),
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def cities(self):
+        """Todas as cidades (nome principal, nome do país, população)"""
+        with self._lock:
+            return self._db.execute(
+                "SELECT cities.name, COALESCE(country_names.name, cities.country), cities.population "
+                "FROM cities LEFT JOIN country_names ON country_names.code = cities.country"
+            ).fetchall()
+
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer():
+    """Retorna o gazetteer do processo, ou None se o índice não foi gerado"""
+    global _gazetteer
+    if _gazetteer is None and GAZETTEER_FILE.exists():
+        with _gazetteer_lock:
+            if _gazetteer is None:
+                _gazetteer = Gazetteer(GAZETTEER_FILE)
+    return _gazetteer
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command == 'build':
+        if len(sys.argv) > 3:
+            sources = sys.argv[2:4]
+        else:
+            sources = fetch_sources()
+        count = build_gazetteer(*sources)
+        print(f"✅ Gazetteer gravado em {GAZETTEER_FILE}: {count} nomes de cidades")
+    elif command == 'lookup' and len(sys.argv) > 3:
+        gazetteer = get_gazetteer()
+        result = gazetteer.lookup(sys.argv[2], sys.argv[3]) if gazetteer else None
+        print(result if result else "❌ Não encontrado")
+        sys.exit(0 if result else 1)
+    else:
+        print("Uso: python -m app.gazetteer build [cidades] [paises] | lookup CIDADE PAIS")
+        sys.exit(1)
@@ -0,0 +1,408 @@
+"""
+Geocoding - Converte cidade/país em coordenadas com cache em dois níveis
+
+Cidades presentes no gazetteer local (app/gazetteer.py) são resolvidas sem
+rede. Para as demais, como a maior parte do tráfego vem de poucas centenas
+de cidades, cada consulta passa primeiro por um LRU em memória e depois
+por um SQLite local, ambos chaveados pelo "cidade, país" normalizado e com
+TTL configurável. Só as faltas vão ao Nominatim, e consultas idênticas
+simultâneas compartilham uma única chamada. O LRU é consultado no event
+loop; tudo que toca o SQLite (cache em disco e limitador) roda em
+asyncio.to_thread.
+
+As chamadas externas usam um cliente httpx de longa duração (keep-alive),
+um orçamento fixo de latência, um limitador de taxa compartilhado entre
+todos os workers via SQLite (política do Nominatim: 1 requisição/s) e um
+circuit breaker que falha imediatamente após erros consecutivos. Só erros
+HTTP e timeouts do próprio Nominatim contam como falha: quando a espera do
+limitador não deixa pelo menos GEOCODE_MIN_REQUEST_SECONDS do orçamento,
+a consulta é recusada antes de chegar ao breaker.
+"""
+
+import asyncio
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import httpx
+
+from app.config import (
+    GEOCODE_CACHE_FILE,
+    GEOCODE_CACHE_TTL,
+    GEOCODE_MEMORY_ENTRIES,
+    GEOCODE_BUDGET_SECONDS,
+    GEOCODE_MIN_REQUEST_SECONDS,
+    GEOCODE_RATE_PER_SECOND,
+    GEOCODE_BREAKER_FAILURES,
+    GEOCODE_BREAKER_COOLDOWN
+)
+from app.gazetteer import get_gazetteer, normalize_name
+
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+USER_AGENT = "Murphy-1-Stellar-Calculator/1.0 (astronomical-calculator)"
+
+# Coordenadas usadas quando a geocodificação falha (São Paulo, Brasil)
+DEFAULT_COORDINATES = (-23.5505, -46.6333)
+
+
+def normalize_location(city, country):
+    """Chave canônica "cidade, país": minúsculas, sem acentos e espaços extras"""
+    return f"{normalize_name(city)}, {normalize_name(country)}"
+
+
+class LocationNotFound(ValueError):
+    """O Nominatim respondeu corretamente, mas sem resultado para a consulta"""
+
+
+class GeocodeCache:
+    """LRU em memória na frente de uma tabela SQLite, com TTL"""
+
+    def __init__(self, path=GEOCODE_CACHE_FILE, max_entries=GEOCODE_MEMORY_ENTRIES, ttl=GEOCODE_CACHE_TTL):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._db = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _connection(self):
+        """Abre o SQLite na primeira consulta (cria tabela se necessário)"""
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS geocode ("
+                "key TEXT PRIMARY KEY, latitude REAL, longitude REAL, stored_at REAL)"
+            )
+        return self._db
+
+    def _remember(self, key, coordinates, expires_at):
+        self._memory[key] = (coordinates, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Coordenadas em cache para a chave, ou None (bloqueante: pode ler o SQLite)"""
+        cached = self.get_memory(key)
+        return cached if cached is not None else self.get_disk(key)
+
+    def get_memory(self, key):
+        """Coordenadas no LRU em memória, ou None (sem I/O, seguro no event loop)"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[1] > time.time():
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry[0]
+        return None
+
+    def get_disk(self, key):
+        """Coordenadas no SQLite (promovidas ao LRU), ou None; rodar fora do event loop"""
+        now = time.time()
+        with self._db_lock:
+            row = self._connection().execute(
+                "SELECT latitude, longitude, stored_at FROM geocode WHERE key = ?", (key,)
+            ).fetchone()
+        with self._lock:
+            if row is not None and row[2] + self.ttl > now:
+                coordinates = (row[0], row[1])
+                self._remember(key, coordinates, row[2] + self.ttl)
+                self.disk_hits += 1
+                return coordinates
+
+            self.misses += 1
+            return None
+
+    def put(self, key, coordinates):
+        """Grava as coordenadas nos dois níveis; rodar fora do event loop"""
+        now = time.time()
+        with self._lock:
+            self._remember(key, coordinates, now + self.ttl)
+        with self._db_lock:
+            db = self._connection()
+            db.execute(
+                "INSERT OR REPLACE INTO geocode (key, latitude, longitude, stored_at) VALUES (?, ?, ?, ?)",
+                (key, coordinates[0], coordinates[1], now),
+            )
+            db.commit()
+
+    def stats(self):
+        """Contadores de acertos/faltas"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_ratio': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            'memory_entries': len(self._memory),
+            'ttl_seconds': self.ttl,
+        }
+
+
+class RateLimiter:
+    """
+    Limitador de taxa compartilhado entre processos.
+
+    Cada chamada reserva o próximo horário livre (intervalo de 1/taxa) numa
+    tabela SQLite sob BEGIN IMMEDIATE, de modo que todos os workers do
+    servidor respeitam juntos a mesma taxa.
+    """
+
+    def __init__(self, path=GEOCODE_CACHE_FILE, rate=GEOCODE_RATE_PER_SECOND, name='nominatim'):
+        self.path = path
+        self.interval = 1.0 / rate
+        self.name = name
+        self._db = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(
+                str(self.path), timeout=1.0, isolation_level=None, check_same_thread=False
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limit (name TEXT PRIMARY KEY, next_at REAL)"
+            )
+        return self._db
+
+    def reserve(self, max_wait):
+        """
+        Reserva um horário de chamada e retorna quantos segundos esperar.
+
+        Retorna None (sem reservar) se a espera passaria de max_wait.
+        Bloqueante (BEGIN IMMEDIATE espera até 1 s pelo lock do SQLite):
+        rodar fora do event loop.
+        """
+        with self._lock:
+            db = self._connection()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = db.execute("SELECT next_at FROM rate_limit WHERE name = ?", (self.name,)).fetchone()
+                slot = max(now, row[0] if row else now)
+                if slot - now > max_wait:
+                    db.execute("ROLLBACK")
+                    return None
+                db.execute(
+                    "INSERT OR REPLACE INTO rate_limit (name, next_at) VALUES (?, ?)",
+                    (self.name, slot + self.interval),
+                )
+                db.execute("COMMIT")
+                return slot - now
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+
+
+class CircuitOpenError(RuntimeError):
+    """Chamada recusada porque o circuit breaker está aberto"""
+
+
+class CircuitBreaker:
+    """Abre após N falhas consecutivas; após o cooldown deixa passar uma tentativa"""
+
+    def __init__(self, failures=GEOCODE_BREAKER_FAILURES, cooldown=GEOCODE_BREAKER_COOLDOWN):
+        self.failures = failures
+        self.cooldown = cooldown
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return 'half-open'
+        return 'open'
+
+    def before_call(self):
+        """
+        Levanta CircuitOpenError se a chamada não deve ser feita. Retorna True
+        se esta é a tentativa do half-open, que precisa de end_trial() se
+        terminar sem record_success/record_failure.
+        """
+        state = self.state
+        if state == 'open' or (state == 'half-open' and self._trial):
+            raise CircuitOpenError("Nominatim indisponível (circuit breaker aberto)")
+        if state == 'half-open':
+            self._trial = True
+            return True
+        return False
+
+    def end_trial(self):
+        """Libera a tentativa do half-open (recusada pelo limitador, erro local ou cancelada)"""
+        self._trial = False
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self._trial = False
+        if self.opened_at is not None or self.consecutive_failures >= self.failures:
+            self.opened_at = time.monotonic()
+
+
+_cache = None
+_inflight = {}
+_client = None
+_limiter = None
+_breaker = CircuitBreaker()
+_gazetteer_hits = 0
+
+
+def get_geocode_cache():
+    """Retorna o cache de geocodificação do processo"""
+    global _cache
+    if _cache is None:
+        _cache = GeocodeCache()
+    return _cache
+
+
+def get_http_client():
+    """Cliente httpx de longa duração com keep-alive e timeout dentro do orçamento"""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            headers={"User-Agent": USER_AGENT},
+            timeout=httpx.Timeout(GEOCODE_BUDGET_SECONDS),
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+        )
+    return _client
+
+
+async def close_http_client():
+    """Fecha o cliente httpx (shutdown do servidor)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _get_rate_limiter():
+    global _limiter
+    if _limiter is None:
+        _limiter = RateLimiter()
+    return _limiter
+
+
+def geocoding_stats():
+    """Contadores do cache e estado do circuit breaker"""
+    stats = get_geocode_cache().stats()
+    stats['gazetteer_hits'] = _gazetteer_hits
+    stats['circuit_breaker'] = _breaker.state
+    stats['consecutive_failures'] = _breaker.consecutive_failures
+    return stats
+
+
+async def _fetch_nominatim(query):
+    """Consulta o Nominatim (OpenStreetMap) e retorna (latitude, longitude)"""
+    params = {
+        "q": query,
+        "format": "json",
+        "limit": 1,
+        "addressdetails": 1
+    }
+    response = await get_http_client().get(NOMINATIM_URL, params=params)
+    response.raise_for_status()
+    data = response.json()
+
+    if not data:
+        raise LocationNotFound(f"Localização não encontrada: {query}")
+    location = data[0]
+    return float(location["lat"]), float(location["lon"])
+
+
+async def _fetch_within_budget(query, budget=GEOCODE_BUDGET_SECONDS):
+    """Limitador de taxa + chamada externa, tudo dentro do orçamento de latência"""
+    deadline = time.monotonic() + budget
+    trial = _breaker.before_call()
+    try:
+        # Espera do limitador que não deixa tempo para a requisição: recusa sem contar no breaker
+        wait = await asyncio.to_thread(
+            _get_rate_limiter().reserve, max_wait=budget - GEOCODE_MIN_REQUEST_SECONDS
+        )
+        if wait is None:
+            raise TimeoutError("Limite de taxa do Nominatim excede o orçamento de latência")
+        await asyncio.sleep(wait)
+        remaining = deadline - time.monotonic()
+        if remaining < GEOCODE_MIN_REQUEST_SECONDS:
+            raise TimeoutError("Orçamento de latência esgotado antes da chamada ao Nominatim")
+
+        try:
+            coordinates = await asyncio.wait_for(_fetch_nominatim(query), remaining)
+        except LocationNotFound:
+            # Resposta válida sem resultado: o serviço está saudável
+            _breaker.record_success()
+            raise
+        except (httpx.HTTPError, asyncio.TimeoutError, ValueError, KeyError, IndexError, TypeError):
+            # Falha de rede, timeout ou resposta malformada (JSON ou campos inválidos)
+            _breaker.record_failure()
+            raise
+        _breaker.record_success()
+        return coordinates
+    finally:
+        if trial:
+            _breaker.end_trial()
+
+
+async def _resolve(key, query):
+    """Busca no upstream e grava no cache; compartilhada por consultas idênticas"""
+    coordinates = await _fetch_within_budget(query)
+    await asyncio.to_thread(get_geocode_cache().put, key, coordinates)
+    print(f"🌍 Geocoded {query} -> {coordinates[0]}, {coordinates[1]}")
+    return coordinates
+
+
+async def locate(city: str, country: str) -> tuple[float, float, bool]:
+    """
+    Converte cidade e país em (latitude, longitude, resolvido).
+
+    Ordem: gazetteer local → LRU em memória → SQLite → Nominatim. Em caso de
+    falha retorna as coordenadas padrão de São Paulo com resolvido=False
+    (nada é gravado no cache).
+    """
+    global _gazetteer_hits
+    gazetteer = get_gazetteer()
+    if gazetteer is not None:
+        coordinates = await asyncio.to_thread(gazetteer.lookup, city, country)
+        if coordinates is not None:
+            _gazetteer_hits += 1
+            return coordinates[0], coordinates[1], True
+
+    key = normalize_location(city, country)
+    cache = get_geocode_cache()
+    cached = cache.get_memory(key)
+    if cached is None:
+        cached = await asyncio.to_thread(cache.get_disk, key)
+    if cached is not None:
+        return cached[0], cached[1], True
+
+    try:
+        task = _inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(_resolve(key, f"{city}, {country}"))
+            _inflight[key] = task
+            task.add_done_callback(lambda _: _inflight.pop(key, None))
+        latitude, longitude = await asyncio.shield(task)
+        return latitude, longitude, True
+    except Exception as e:
+        print(f"❌ Erro na geocodificação: {e}")
+        print("🔄 Usando coordenadas padrão de São Paulo")
+        return DEFAULT_COORDINATES[0], DEFAULT_COORDINATES[1], False
+
+
+async def geocode_location(city: str, country: str) -> tuple[float, float]:
+    """Converte cidade e país em latitude e longitude (São Paulo em caso de falha)"""
+    latitude, longitude, _ = await locate(city, country)
+    return latitude, longitude
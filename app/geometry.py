@@ -0,0 +1,190 @@
+"""
+Geometry - Kernels vetorizados de separação, cone, horizonte e projeção
+
+A mesma geometria esférica estava escrita várias vezes: distância angular
+com `math` estrela por estrela (zenith_calculator, ModernSkyRenderer),
+arccos de produtos escalares (star_index, zenith_lut, visible_sky), a
+rotação equatorial → horizontal (birth_moment, visible_sky) e duas
+projeções para o canvas (visible_sky e generate_modern_sky_data). Aqui
+ficam as versões únicas, todas array-in/array-out: aceitam escalares ou
+arrays NumPy com broadcasting e não têm laço em Python.
+
+Convenções: ângulos públicos em graus (as funções de horizonte trabalham em
+radianos, como app.sidereal e app.birth_moment), vetores unitários no
+último eixo (N, 3) e azimute contado do norte para o leste. Nas projeções,
+norte fica em +y e leste em +x; to_canvas inverte o y para o canvas.
+
+Uso:
+    python -m app.geometry benchmark [estrelas]
+"""
+
+import sys
+
+import numpy as np
+
+
+def radec_to_unit_vectors(ra_degrees, dec_degrees):
+    """Converte RA/Dec (graus) em vetores unitários cartesianos (N, 3)"""
+    ra = np.radians(np.asarray(ra_degrees, dtype=np.float64))
+    dec = np.radians(np.asarray(dec_degrees, dtype=np.float64))
+    cos_dec = np.cos(dec)
+    return np.stack([cos_dec * np.cos(ra), cos_dec * np.sin(ra), np.sin(dec)], axis=-1)
+
+
+def unit_vectors_to_radec(vectors):
+    """RA em [0, 360) e Dec (graus) de vetores unitários (N, 3)"""
+    ra = np.degrees(np.arctan2(vectors[..., 1], vectors[..., 0])) % 360.0
+    dec = np.degrees(np.arcsin(np.clip(vectors[..., 2], -1.0, 1.0)))
+    return ra, dec
+
+
+# Separação angular
+
+def cosine_to_degrees(cosines):
+    """Ângulo (graus) a partir do cosseno (produto escalar de vetores unitários)"""
+    # minimum/maximum em vez de np.clip: mesmo resultado, metade do custo em arrays pequenos
+    return np.degrees(np.arccos(np.minimum(np.maximum(cosines, -1.0), 1.0)))
+
+
+def separation_degrees(ra1, dec1, ra2, dec2):
+    """Separação angular (graus) entre posições RA/Dec (graus), com broadcasting"""
+    ra1, dec1, ra2, dec2 = np.radians(ra1), np.radians(dec1), np.radians(ra2), np.radians(dec2)
+    return cosine_to_degrees(
+        np.sin(dec1) * np.sin(dec2) + np.cos(dec1) * np.cos(dec2) * np.cos(ra1 - ra2)
+    )
+
+
+def vector_separation_degrees(a, b):
+    """Separação angular (graus) entre vetores unitários (..., 3), com broadcasting"""
+    return cosine_to_degrees(np.sum(a * b, axis=-1))
+
+
+# Cone
+
+def chord_length(radius_degrees):
+    """Distância euclidiana entre vetores unitários separados pelo ângulo dado"""
+    return 2.0 * np.sin(np.radians(radius_degrees) / 2.0)
+
+
+def chord_to_degrees(chord):
+    """Ângulo (graus) a partir da corda entre vetores unitários"""
+    return np.degrees(2.0 * np.arcsin(np.clip(np.asarray(chord) / 2.0, 0.0, 1.0)))
+
+
+def within_cone(cosines, radius_degrees):
+    """Máscara dos pontos a até radius_degrees do centro, dados os cossenos ao centro"""
+    return cosines >= np.cos(np.radians(radius_degrees))
+
+
+def cone_mask(vectors, center, radius_degrees):
+    """Máscara dos vetores unitários (N, 3) a até radius_degrees do vetor center"""
+    return within_cone(vectors @ center, radius_degrees)
+
+
+# Horizonte
+
+def horizontal(vectors, matrix):
+    """Altitude e azimute (radianos) de vetores (N, 3) pela matriz 3×3 para (leste, norte, zênite)"""
+    local = vectors @ matrix.T
+    altitude = np.arcsin(np.clip(local[..., 2], -1.0, 1.0))
+    azimuth = np.mod(np.arctan2(local[..., 0], local[..., 1]), 2 * np.pi)
+    return altitude, azimuth
+
+
+def radec_to_altaz(ra_degrees, dec_degrees, matrix):
+    """Altitude e azimute (graus) de posições RA/Dec (graus) pela matriz do horizonte"""
+    altitude, azimuth = horizontal(radec_to_unit_vectors(ra_degrees, dec_degrees), matrix)
+    return np.degrees(altitude), np.degrees(azimuth)
+
+
+def hour_angle_to_altaz(hour_angle, dec, latitude):
+    """Altitude e azimute (radianos) a partir de ângulo horário, declinação e latitude (radianos)"""
+    sin_phi, cos_phi = np.sin(latitude), np.cos(latitude)
+    sin_dec, cos_dec = np.sin(dec), np.cos(dec)
+    cos_ha = np.cos(hour_angle)
+    altitude = np.arcsin(sin_phi * sin_dec + cos_phi * cos_dec * cos_ha)
+    azimuth = np.mod(
+        np.arctan2(-cos_dec * np.sin(hour_angle), sin_dec * cos_phi - cos_dec * sin_phi * cos_ha),
+        2 * np.pi,
+    )
+    return altitude, azimuth
+
+
+# Projeções
+
+def project_zenithal(altitude_degrees, azimuth_degrees):
+    """Projeção azimutal equidistante: zênite em (0, 0) e horizonte no raio 1"""
+    radius = (90.0 - np.asarray(altitude_degrees)) / 90.0
+    azimuth = np.radians(azimuth_degrees)
+    return radius * np.sin(azimuth), radius * np.cos(azimuth)
+
+
+def project_orthographic(ra_degrees, dec_degrees, center_ra, center_dec):
+    """Projeção ortográfica no plano tangente em (center_ra, center_dec): raio 1 a 90° do centro"""
+    ra = np.radians(np.asarray(ra_degrees, dtype=np.float64))
+    dec = np.radians(np.asarray(dec_degrees, dtype=np.float64))
+    center_dec = np.radians(center_dec)
+    delta_ra = ra - np.radians(center_ra)
+    cos_dec = np.cos(dec)
+    x = np.sin(delta_ra) * cos_dec
+    y = np.sin(dec) * np.cos(center_dec) - cos_dec * np.sin(center_dec) * np.cos(delta_ra)
+    return x, y
+
+
+def to_canvas(x, y, scale, center_x=0.0, center_y=0.0):
+    """Coordenadas do canvas (y para baixo) a partir do plano projetado (norte em +y)"""
+    return center_x + scale * np.asarray(x), center_y - scale * np.asarray(y)
+
+
+def _scalar_angular_distance(ra1, dec1, ra2, dec2):
+    """Laço com `math` que os kernels substituíram (referência do benchmark)"""
+    import math
+
+    ra1, dec1, ra2, dec2 = map(math.radians, [ra1, dec1, ra2, dec2])
+    cos_dist = math.sin(dec1) * math.sin(dec2) + math.cos(dec1) * math.cos(dec2) * math.cos(ra1 - ra2)
+    return math.degrees(math.acos(max(-1, min(1, cos_dist))))
+
+
+def benchmark(stars=10000, repeat=20, seed=0):
+    """Custo por estrela (ns) de cada kernel sobre `stars` posições aleatórias"""
+    import timeit
+
+    rng = np.random.default_rng(seed)
+    ra = rng.uniform(0, 360, stars)
+    dec = np.degrees(np.arcsin(rng.uniform(-1, 1, stars)))
+    vectors = radec_to_unit_vectors(ra, dec)
+    center = vectors[0]
+    matrix = np.linalg.qr(rng.normal(size=(3, 3)))[0]
+    altitude, azimuth = np.degrees(horizontal(vectors, matrix))
+    ra_list, dec_list = ra.tolist(), dec.tolist()
+
+    kernels = {
+        'radec_to_unit_vectors': lambda: radec_to_unit_vectors(ra, dec),
+        'separation_degrees': lambda: separation_degrees(ra, dec, 10.0, 20.0),
+        'vector_separation_degrees': lambda: vector_separation_degrees(vectors, center),
+        'cosine_to_degrees (matmul)': lambda: cosine_to_degrees(vectors @ center),
+        'cone_mask': lambda: cone_mask(vectors, center, 10.0),
+        'horizontal': lambda: horizontal(vectors, matrix),
+        'radec_to_altaz': lambda: radec_to_altaz(ra, dec, matrix),
+        'hour_angle_to_altaz': lambda: hour_angle_to_altaz(ra, dec, 0.5),
+        'project_zenithal': lambda: project_zenithal(altitude, azimuth),
+        'project_orthographic': lambda: project_orthographic(ra, dec, 10.0, 20.0),
+        'to_canvas': lambda: to_canvas(ra, dec, 100.0),
+        'math (laço escalar)': lambda: [_scalar_angular_distance(r, d, 10.0, 20.0) for r, d in zip(ra_list, dec_list)],
+    }
+    return {
+        name: min(timeit.repeat(kernel, number=1, repeat=repeat)) / stars * 1e9
+        for name, kernel in kernels.items()
+    }
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command == 'benchmark':
+        stars = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+        print(f"⏱️ Custo por estrela ({stars} estrelas, melhor de 20 execuções):")
+        for name, nanoseconds in benchmark(stars).items():
+            print(f"   {name}: {nanoseconds:.1f} ns")
+    else:
+        print("Uso: python -m app.geometry benchmark [estrelas]")
+        sys.exit(1)
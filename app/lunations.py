@@ -0,0 +1,234 @@
+"""
+Lunations - Tabela pré-calculada de luas nova, crescente, cheia e minguante
+
+Próxima lua cheia/nova eram buscas iterativas de raiz que custavam quase
+1 ms por requisição. Todas as fases principais cobertas pelo de421 (cerca de
+10 mil instantes, buscados offline com o almanac do Skyfield) cabem num único
+array ordenado, em dias desde 1899/12/31 12:00 (app.ephemeris): a tabela
+sempre começa numa lua nova, então a fase do evento i é i % 4 e o número da
+lunação (Brown) também sai do índice. Próxima lua cheia/nova, fase do ciclo e
+lunação são respondidas por uma busca binária.
+
+Datas dentro do de421 mas fora do artefato (o começo de 1899 e o fim da
+cobertura) usam tabelas locais de alguns meses, buscadas uma vez por mês
+sinódico e guardadas no cache de etapas; datas fora do de421 são recusadas
+com ValueError em vez de rodar a busca a cada requisição.
+
+Uso:
+    python -m app.lunations build
+    python -m app.lunations verify [amostras]
+"""
+
+import sys
+from bisect import bisect_right
+
+import numpy as np
+
+from app.config import data_path
+from app.stage_cache import cached_stage
+from app.ephemeris import (
+    DAY_EPOCH_JD,
+    current_day,
+    day_to_datetime,
+    ephemeris_days,
+    get_ephemeris,
+    get_timescale,
+    instant_to_day,
+)
+
+LUNATIONS_FILE = data_path('lunations.npz')
+TABLE_START = instant_to_day('1900-01-01')
+TABLE_END = instant_to_day('2100-01-01')
+
+# Mesma numeração do almanac.moon_phases do Skyfield
+NEW_MOON, FIRST_QUARTER, FULL_MOON, LAST_QUARTER = range(4)
+
+# Lunação 1 de Brown: lua nova de 17/01/1923
+BROWN_EPOCH = instant_to_day('1923-01-17 02:41')
+SYNODIC_MONTH = 29.530588853
+
+# Diferença aceita contra as buscas do pyephem (teorias e ΔT diferentes)
+EVENT_TOLERANCE_SECONDS = 60.0
+
+# Fração de cada quarto (antes e depois do evento) em que vale o nome da fase principal
+_PRINCIPAL_WINDOW = 0.25
+
+
+class LunationTable:
+    """Instantes (dias desde 1899/12/31 12:00) das fases principais, a partir de uma lua nova"""
+
+    def __init__(self, times, first_lunation):
+        self.times = np.asarray(times, dtype=np.float64)
+        self.first_lunation = int(first_lunation)
+        self._times = self.times.tolist()  # bisect sobre lista evita overhead do numpy
+
+    def __len__(self):
+        return len(self._times)
+
+    def covers(self, date):
+        """True se há eventos antes e depois de todas as fases a partir de date"""
+        return self._times[0] <= date < self._times[-5]
+
+    def _position(self, date):
+        i = bisect_right(self._times, date)
+        if i == 0 or i > len(self._times) - 4:
+            raise ValueError(f"Data fora da tabela de lunações: {day_to_datetime(date)}")
+        return i
+
+    def next_event(self, date, phase):
+        """Instante do próximo evento da fase (NEW_MOON...LAST_QUARTER) após date"""
+        i = self._position(date)
+        return self._times[i + (phase - i) % 4]
+
+    def phase_index(self, date):
+        """
+        Fase do ciclo de 0 a 7: nova, crescente, quarto crescente, gibosa
+        crescente, cheia, gibosa minguante, quarto minguante, minguante.
+
+        Perto de cada evento (um quarto de cada intervalo antes e depois) vale
+        o nome da fase principal; no meio, o da fase intermediária.
+        """
+        i = self._position(date)
+        previous, following = self._times[i - 1], self._times[i]
+        fraction = (date - previous) / (following - previous)
+        phase = (i - 1) % 4
+        if fraction < _PRINCIPAL_WINDOW:
+            return 2 * phase
+        if fraction > 1 - _PRINCIPAL_WINDOW:
+            return (2 * phase + 2) % 8
+        return 2 * phase + 1
+
+    def lunation_number(self, date):
+        """Número de Brown da lunação em curso (iniciada na última lua nova)"""
+        return self.first_lunation + (self._position(date) - 1) // 4
+
+
+def brown_lunation(new_moon):
+    """Número de Brown da lunação que começa na lua nova informada"""
+    return int(round((float(new_moon) - BROWN_EPOCH) / SYNODIC_MONTH)) + 1
+
+
+def build_table(start=TABLE_START, end=TABLE_END):
+    """Busca no de421 todas as fases principais de start até depois de end (dentro da cobertura)"""
+    from skyfield import almanac
+
+    # Uma lunação antes de start (a lua nova inicial) e duas depois de end
+    # (as próximas fases até o fim)
+    first, last = ephemeris_days()
+    lo, hi = max(start - SYNODIC_MONTH, first), min(end + 2 * SYNODIC_MONTH, last)
+    if lo >= hi:
+        raise ValueError(f"Datas fora do de421: {day_to_datetime(start)} a {day_to_datetime(end)}")
+
+    timescale = get_timescale()
+    found, phases = almanac.find_discrete(
+        timescale.ut1_jd(lo + DAY_EPOCH_JD),
+        timescale.ut1_jd(hi + DAY_EPOCH_JD),
+        almanac.moon_phases(get_ephemeris()),
+    )
+    first_new_moon = int(np.argmax(phases == NEW_MOON))
+    times = found.ut1[first_new_moon:] - DAY_EPOCH_JD
+    return LunationTable(times, brown_lunation(times[0]))
+
+
+def save_table(table, path=LUNATIONS_FILE):
+    """Grava a tabela como artefato .npz compacto"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(path, times=table.times, first_lunation=np.int32(table.first_lunation))
+
+
+def load_table(path=LUNATIONS_FILE):
+    """Carrega a tabela gravada pelo builder"""
+    with np.load(path) as data:
+        return LunationTable(data['times'], data['first_lunation'])
+
+
+_table = None
+
+
+def get_lunation_table():
+    """Retorna a tabela do processo (gerada em memória se o artefato faltar)"""
+    global _table
+    if _table is None:
+        if LUNATIONS_FILE.exists():
+            _table = load_table(LUNATIONS_FILE)
+        else:
+            print("⚠️ Tabela de lunações ausente, calculando em memória")
+            _table = build_table()
+    return _table
+
+
+@cached_stage('lunations', key=lambda month: month, copy=False)
+def _local_table(month):
+    """Tabela do mês sinódico `month` (contado de TABLE_START) com dois meses de cada lado"""
+    start = TABLE_START + month * SYNODIC_MONTH
+    return build_table(start - 2 * SYNODIC_MONTH, start + 3 * SYNODIC_MONTH)
+
+
+def lunation_table_for(date):
+    """Tabela do processo, ou a tabela local em cache do mês sinódico da data"""
+    table = get_lunation_table()
+    if table.covers(date):
+        return table
+    first, last = ephemeris_days()
+    if not first <= date <= last:
+        raise ValueError(
+            f"Data fora da cobertura do de421 ({format_date(first)} a {format_date(last)}): "
+            f"{day_to_datetime(date)}"
+        )
+    table = _local_table(int((date - TABLE_START) // SYNODIC_MONTH))
+    if not table.covers(date):
+        raise ValueError(f"Data perto demais do limite do de421: {day_to_datetime(date)}")
+    return table
+
+
+def format_date(date):
+    """Data no formato AAAA/M/D (sem a hora)"""
+    moment = day_to_datetime(date)
+    return f"{moment.year}/{moment.month}/{moment.day}"
+
+
+def verify_against_ephem(samples=2000, seed=0):
+    """
+    Maiores diferenças (segundos) de eventos sorteados até hoje contra as
+    buscas do pyephem e divergências de lunação no meio de cada intervalo.
+    """
+    import ephem
+
+    searches = (
+        ephem.next_new_moon,
+        ephem.next_first_quarter_moon,
+        ephem.next_full_moon,
+        ephem.next_last_quarter_moon,
+    )
+    rng = np.random.default_rng(seed)
+    table = get_lunation_table()
+    last = min(bisect_right(table._times, current_day()), len(table) - 5)
+    worst = {'event_seconds': 0.0, 'lunation_mismatches': 0}
+    for i in rng.integers(1, last, samples):
+        event = table._times[i]
+        expected = searches[i % 4](ephem.Date(event - 1))
+        worst['event_seconds'] = max(worst['event_seconds'], abs(event - expected) * 86400)
+        middle = (event + table._times[i + 1]) / 2
+        if table.lunation_number(middle) != brown_lunation(ephem.previous_new_moon(ephem.Date(middle))):
+            worst['lunation_mismatches'] += 1
+    return worst
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command == 'build':
+        table = build_table()
+        save_table(table)
+        print(f"✅ Tabela de lunações gravada em {LUNATIONS_FILE}: {len(table)} eventos "
+              f"({format_date(table.times[0])} a {format_date(table.times[-1])})")
+    elif command == 'verify':
+        samples = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+        result = verify_against_ephem(samples)
+        for name, value in result.items():
+            print(f"   {name}: {value}")
+        ok = result['event_seconds'] < EVENT_TOLERANCE_SECONDS and not result['lunation_mismatches']
+        print(f"{'✅' if ok else '❌'} {samples} amostras")
+        sys.exit(0 if ok else 1)
+    else:
+        print("Uso: python -m app.lunations build|verify [amostras]")
+        sys.exit(1)
@@ -1,33 +1,38 @@
 from pathlib import Path
 from fastapi import FastAPI, Request, Form, HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, StreamingResponse, Response
+from fastapi.encoders import jsonable_encoder
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 from datetime import datetime
-from app.astro_data import (
-    get_astronomical_coincidences,
-    calculate_moon_phase,
-    calculate_tidal_influence,
-    calculate_astrological_profile,
-    calculate_stellar_events,
-    generate_star_curiosities
-)
+from urllib.parse import urlencode
 from app.modern_sky_renderer import ModernSkyRenderer
-from app.zenith_calculator import find_zenith_star, load_hipparcos_data
-from app.constellation_data import get_constellation_data
-from skyfield.api import load, wgs84
-from skyfield.units import Angle
-from skyfield.timelib import Time
-from skyfield.constants import GM_SUN_Pitjeva_2005_km3_s2 as GM_SUN
-from skyfield.data import hipparcos
-from skyfield.units import Distance
-import math
-CONSTELLATIONS = get_constellation_data()
-from app.star_data_extended import NAMED_STARS, find_nearest_named_star
+from app.zenith_calculator import find_zenith_stars_batch
+from app.catalog import get_star_catalog
+from app.ephemeris import supported_dates, warm_up
+from app.config import OFFLINE, ZENITH_SOURCE, MAX_BATCH_RECORDS, EPHEMERIS_MODE
+from app.star_index import get_catalog_index
+from app.data_bundle import verify_bundle
+from app.geocoding import geocode_location, locate, geocoding_stats, close_http_client
+from app.result_cache import get_result_cache, get_sky_cache, result_key
+from app.stage_cache import stage_cache_stats
+from app.city_index import get_city_index, DEFAULT_LIMIT, MAX_LIMIT
+from app.lunations import get_lunation_table
+from app.position_tables import get_position_tables
+from app.visible_sky import get_bright_star_index
+from app.sky_payload import SKY_MEDIA_TYPE, pack_sky, sky_columns
+from app.pipeline import (
+    run_calculation_pipeline,
+    run_zenith_stage,
+    start_pipeline,
+    shutdown_pipeline
+)
+import zlib
 from app.astro_data import ASTRONOMICAL_EVENTS
-import httpx
-import asyncio
+import json
+from typing import List, Optional
+from pydantic import BaseModel
 
 app = FastAPI(title="Murphy-1", description="Calculadora de Estrelas Zenitais com TARS")
 
@@ -44,35 +49,9 @@ app.add_middleware(
 BASE_DIR = Path(__file__).resolve().parent
 templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
 
-# Debug: verificar caminhos
-print(f"🔍 BASE_DIR: {BASE_DIR}")
-print(f"🔍 Static directory: {BASE_DIR / 'static'}")
-print(f"🔍 Templates directory: {BASE_DIR / 'templates'}")
-print(f"🔍 Static files exist: {(BASE_DIR / 'static').exists()}")
-print(f"🔍 CSS exists: {(BASE_DIR / 'static' / 'css' / 'style.css').exists()}")
-print(f"🔍 Templates directory exists: {(BASE_DIR / 'templates').exists()}")
-print(f"🔍 Index.html exists: {(BASE_DIR / 'templates' / 'index.html').exists()}")
-
-# Listar arquivos no diretório de templates
-if (BASE_DIR / 'templates').exists():
-    print("🔍 Template files:")
-    for file in (BASE_DIR / 'templates').iterdir():
-        print(f"   - {file.name}")
-
 # Montar arquivos estáticos
 app.mount("/static", StaticFiles(directory=str(BASE_DIR / "static")), name="static")
 
-# Middleware de debug
-@app.middleware("http")
-async def debug_middleware(request: Request, call_next):
-    print(f"📍 Request: {request.method} {request.url.path}")
-    print(f"📍 Headers: {dict(request.headers)}")
-    
-    response = await call_next(request)
-    print(f"📍 Response: {response.status_code}")
-    
-    return response
-
 # Lazy loading - criar objetos apenas quando necessário
 modern_sky_renderer_instance = None
 
@@ -82,63 +61,89 @@ def get_modern_sky_renderer():
         modern_sky_renderer_instance = ModernSkyRenderer()
     return modern_sky_renderer_instance
 
-# Carregar dados do Hipparcos
-df = load_hipparcos_data()
+@app.on_event("startup")
+async def warm_up_ephemeris():
+    """Carrega timescale e efemérides uma vez por processo antes das requisições"""
+    if OFFLINE:
+        for problem in verify_bundle(checksums=False):
+            print(f"⚠️ Bundle de dados: {problem}")
+    try:
+        # Mapear o snapshot binário do Hipparcos (gerado por `python -m app.data_bundle build`)
+        get_star_catalog()
+    except Exception as e:
+        print(f"⚠️ Falha ao mapear o catálogo Hipparcos: {e}")
+    try:
+        warm_up()
+        print("🪐 Timescale e efemérides carregados")
+        if ZENITH_SOURCE == 'catalog':
+            get_catalog_index().warm_up()
+            print("🗂️ Índice espacial do Hipparcos construído")
+    except Exception as e:
+        print(f"⚠️ Falha ao pré-carregar efemérides: {e}")
+    try:
+        print(f"🌙 Tabela com {len(get_lunation_table())} fases da lua")
+    except Exception as e:
+        print(f"⚠️ Falha ao carregar a tabela de lunações: {e}")
+    if EPHEMERIS_MODE == 'chebyshev':
+        if get_position_tables() is None:
+            print("⚠️ Tabelas de Chebyshev ausentes, consultando o Skyfield direto")
+        else:
+            print("🪐 Tabelas de Chebyshev de Sol, Lua e planetas carregadas")
+    try:
+        index = get_bright_star_index()
+        print(f"✨ Índice com {len(index)} estrelas brilhantes para o céu visível "
+              f"({index.tiers} camadas até mag {index.tier_magnitudes[-1]})")
+    except Exception as e:
+        print(f"⚠️ Falha ao montar o índice de estrelas brilhantes: {e}")
+    try:
+        print(f"🏙️ Índice de cidades com {len(get_city_index())} nomes")
+    except Exception as e:
+        print(f"⚠️ Falha ao montar o índice de cidades: {e}")
+    start_pipeline()
+
+@app.on_event("shutdown")
+async def stop_pipeline():
+    """Encerra o pool de processos e o cliente HTTP de geocodificação"""
+    shutdown_pipeline()
+    await close_http_client()
+
+def _supported_dates():
+    """Datas de nascimento cobertas pelo de421, ou None se as efemérides não carregam"""
+    try:
+        return supported_dates()
+    except Exception:
+        return None
+
+def _supported_birth_moment(birth_date, birth_time):
+    """
+    Data e hora normalizadas ("AAAA-MM-DD", "HH:MM"), ou 400 para entradas
+    inválidas e nascimentos fora do de421, onde Lua, marés e astrologia não
+    podem ser calculadas (sem as efemérides, as etapas já usam os fallbacks).
+    """
+    try:
+        moment = datetime.strptime(f"{birth_date} {birth_time}", "%Y-%m-%d %H:%M")
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Data/hora inválida: {birth_date} {birth_time}")
+    dates = _supported_dates()
+    if dates is not None and not dates[0] <= moment.date() <= dates[1]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Data fora do intervalo suportado pelas efemérides (de421): "
+                   f"{dates[0]:%d/%m/%Y} a {dates[1]:%d/%m/%Y}"
+        )
+    return f"{moment:%Y-%m-%d}", f"{moment:%H:%M}"
 
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
     """Página inicial com formulário de entrada"""
+    dates = _supported_dates()
     return templates.TemplateResponse(
         "index.html",
-        {"request": request}
+        {"request": request, "date_range": dates and {"min": dates[0].isoformat(), "max": dates[1].isoformat()}}
     )
 
-async def geocode_location(city: str, country: str) -> tuple[float, float]:
-    """
-    Convert city and country to latitude and longitude using Nominatim API
-    """
-    try:
-        # Format the query
-        query = f"{city}, {country}"
-        
-        # Use Nominatim (OpenStreetMap) API - free and no API key required
-        url = "https://nominatim.openstreetmap.org/search"
-        params = {
-            "q": query,
-            "format": "json",
-            "limit": 1,
-            "addressdetails": 1
-        }
-        
-        headers = {
-            "User-Agent": "Murphy-1-Stellar-Calculator/1.0 (astronomical-calculator)"
-        }
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params, headers=headers)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            if not data:
-                raise ValueError(f"Localização não encontrada: {query}")
-            
-            location = data[0]
-            latitude = float(location["lat"])
-            longitude = float(location["lon"])
-            
-            print(f"🌍 Geocoded {query} -> {latitude}, {longitude}")
-            return latitude, longitude
-            
-    except Exception as e:
-        print(f"❌ Erro na geocodificação: {e}")
-        # Fallback para coordenadas padrão (São Paulo, Brasil)
-        print("🔄 Usando coordenadas padrão de São Paulo")
-        return -23.5505, -46.6333
-
 def _generate_velocity_description(star_name):
-    """Gera descrição da velocidade radial de forma simples"""
-    import random
+    """Gera descrição da velocidade radial de forma simples (estável por estrela)"""
     descriptions = [
         f"{star_name} está se aproximando lentamente",
         f"{star_name} está se afastando gradualmente", 
@@ -146,41 +151,7 @@ def _generate_velocity_description(star_name):
         f"{star_name} está relativamente estática",
         f"Movimento sutil em relação à Terra"
     ]
-    return random.choice(descriptions)
-
-def _get_star_color_by_magnitude(magnitude):
-    """Retorna cor baseada na magnitude com cores mais vibrantes"""
-    if magnitude < 0:
-        return '#9bb0ff'  # Azul muito brilhante
-    elif magnitude < 1:
-        return '#aabfff'  # Azul brilhante  
-    elif magnitude < 2:
-        return '#cad7ff'  # Branco-azul
-    elif magnitude < 3:
-        return '#f8f7ff'  # Branco
-    elif magnitude < 4:
-        return '#fff4ea'  # Branco-amarelo
-    elif magnitude < 5:
-        return '#ffd2a1'  # Laranja
-    else:
-        return '#ffcc6f'  # Vermelho
-
-def _estimate_spectral_type(magnitude):
-    """Estima tipo espectral baseado na magnitude"""
-    if magnitude < 0:
-        return 'O5V'
-    elif magnitude < 1:
-        return 'B2V'
-    elif magnitude < 2:
-        return 'A0V'
-    elif magnitude < 3:
-        return 'F5V'
-    elif magnitude < 4:
-        return 'G2V'
-    elif magnitude < 5:
-        return 'K0V'
-    else:
-        return 'M0V'
+    return descriptions[zlib.crc32(star_name.encode('utf-8')) % len(descriptions)]
 
 @app.post("/test-geocode")
 async def test_geocode(
@@ -203,23 +174,47 @@ async def test_geocode(
             "error": str(e)
         }
 
-@app.post("/calculate", response_class=HTMLResponse)
+@app.post("/calculate")
 async def calculate(
-    request: Request,
     birth_date: str = Form(...),
     birth_time: str = Form(...),
     city: str = Form(...),
     country: str = Form(...)
 ):
+    """Redireciona o formulário (303) para GET /result, que tem ETag e pode ser compartilhado"""
+    return RedirectResponse(
+        "/result?" + urlencode({
+            'birth_date': birth_date,
+            'birth_time': birth_time,
+            'city': city,
+            'country': country
+        }),
+        status_code=303
+    )
+
+@app.get("/result", response_class=HTMLResponse)
+async def result_page(request: Request, birth_date: str, birth_time: str, city: str, country: str):
     """Calcula a estrela zenital e retorna o resultado"""
+    birth_date, birth_time = _supported_birth_moment(birth_date, birth_time)
+    key = result_key('calculate', birth_date, birth_time, city, country)
+    cached = get_result_cache().get(key)
+    if cached is not None:
+        return cached.response(request)
+
     try:
         # Convert city and country to coordinates
-        latitude, longitude = await geocode_location(city, country)
+        latitude, longitude, resolved = await locate(city, country)
         
         print(f"🗺️ Processando: {city}, {country} -> {latitude}, {longitude}")
         
-        # Usar a função find_zenith_star existente
-        result = find_zenith_star(birth_date, birth_time, latitude, longitude)
+        # Etapas astronômicas independentes rodam concorrentemente fora do event loop
+        stages = await run_calculation_pipeline(birth_date, birth_time, latitude, longitude)
+        result = stages['result']
+        moon_data = stages['moon_data']
+        tidal_data = stages['tidal_data']
+        astro_data = stages['astro_data']
+        stellar_events = stages['stellar_events']
+        star_curiosities = stages['star_curiosities']
         
         # Add location info to result
         result['location'] = {
@@ -229,119 +224,16 @@ async def calculate(
             'longitude': longitude
         }
         
-        # Skip sky rendering for now to avoid the error
-        # Preparar objetos para visualização - ENHANCED
-        objects = [{
-            'name': result['name'],
-            'ra': result['ra_degrees'],
-            'dec': result['dec_degrees'],
-            'magnitude': result['magnitude'],
-            'isZenith': True,
-            'x': 0,
-            'y': 0,
-            'size': 25,
-            'color': '#FFD700',
-            'type': 'star',
-            'spectral_type': result.get('spectral_class', 'G2V')
-        }]
-        
-        print(f"🌟 Main star: {result['name']} at (0, 0)")
-        
-        # Adicionar estrelas da constelação se disponíveis
-        if 'constellation_stars' in result and len(result['constellation_stars']) > 0:
-            print(f"🌌 Adding {len(result['constellation_stars'])} constellation stars")
-            for i, const_star in enumerate(result['constellation_stars']):
-                if const_star['name'] != result['name']:  # Não duplicar a estrela principal
-                    # Calcular posição relativa mais ampla
-                    ra_diff = const_star['ra'] - result['ra_degrees']
-                    dec_diff = const_star['dec'] - result['dec_degrees']
-                    
-                    # Escala maior para melhor distribuição
-                    scale = 0.8  # Reduzido para manter estrelas no círculo
-                    x = ra_diff * scale
-                    y = dec_diff * scale
-                    
-                    # Garantir que as estrelas fiquem dentro do raio visível
-                    distance = (x**2 + y**2)**0.5
-                    if distance > 0.9:  # Se estiver muito longe do centro
-                        x = x * 0.9 / distance
-                        y = y * 0.9 / distance
-                    
-                    star_obj = {
-                        'name': const_star['name'],
-                        'ra': const_star['ra'],
-                        'dec': const_star['dec'],
-                        'magnitude': const_star['mag'],
-                        'isZenith': False,
-                        'x': x,
-                        'y': y,
-                        'size': max(8, 25 - const_star['mag'] * 4),  # Tamanho baseado na magnitude
-                        'color': _get_star_color_by_magnitude(const_star['mag']),
-                        'type': 'star',
-                        'spectral_type': _estimate_spectral_type(const_star['mag'])
-                    }
-                    objects.append(star_obj)
-                    print(f"  + {const_star['name']}: mag {const_star['mag']:.1f} at ({x:.2f}, {y:.2f})")
-        
-        # Adicionar algumas estrelas de fundo mais brilhantes em padrão circular
-        import random
-        random.seed(f"{result['ra_degrees']}{result['dec_degrees']}")  # Seed consistente
-        
-        print("🎆 Adding background stars...")
-        for i in range(20):  # Mais estrelas de fundo
-            angle = random.uniform(0, 2 * math.pi)
-            distance = random.uniform(0.3, 0.85)  # Distribuição mais próxima
-            
-            x = distance * math.cos(angle)
-            y = distance * math.sin(angle)
-            
-            mag = random.uniform(3, 6)  # Magnitudes mais brilhantes
-            
-            bg_star = {
-                'name': f'HD-{random.randint(10000, 99999)}',
-                'ra': result['ra_degrees'] + x * 10,
-                'dec': result['dec_degrees'] + y * 10,
-                'magnitude': mag,
-                'isZenith': False,
-                'x': x,
-                'y': y,
-                'size': max(4, 15 - mag * 2),
-                'color': _get_star_color_by_magnitude(mag),
-                'type': 'star',
-                'spectral_type': _estimate_spectral_type(mag)
-            }
-            objects.append(bg_star)
-        
-        print(f"🔢 Total stars generated: {len(objects)}")
+        # Céu real do observador: o visualizador busca os arrays empacotados em /api/sky
+        sky_url = "/api/sky?" + urlencode({
+            'birth_date': birth_date,
+            'birth_time': birth_time,
+            'latitude': latitude,
+            'longitude': longitude
+        })
         
         # ===== CÁLCULOS ASTRONÔMICOS AVANÇADOS ULTRATHINK =====
-        print("🌟 Calculating advanced astronomical data...")
-        
-        # Calcular fase da lua
-        moon_data = calculate_moon_phase(birth_date, birth_time, latitude, longitude)
-        print(f"🌙 Moon phase: {moon_data['phase_name']}")
-        
-        # Calcular influência das marés
-        tidal_data = calculate_tidal_influence(birth_date, birth_time, latitude, longitude)
-        print(f"🌊 Tidal influence: {tidal_data['type']}")
-        
-        # Calcular perfil astrológico
-        astro_data = calculate_astrological_profile(birth_date, birth_time, latitude, longitude)
-        print(f"♈ Astrological sign: {astro_data['sun_sign']}")
-        
-        # Calcular eventos estelares
-        stellar_events = calculate_stellar_events(birth_date, birth_time)
-        print(f"🚀 Stellar events calculated")
-        
-        # DADOS DE ESTRELA COM LÓGICA CORRIGIDA
-        star_curiosities = generate_star_curiosities(result['name'], result['distance_ly'], result['magnitude'], result['spectral_class'])
-        
         result.update({
-            'objects': objects,
-            'stars': objects,  # Mantendo também para compatibilidade
-            'constellation_lines': [],
-            'constellation_name': result.get('constellation', 'N/A'),
-            'total_stars': len(objects),
             # NOVOS DADOS ASTRONÔMICOS AVANÇADOS
             'moon_data': moon_data,
             'tidal_data': tidal_data,
@@ -349,7 +241,7 @@ async def calculate(
             'stellar_events': stellar_events
         })
         
-        return templates.TemplateResponse(
+        response = templates.TemplateResponse(
             "result.html",
             {
                 "request": request,
@@ -387,6 +279,11 @@ async def calculate(
                     }
                 },
                 "result": result,
+                "sky": {
+                    "url": sky_url,
+                    "constellation_name": result.get('constellation', 'N/A'),
+                    "zenith": {"ra": result.get('zenith_ra', 0), "dec": result.get('zenith_dec', 0)}
+                },
                 "constellation": {'name': result.get('constellation', 'N/A')},
                 "star_data": result,
                 "events": ASTRONOMICAL_EVENTS
@@ -397,22 +294,27 @@ async def calculate(
         print(f"❌ Erro no cálculo: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.post("/calculate-json")
-async def calculate_json(
-    birth_date: str = Form(...),
-    birth_time: str = Form(...),
-    city: str = Form(...),
-    country: str = Form(...)
-):
-    """Calculate zenith star and return JSON result"""
+    # Só resultados completos (localização resolvida, sem fallbacks) entram no cache
+    if not resolved or stages['degraded']:
+        return response
+    return get_result_cache().put(key, response.body, 'text/html; charset=utf-8').response(request)
+
+async def _calculate_json(request, birth_date, birth_time, city, country, conditional):
+    """Estrela zenital em JSON; conditional=False ignora If-None-Match (POST)"""
+    birth_date, birth_time = _supported_birth_moment(birth_date, birth_time)
+    key = result_key('calculate-json', birth_date, birth_time, city, country)
+    cached = get_result_cache().get(key)
+    if cached is not None:
+        return cached.response(request, conditional)
+
     try:
         # Convert city and country to coordinates
-        latitude, longitude = await geocode_location(city, country)
+        latitude, longitude, resolved = await locate(city, country)
         
         print(f"🗺️ Processando: {city}, {country} -> {latitude}, {longitude}")
         
-        # Use the find_zenith_star function
-        result = find_zenith_star(birth_date, birth_time, latitude, longitude)
+        # Zenith star computed in the stage executor, off the event loop
+        result = await run_zenith_stage(birth_date, birth_time, latitude, longitude)
         
         # Add location info to result
         result['location'] = {
@@ -422,7 +324,7 @@ async def calculate_json(
             'longitude': longitude
         }
         
-        return {
+        payload = {
             "status": "success",
             "star": result,
             "birth_info": {
@@ -431,6 +333,10 @@ async def calculate_json(
                 "location": f"{city}, {country}"
             }
         }
+        if not resolved:
+            return payload
+        body = JSONResponse(content=jsonable_encoder(payload)).body
+        return get_result_cache().put(key, body, 'application/json').response(request, conditional)
         
     except Exception as e:
         print(f"❌ Erro no cálculo: {e}")
@@ -439,11 +345,98 @@ async def calculate_json(
             "error": str(e)
         }
 
+@app.get("/calculate-json")
+async def calculate_json_get(request: Request, birth_date: str, birth_time: str, city: str, country: str):
+    """Calculate zenith star and return JSON result (GET: ETag and If-None-Match)"""
+    return await _calculate_json(request, birth_date, birth_time, city, country, conditional=True)
+
+@app.post("/calculate-json")
+async def calculate_json(
+    request: Request,
+    birth_date: str = Form(...),
+    birth_time: str = Form(...),
+    city: str = Form(...),
+    country: str = Form(...)
+):
+    """Calculate zenith star and return JSON result (POST: never a 304)"""
+    return await _calculate_json(request, birth_date, birth_time, city, country, conditional=False)
+
+class BatchZenithRequest(BaseModel):
+    """Lote colunar de nascimentos (listas paralelas, horário em UTC)"""
+    birth_date: List[str]
+    birth_time: List[str]
+    latitude: List[float]
+    longitude: List[float]
+
+@app.post("/api/zenith/batch")
+def calculate_zenith_batch(payload: BatchZenithRequest, format: str = "json", source: Optional[str] = None):
+    """Calcula a estrela zenital de milhares de nascimentos em uma única passada vetorizada"""
+    if len(payload.birth_date) > MAX_BATCH_RECORDS:
+        raise HTTPException(status_code=413, detail=f"Máximo de {MAX_BATCH_RECORDS} registros por lote")
+    try:
+        columns = find_zenith_stars_batch(
+            payload.birth_date, payload.birth_time,
+            payload.latitude, payload.longitude,
+            source=source
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if format == "ndjson":
+        names = list(columns)
+        def rows():
+            for values in zip(*columns.values()):
+                yield json.dumps(dict(zip(names, values)), ensure_ascii=False) + "\n"
+        return StreamingResponse(rows(), media_type="application/x-ndjson")
+    
+    return {
+        "status": "success",
+        "count": len(payload.birth_date),
+        "columns": columns
+    }
+
+@app.get("/api/sky")
+async def sky_payload(request: Request, birth_date: str, birth_time: str, latitude: float, longitude: float,
+                      tier: int = 0):
+    """Camada de magnitude do céu visível em arrays tipados (formato em app/sky_payload.py)"""
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise HTTPException(status_code=400, detail="Coordenadas fora do intervalo")
+    birth_date, birth_time = _supported_birth_moment(birth_date, birth_time)
+    key = (birth_date, birth_time, latitude, longitude, tier)
+    cached = get_sky_cache().get(key)
+    if cached is not None:
+        return cached.response(request)
+
+    try:
+        # Estrela zenital do cache de etapas (a mesma já calculada pelo /calculate)
+        zenith = await run_zenith_stage(birth_date, birth_time, latitude, longitude)
+        body = pack_sky(sky_columns(zenith, f"{birth_date} {birth_time}", latitude, longitude, tier))
+    except Exception as e:
+        print(f"❌ Erro no céu visível: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    return get_sky_cache().put(key, body, SKY_MEDIA_TYPE).response(request)
+
 @app.get("/api/health")
 async def health_check():
     """Endpoint de verificação de saúde para Railway"""
     return {"status": "healthy"}
 
+@app.get("/api/cities")
+async def city_suggestions(prefix: str = "", limit: int = DEFAULT_LIMIT):
+    """Autocomplete de cidades por prefixo (mais populosas primeiro)"""
+    limit = min(max(limit, 1), MAX_LIMIT)
+    return Response(content=get_city_index().search_json(prefix, limit), media_type="application/json")
+
+@app.get("/api/geocode/stats")
+async def geocode_stats():
+    """Contadores do cache de geocodificação e estado do circuit breaker"""
+    return geocoding_stats()
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Contadores do cache de resultados e taxa de acertos por etapa"""
+    return {"results": get_result_cache().stats(), "sky": get_sky_cache().stats(), "stages": stage_cache_stats()}
+
 @app.get("/test")
 async def test_endpoint():
     """Teste básico"""
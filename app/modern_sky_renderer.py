@@ -1,28 +1,23 @@
-import numpy as np
-import json
-from skyfield.api import load, Topos
-from skyfield.data import hipparcos
-import pandas as pd
-from datetime import datetime
-import pytz
 import math
 import colorsys
 import random
-
-# Variáveis globais para compartilhar com main.py
-ts = None
-planets = None
+import numpy as np
+from app.catalog import get_star_catalog
+from app.geometry import (
+    cosine_to_degrees,
+    project_orthographic,
+    radec_to_unit_vectors,
+    separation_degrees,
+    to_canvas,
+)
+from app.ephemeris import get_timescale, get_ephemeris
 
 class ModernSkyRenderer:
     def __init__(self):
-        global ts, planets
-        # Lazy loading - usar variáveis globais se já carregadas
-        if ts is None:
-            ts = load.timescale()
-            planets = load('de421.bsp')
-        self.ts = ts
-        self.planets = planets
-        self.earth = planets['earth']
+        # Timescale e efemérides vêm do registro compartilhado do processo
+        self.ts = get_timescale()
+        self.planets = get_ephemeris()
+        self.earth = self.planets['earth']
         
         # Cores espectrais científicas reais (baseadas na temperatura)
         self.spectral_colors = {
@@ -54,24 +49,24 @@ class ModernSkyRenderer:
     def load_optimized_catalog(self):
         """Carrega catálogo otimizado focando nas estrelas mais relevantes"""
         try:
-            with load.open(hipparcos.URL) as f:
-                stars = hipparcos.load_dataframe(f)
+            catalog = get_star_catalog()
             
             # Filtrar apenas estrelas brilhantes e relevantes (magnitude < 4.0)
-            bright_stars = stars[stars['magnitude'] < 4.0].copy()
-            bright_stars = bright_stars.dropna(subset=['ra_hours', 'dec_degrees', 'magnitude'])
+            indices = catalog.brighter_than(4.0)
+            magnitudes = np.asarray(catalog.magnitude[indices], dtype=np.float64)
+            hip = np.asarray(catalog.hip[indices])
             
-            # Adicionar informações espectrais
-            bright_stars['spectral_type'] = bright_stars['magnitude'].apply(self.estimate_spectral_type)
-            bright_stars['color_info'] = bright_stars['spectral_type'].apply(self.get_spectral_info)
-            bright_stars['ra_degrees'] = bright_stars['ra_hours'] * 15
-            
-            # Adicionar nomes de estrelas famosas
+            # Adicionar informações espectrais e nomes de estrelas famosas
             star_names = self.get_famous_star_names()
-            bright_stars['proper_name'] = bright_stars.index.map(star_names)
-            
-            self.stars_df = bright_stars
-            print(f"Catálogo otimizado carregado com {len(bright_stars)} estrelas brilhantes")
+            self._set_stars(
+                hip,
+                catalog.ra_degrees[indices],
+                catalog.dec_degrees[indices],
+                magnitudes,
+                [self.estimate_spectral_type(magnitude) for magnitude in magnitudes],
+                [star_names.get(int(number)) for number in hip],
+            )
+            print(f"Catálogo otimizado carregado com {len(hip)} estrelas brilhantes")
             
         except Exception as e:
             print(f"Erro ao carregar catálogo: {e}")
@@ -79,17 +74,35 @@ class ModernSkyRenderer:
     
     def create_minimal_catalog(self):
         """Catálogo mínimo com estrelas principais"""
-        minimal_data = {
-            'ra_hours': [6.75, 14.66, 18.62, 5.60, 7.58, 12.90, 16.49, 20.69, 10.90, 13.42],
-            'dec_degrees': [-16.72, -60.84, 38.78, 7.41, 28.03, 11.97, 36.46, 45.28, 11.97, -11.17],
-            'magnitude': [1.46, -0.74, 0.03, 0.87, 1.14, 2.23, 1.25, 2.02, 1.85, 2.06],
-            'spectral_type': ['A', 'F', 'A', 'M', 'G', 'K', 'A', 'A', 'K', 'B'],
-            'proper_name': ['Sirius', 'Canopus', 'Vega', 'Betelgeuse', 'Capella', 'Arcturus', 'Altair', 'Deneb', 'Regulus', 'Spica']
-        }
-        
-        self.stars_df = pd.DataFrame(minimal_data)
-        self.stars_df['ra_degrees'] = self.stars_df['ra_hours'] * 15
-        self.stars_df['color_info'] = self.stars_df['spectral_type'].apply(self.get_spectral_info)
+        self._set_stars(
+            np.arange(10),
+            np.array([6.75, 14.66, 18.62, 5.60, 7.58, 12.90, 16.49, 20.69, 10.90, 13.42]) * 15,
+            [-16.72, -60.84, 38.78, 7.41, 28.03, 11.97, 36.46, 45.28, 11.97, -11.17],
+            [1.46, -0.74, 0.03, 0.87, 1.14, 2.23, 1.25, 2.02, 1.85, 2.06],
+            ['A', 'F', 'A', 'M', 'G', 'K', 'A', 'A', 'K', 'B'],
+            ['Sirius', 'Canopus', 'Vega', 'Betelgeuse', 'Capella', 'Arcturus', 'Altair', 'Deneb', 'Regulus', 'Spica'],
+        )
+    
+    def _set_stars(self, hip, ra_degrees, dec_degrees, magnitudes, spectral_types, names):
+        """
+        Colunas das estrelas do céu, com vetores unitários e cores calculados
+        uma vez. São somente leitura: as consultas por requisição não alteram
+        o catálogo compartilhado entre as threads.
+        """
+        self.star_hip = np.asarray(hip)
+        self.star_ra = np.asarray(ra_degrees, dtype=np.float64)
+        self.star_dec = np.asarray(dec_degrees, dtype=np.float64)
+        self.star_magnitude = np.asarray(magnitudes, dtype=np.float64)
+        self.star_xyz = radec_to_unit_vectors(self.star_ra, self.star_dec)
+        self.star_named = np.array([name is not None for name in names], dtype=bool)
+        self.star_names = tuple(names)
+        self.star_spectral_types = tuple(spectral_types)
+        self.star_colors = tuple(
+            self.calculate_realistic_star_color(magnitude, spectral_type)
+            for magnitude, spectral_type in zip(self.star_magnitude, self.star_spectral_types)
+        )
+        for array in (self.star_hip, self.star_ra, self.star_dec, self.star_magnitude, self.star_xyz, self.star_named):
+            array.flags.writeable = False
     
     def get_famous_star_names(self):
         """Retorna dicionário expandido com nomes de estrelas famosas"""
@@ -141,80 +154,64 @@ class ModernSkyRenderer:
         return self.spectral_colors['G']
     
     def angular_distance(self, ra1, dec1, ra2, dec2):
-        """Calcula distância angular entre duas posições"""
-        ra1, dec1, ra2, dec2 = map(math.radians, [ra1, dec1, ra2, dec2])
-        
-        cos_dist = (math.sin(dec1) * math.sin(dec2) + 
-                   math.cos(dec1) * math.cos(dec2) * math.cos(ra1 - ra2))
-        
-        cos_dist = max(-1, min(1, cos_dist))
-        return math.degrees(math.acos(cos_dist))
+        """Calcula distância angular entre duas posições (escalares ou arrays)"""
+        return separation_degrees(ra1, dec1, ra2, dec2)
     
     def get_top_celestial_objects(self, zenith_ra, zenith_dec, birth_datetime, latitude, longitude, count=25):
         """Obtém as 25 estrelas mais relevantes próximas ao zênite para um céu mais realista"""
         objects = []
         
-        # Apenas estrelas próximas ao zênite
-        if self.stars_df is not None and not self.stars_df.empty:
-            # Calcular distâncias ao zênite
-            distances = []
-            for _, star in self.stars_df.iterrows():
-                dist = self.angular_distance(zenith_ra, zenith_dec, 
-                                           star['ra_degrees'], star['dec_degrees'])
-                distances.append(dist)
+        # Apenas estrelas próximas ao zênite (produto escalar com os vetores pré-calculados)
+        if len(self.star_hip):
+            zenith = radec_to_unit_vectors(zenith_ra, zenith_dec)
+            distance_to_zenith = cosine_to_degrees(self.star_xyz @ zenith)
             
-            self.stars_df['distance_to_zenith'] = distances
+            # Priorizar por: 1) Proximidade ao zênite, 2) Brilho
+            priority = (90 - distance_to_zenith) * 10 + (6 - self.star_magnitude) * 5
             
-            # Incluir TODAS as estrelas dentro de 90 graus, não apenas as com nomes
-            visible_stars = self.stars_df[
-                self.stars_df['distance_to_zenith'] <= 90
-            ].copy()
+            # Incluir TODAS as estrelas dentro de 90 graus, não apenas as com nomes;
+            # empates ficam na ordem do catálogo
+            ranked = np.argsort(-priority, kind='stable')
+            ranked = ranked[distance_to_zenith[ranked] <= 90]
             
-            if not visible_stars.empty:
-                # Priorizar por: 1) Proximidade ao zênite, 2) Brilho
-                visible_stars['priority'] = (
-                    (90 - visible_stars['distance_to_zenith']) * 10 +  # Proximidade
-                    (6 - visible_stars['magnitude']) * 5  # Brilho
-                )
-                
-                # Separar estrelas com nomes das sem nomes
-                named_stars = visible_stars[visible_stars['proper_name'].notna()]
-                unnamed_stars = visible_stars[visible_stars['proper_name'].isna()]
-                
-                # Pegar as top 15 estrelas com nomes
-                top_named = named_stars.nlargest(15, 'priority') if not named_stars.empty else pd.DataFrame()
-                
-                # Pegar as top 10 estrelas sem nomes mais brilhantes
-                top_unnamed = unnamed_stars.nlargest(10, 'priority') if not unnamed_stars.empty else pd.DataFrame()
+            # Top 15 estrelas com nomes e top 10 sem nomes, reordenadas por prioridade
+            top_named = ranked[self.star_named[ranked]][:15]
+            top_unnamed = ranked[~self.star_named[ranked]][:10]
+            top_stars = np.concatenate([top_named, top_unnamed])
+            top_stars = top_stars[np.argsort(-priority[top_stars], kind='stable')][:count]
+            
+            columns = zip(
+                top_stars.tolist(),
+                self.star_hip[top_stars].tolist(),
+                self.star_ra[top_stars].tolist(),
+                self.star_dec[top_stars].tolist(),
+                self.star_magnitude[top_stars].tolist(),
+                distance_to_zenith[top_stars].tolist(),
+                priority[top_stars].tolist(),
+            )
+            for index, hip, ra, dec, magnitude, distance, star_priority in columns:
+                # Cor pré-calculada a partir da magnitude e do tipo espectral
+                color_info = self.star_colors[index]
                 
-                # Combinar ambas
-                top_stars = pd.concat([top_named, top_unnamed])
+                # Nome da estrela ou designação genérica
+                star_name = self.star_names[index] or (f"HIP {hip}" if hip else f"Estrela #{len(objects)+1}")
                 
-                for _, star in top_stars.iterrows():
-                    # Calcular cor mais realista baseada na magnitude e tipo espectral
-                    color_info = self.calculate_realistic_star_color(star['magnitude'], star['spectral_type'])
-                    
-                    # Nome da estrela ou designação genérica
-                    star_name = star['proper_name'] if pd.notna(star['proper_name']) else f"HIP {star.name}" if star.name else f"Estrela #{len(objects)+1}"
-                    
-                    objects.append({
-                        'name': star_name,
-                        'type': 'star',
-                        'ra': star['ra_degrees'],
-                        'dec': star['dec_degrees'],
-                        'magnitude': star['magnitude'],
-                        'distance_to_zenith': star['distance_to_zenith'],
-                        'color': color_info['hex'],
-                        'color_name': color_info['name'],
-                        'temperature': color_info['temp'],
-                        'spectral_type': star['spectral_type'],
-                        'priority': star['priority'],
-                        'brightness_factor': color_info['brightness_factor']
-                    })
+                objects.append({
+                    'name': star_name,
+                    'type': 'star',
+                    'ra': ra,
+                    'dec': dec,
+                    'magnitude': magnitude,
+                    'distance_to_zenith': distance,
+                    'color': color_info['hex'],
+                    'color_name': color_info['name'],
+                    'temperature': color_info['temp'],
+                    'spectral_type': self.star_spectral_types[index],
+                    'priority': star_priority,
+                    'brightness_factor': color_info['brightness_factor']
+                })
         
-        # Ordenar por prioridade
-        objects.sort(key=lambda x: x.get('priority', 0), reverse=True)
-        return objects[:count]  # Limitar ao count solicitado
+        return objects
     
     def calculate_realistic_star_color(self, magnitude, spectral_type):
         """Calcula cor mais realista baseada na magnitude e tipo espectral com maior contraste"""
@@ -314,39 +311,31 @@ class ModernSkyRenderer:
         
         # Adicionar estrelas da constelação
         if 'constellation_stars' in zenith_star:
-            constellation_stars = zenith_star['constellation_stars']
+            # Não duplicar a estrela principal
+            constellation_stars = [
+                star for star in zenith_star['constellation_stars'] if star['name'] != zenith_star['name']
+            ]
             
-            # Converter coordenadas das estrelas da constelação para posições relativas
-            zenith_ra_rad = math.radians(zenith_ra)
-            zenith_dec_rad = math.radians(zenith_dec)
+            # Projeção ortográfica em torno do zênite, com 100 px de escala no canvas
+            x, y = project_orthographic(
+                [star['ra'] for star in constellation_stars],
+                [star['dec'] for star in constellation_stars],
+                zenith_ra, zenith_dec
+            )
+            xs, ys = to_canvas(x, y, 100)
             
-            for const_star in constellation_stars:
-                if const_star['name'] != zenith_star['name']:  # Não duplicar a estrela principal
-                    # Calcular posição relativa à estrela do zênite
-                    ra_rad = math.radians(const_star['ra'])
-                    dec_rad = math.radians(const_star['dec'])
-                    
-                    # Projeção estereográfica simplificada
-                    delta_ra = ra_rad - zenith_ra_rad
-                    
-                    # Fator de escala para caber no canvas (ajustável)
-                    scale = 100
-                    
-                    x = scale * math.sin(delta_ra) * math.cos(dec_rad)
-                    y = scale * (math.sin(dec_rad) * math.cos(zenith_dec_rad) - 
-                               math.cos(dec_rad) * math.sin(zenith_dec_rad) * math.cos(delta_ra))
-                    
-                    stars.append({
-                        'name': const_star['name'],
-                        'ra': const_star['ra'],
-                        'dec': const_star['dec'],
-                        'magnitude': const_star['mag'],
-                        'isZenith': False,
-                        'x': x,
-                        'y': -y,  # Inverter Y para corresponder ao canvas
-                        'size': self._calculate_star_size(const_star['mag']),
-                        'color': self._get_star_color_by_magnitude(const_star['mag'])
-                    })
+            for const_star, x, y in zip(constellation_stars, xs.tolist(), ys.tolist()):
+                stars.append({
+                    'name': const_star['name'],
+                    'ra': const_star['ra'],
+                    'dec': const_star['dec'],
+                    'magnitude': const_star['mag'],
+                    'isZenith': False,
+                    'x': x,
+                    'y': y,
+                    'size': self._calculate_star_size(const_star['mag']),
+                    'color': self._get_star_color_by_magnitude(const_star['mag'])
+                })
         
         # Adicionar algumas estrelas de fundo fracas para ambiente
         random.seed(f"{zenith_ra}{zenith_dec}")  # Seed consistente
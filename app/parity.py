@@ -0,0 +1,183 @@
+"""
+Parity - Paridade das etapas de Lua, marés e astrologia com o pyephem
+
+Essas etapas eram calculadas com o pyephem e hoje usam o mesmo de421 do
+resto do app (app.ephemeris, app.birth_moment, app.lunations). Este
+verificador sorteia mapas entre 1900 e hoje, recalcula os campos numéricos
+de cada etapa do jeito antigo (Body.compute(observer) e as buscas de fase do
+pyephem) e compara com a saída atual das etapas.
+
+Tolerâncias (a diferença é dominada pelas teorias truncadas do pyephem):
+altitude/azimute dentro de 0.1° além do arredondamento, 60 km na distância
+da Lua, 0.01 na fração iluminada (o pyephem usa uma fórmula aproximada) e
+1e-3 relativo nas forças de maré. Próxima lua cheia/nova podem cair no dia
+vizinho (no máximo um) quando o evento é perto da meia-noite e
+classificações (tipo de maré, visibilidade, constelação) podem mudar perto
+dos limiares: essas divergências são listadas, mas não reprovam.
+
+Uso:
+    python -m app.parity [amostras]
+"""
+
+import math
+import sys
+from datetime import datetime
+
+import numpy as np
+
+from app.astro_data import (
+    _get_constellation_from_position,
+    calculate_astrological_profile,
+    calculate_moon_phase,
+    calculate_tidal_influence,
+)
+from app.ephemeris import current_day, day_to_datetime, instant_to_day
+from app.lunations import brown_lunation, format_date
+from app.position_tables import BODIES
+
+ANGLE_TOLERANCE_DEGREES = 0.15
+MOON_DISTANCE_TOLERANCE_KM = 60.0
+PHASE_TOLERANCE = 0.01
+FORCE_TOLERANCE = 1e-3
+
+
+def _angle_difference(a, b):
+    return abs((a - b + 180.0) % 360.0 - 180.0)
+
+
+def _random_chart(rng, first, last):
+    moment = day_to_datetime(rng.uniform(first, last))
+    latitude = round(float(np.degrees(np.arcsin(rng.uniform(-0.99, 0.99)))), 4)
+    longitude = round(float(rng.uniform(-180, 180)), 4)
+    return f"{moment:%Y-%m-%d}", f"{moment:%H:%M}", latitude, longitude
+
+
+def _reference(ephem, birth_date, birth_time, latitude, longitude):
+    """Campos numéricos das etapas calculados com o pyephem"""
+    observer = ephem.Observer()
+    observer.lat = str(latitude)
+    observer.lon = str(longitude)
+    observer.date = f"{birth_date.replace('-', '/')} {birth_time}"
+    bodies = {name: getattr(ephem, ephem_name)(observer) for name, _, ephem_name, _, _ in BODIES}
+    moon, sun = bodies['Lua'], bodies['Sol']
+    return {
+        'moon': moon,
+        'sun': sun,
+        'bodies': bodies,
+        'next_full_moon': ephem.next_full_moon(observer.date),
+        'next_new_moon': ephem.next_new_moon(observer.date),
+        'lunation_number': brown_lunation(ephem.previous_new_moon(observer.date)),
+    }
+
+
+def _days_apart(formatted, expected):
+    """Dias entre duas datas no formato "AAAA/M/D" """
+    return abs((datetime.strptime(formatted, "%Y/%m/%d") - datetime.strptime(expected, "%Y/%m/%d")).days)
+
+
+def verify_parity(samples=300, seed=0):
+    """Maiores diferenças numéricas e divergências de classificação por campo"""
+    import ephem
+
+    rng = np.random.default_rng(seed)
+    first, last = instant_to_day('1900-01-02'), current_day()
+    worst = {
+        'moon_altitude': 0.0,
+        'moon_azimuth': 0.0,
+        'moon_distance_km': 0.0,
+        'moon_phase': 0.0,
+        'moon_force': 0.0,
+        'sun_force': 0.0,
+        'planet_altitude': 0.0,
+        'planet_azimuth': 0.0,
+        'event_days': 0,
+    }
+    mismatches = {
+        'next_full_moon': [],
+        'next_new_moon': [],
+        'lunation_number': [],
+        'tide_type': [],
+        'visible': [],
+        'constellation': [],
+    }
+    for _ in range(samples):
+        chart = _random_chart(rng, first, last)
+        reference = _reference(ephem, *chart)
+        moon, sun = reference['moon'], reference['sun']
+
+        lunar = calculate_moon_phase(*chart)
+        worst['moon_altitude'] = max(worst['moon_altitude'], abs(lunar['altitude'] - math.degrees(moon.alt)))
+        if abs(math.degrees(moon.alt)) < 89:
+            worst['moon_azimuth'] = max(worst['moon_azimuth'], _angle_difference(lunar['azimuth'], math.degrees(moon.az)))
+        worst['moon_distance_km'] = max(
+            worst['moon_distance_km'], abs(lunar['distance_km'] - moon.earth_distance * 149597870.7)
+        )
+        worst['moon_phase'] = max(worst['moon_phase'], abs(lunar['phase'] - moon.moon_phase))
+        for field in ('next_full_moon', 'next_new_moon'):
+            expected = format_date(reference[field])
+            if lunar[field] != expected:
+                worst['event_days'] = max(worst['event_days'], _days_apart(lunar[field], expected))
+                mismatches[field].append(chart)
+        if lunar['lunation_number'] != reference['lunation_number']:
+            mismatches['lunation_number'].append(chart)
+
+        tides = calculate_tidal_influence(*chart)
+        moon_force = 1 / moon.earth_distance ** 3 * 1000
+        sun_force = 0.46 / sun.earth_distance ** 3 * 1000
+        worst['moon_force'] = max(worst['moon_force'], abs(tides['moon_force'] - moon_force) / moon_force)
+        worst['sun_force'] = max(worst['sun_force'], abs(tides['sun_force'] - sun_force) / sun_force)
+        angle = abs(float(moon.ra) - float(sun.ra))
+        if angle < 0.5 or angle > 5.8:
+            tide_type = "🌊 Maré de Sizígia"
+        elif 1.4 < angle < 1.8 or 4.6 < angle < 5.0:
+            tide_type = "🌀 Maré de Quadratura"
+        else:
+            tide_type = "🌊 Maré Mista"
+        if tides['type'] != tide_type:
+            mismatches['tide_type'].append(chart)
+
+        planets = calculate_astrological_profile(*chart)['planets']
+        sun_altitude = math.degrees(sun.alt)
+        for name, body in reference['bodies'].items():
+            planet = planets[name]
+            altitude = math.degrees(body.alt)
+            worst['planet_altitude'] = max(worst['planet_altitude'], abs(planet['altitude'] - altitude))
+            if abs(altitude) < 89:
+                worst['planet_azimuth'] = max(
+                    worst['planet_azimuth'], _angle_difference(planet['azimuth'], math.degrees(body.az))
+                )
+            threshold = 0 if name == 'Sol' or sun_altitude <= -6 else 5 if name in ('Mercúrio', 'Vênus') else 15
+            if planet['visible'] != (altitude > threshold):
+                mismatches['visible'].append((chart, name))
+            if planet['constellation'] != _get_constellation_from_position(float(body.ra), float(body.dec)):
+                mismatches['constellation'].append((chart, name))
+    return worst, mismatches
+
+
+TOLERANCES = {
+    'moon_altitude': ANGLE_TOLERANCE_DEGREES,
+    'moon_azimuth': ANGLE_TOLERANCE_DEGREES,
+    'moon_distance_km': MOON_DISTANCE_TOLERANCE_KM,
+    'moon_phase': PHASE_TOLERANCE,
+    'moon_force': FORCE_TOLERANCE,
+    'sun_force': FORCE_TOLERANCE,
+    'planet_altitude': ANGLE_TOLERANCE_DEGREES,
+    'planet_azimuth': ANGLE_TOLERANCE_DEGREES,
+    'event_days': 1,
+}
+
+
+if __name__ == "__main__":
+    samples = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    worst, mismatches = verify_parity(samples)
+    ok = True
+    for name, value in worst.items():
+        passed = value <= TOLERANCES[name]
+        ok = ok and passed
+        print(f"   {'✅' if passed else '❌'} {name}: {value:.4f} (tolerância {TOLERANCES[name]})")
+    for name, charts in mismatches.items():
+        print(f"   {name}: {len(charts)} divergências")
+        for chart in charts[:5]:
+            print(f"      {chart}")
+    print(f"{'✅' if ok else '❌'} {samples} mapas")
+    sys.exit(0 if ok else 1)
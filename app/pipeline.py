@@ -0,0 +1,215 @@
+"""
+Pipeline - Executa as etapas astronômicas fora do event loop
+
+As etapas do /calculate (zênite, lua, marés, astrologia, eventos) são
+independentes entre si e fazem cálculo síncrono. Aqui elas são despachadas
+para um executor limitado e aguardadas em conjunto, cada uma com timeout e
+fallback, para que uma efeméride lenta não trave as outras requisições
+(incluindo /api/health).
+
+Com MURPHY_PIPELINE_MODE=process as etapas rodam num pool de processos
+pré-aquecidos (catálogos, índices e efemérides carregados uma vez por
+processo), contornando o GIL: cada etapa recebe apenas a tupla compacta
+(data, hora, latitude, longitude) e devolve o dicionário do resultado.
+Se um worker morre (crash, OOM killer) o pool fica quebrado; a primeira
+etapa que percebe reconstrói o pool uma vez e tenta de novo.
+"""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from app.config import (
+    EPHEMERIS_MODE,
+    PIPELINE_MODE,
+    PIPELINE_PROCESSES,
+    PIPELINE_WORKERS,
+    STAGE_TIMEOUT_SECONDS,
+    ZENITH_SOURCE
+)
+from app.zenith_calculator import find_zenith_star
+from app.astro_data import (
+    calculate_moon_phase,
+    calculate_tidal_influence,
+    calculate_astrological_profile,
+    calculate_stellar_events,
+    generate_star_curiosities,
+    moon_phase_fallback,
+    tidal_influence_fallback,
+    astrological_profile_fallback,
+    stellar_events_fallback
+)
+from app.stage_cache import cached_stage
+
+@cached_stage('zenith', key=lambda *args: (*args, ZENITH_SOURCE))
+def _zenith_star(birth_date, birth_time, latitude, longitude):
+    """Estrela zenital (depende do instante e do observador)"""
+    return find_zenith_star(birth_date, birth_time, latitude, longitude)
+
+
+@cached_stage('curiosities', key=lambda *args: args)
+def _star_curiosities(star_name, distance_ly, magnitude, spectral_class):
+    """Curiosidades (dependem só dos dados da estrela)"""
+    return generate_star_curiosities(star_name, distance_ly, magnitude, spectral_class)
+
+
+_executor = ThreadPoolExecutor(max_workers=PIPELINE_WORKERS, thread_name_prefix='murphy-stage')
+_process_pool = None
+_restart_lock = None
+
+_NO_FALLBACK = object()
+
+
+def _warm_worker():
+    """Inicializador de cada processo do pool: carrega dados uma única vez"""
+    from app.ephemeris import warm_up
+    from app.lunations import get_lunation_table
+    from app.position_tables import get_position_tables
+    from app.star_index import get_catalog_index
+    from app.zenith_lut import get_zenith_lut
+
+    get_zenith_lut()
+    try:
+        get_lunation_table()
+    except Exception as e:
+        print(f"⚠️ Worker sem tabela de lunações: {e}")
+    if EPHEMERIS_MODE == 'chebyshev':
+        get_position_tables()
+    if ZENITH_SOURCE == 'catalog':
+        get_catalog_index().warm_up()
+    try:
+        warm_up()
+    except Exception as e:
+        print(f"⚠️ Worker sem efemérides pré-carregadas: {e}")
+
+
+def _ready():
+    return True
+
+
+def start_pipeline():
+    """
+    Inicia o pool de processos quando MURPHY_PIPELINE_MODE=process.
+
+    Os processos são criados com 'spawn' (o servidor já tem threads) e
+    aquecidos aqui, no startup, para que a primeira requisição não pague
+    o carregamento dos dados.
+    """
+    global _process_pool
+    if PIPELINE_MODE != 'process' or _process_pool is not None:
+        return
+    _process_pool = ProcessPoolExecutor(
+        max_workers=PIPELINE_PROCESSES,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_warm_worker,
+    )
+    # Uma tarefa por processo força a criação de todos os workers
+    wait([_process_pool.submit(_ready) for _ in range(PIPELINE_PROCESSES)])
+    print(f"🧮 Pool de {PIPELINE_PROCESSES} processos pré-aquecidos para as etapas astronômicas")
+
+
+def shutdown_pipeline():
+    """Encerra o pool de processos (shutdown do servidor)"""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+
+async def _restart_pipeline(broken):
+    """Troca o pool quebrado por um novo (uma vez, mesmo com várias etapas falhando juntas)"""
+    global _process_pool, _restart_lock
+    if _restart_lock is None:
+        _restart_lock = asyncio.Lock()
+    async with _restart_lock:
+        if _process_pool is not broken:
+            return
+        print("🔄 Pool de processos quebrado (worker encerrado); recriando")
+        shutdown_pipeline()
+        await asyncio.to_thread(start_pipeline)
+
+
+async def _submit(executor, func, *args):
+    """Roda func no executor; com o pool de processos quebrado, recria e tenta mais uma vez"""
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(executor, func, *args)
+    except BrokenProcessPool:
+        await asyncio.shield(_restart_pipeline(executor))
+        return await loop.run_in_executor(_process_pool or _executor, func, *args)
+
+
+async def run_stage(name, func, *args, fallback=_NO_FALLBACK, timeout=STAGE_TIMEOUT_SECONDS):
+    """
+    Executa uma etapa síncrona no executor com timeout.
+
+    Em caso de timeout ou erro retorna fallback() se houver; sem fallback o
+    erro é propagado. Uma etapa que estoura o tempo continua rodando em sua
+    thread (ou processo) até terminar, mas a requisição não espera por ela.
+    """
+    executor = _process_pool or _executor
+    try:
+        return await asyncio.wait_for(_submit(executor, func, *args), timeout)
+    except asyncio.TimeoutError:
+        print(f"⏱️ Etapa {name} excedeu {timeout}s")
+        if fallback is _NO_FALLBACK:
+            raise TimeoutError(f"Etapa {name} excedeu o tempo limite")
+    except Exception as e:
+        print(f"❌ Erro na etapa {name}: {e}")
+        if fallback is _NO_FALLBACK:
+            raise
+    return fallback()
+
+
+async def run_zenith_stage(birth_date, birth_time, latitude, longitude):
+    """Calcula apenas a estrela zenital (usado por /calculate-json e /api/sky)"""
+    return await run_stage(
+        'zenith', _zenith_star, birth_date, birth_time, latitude, longitude
+    )
+
+
+async def run_calculation_pipeline(birth_date, birth_time, latitude, longitude):
+    """
+    Executa todas as etapas do /calculate concorrentemente.
+
+    Retorna dicionário com result (estrela zenital), moon_data, tidal_data,
+    astro_data, stellar_events, star_curiosities e degraded (nomes das
+    etapas que usaram fallback).
+    """
+    args = (birth_date, birth_time, latitude, longitude)
+    degraded = []
+
+    def fallback(name, func, *fallback_args):
+        def run():
+            degraded.append(name)
+            return func(*fallback_args)
+        return run
+
+    result, moon_data, tidal_data, astro_data, stellar_events = await asyncio.gather(
+        run_stage('zenith', _zenith_star, *args),
+        run_stage('moon', calculate_moon_phase, *args,
+                  fallback=fallback('moon', moon_phase_fallback)),
+        run_stage('tides', calculate_tidal_influence, *args,
+                  fallback=fallback('tides', tidal_influence_fallback)),
+        run_stage('astrology', calculate_astrological_profile, *args,
+                  fallback=fallback('astrology', astrological_profile_fallback)),
+        run_stage('events', calculate_stellar_events, birth_date, birth_time,
+                  fallback=fallback('events', stellar_events_fallback, birth_date)),
+    )
+
+    # Curiosidades dependem da estrela zenital
+    star_curiosities = await run_stage(
+        'curiosities', _star_curiosities,
+        result['name'], result['distance_ly'], result['magnitude'], result['spectral_class']
+    )
+
+    return {
+        'result': result,
+        'moon_data': moon_data,
+        'tidal_data': tidal_data,
+        'astro_data': astro_data,
+        'stellar_events': stellar_events,
+        'star_curiosities': star_curiosities,
+        'degraded': degraded
+    }
@@ -0,0 +1,230 @@
+"""
+Position Tables - Sol, Lua e planetas em polinômios de Chebyshev (cobertura do de421)
+
+As posições geocêntricas aparentes (equador e equinócio verdadeiros da data,
+com tempo de luz e aberração, como g_ra/g_dec do pyephem) são ajustadas
+offline, a partir do de421.bsp, em segmentos de tamanho fixo por corpo. Cada
+segmento guarda os coeficientes de x, y, z (UA). Em tempo de execução, achar
+o segmento é uma divisão e avaliar cada corpo custa algumas dezenas de
+multiplicações e somas (os nove corpos de uma vez), sem chamar efeméride
+nenhuma.
+
+O ajuste é em coordenadas cartesianas (suaves, sem o salto de 360° da AR) e
+interpola exatamente nos nós de Chebyshev de cada segmento. O erro de ajuste
+fica abaixo de 0.01" para todos os corpos e os coeficientes são gravados em
+float32 (mais ~0.01"). Contra o pyephem, a diferença é dominada pelas teorias
+do próprio pyephem (VSOP87/ELP truncados, valores em float32). As tolerâncias
+(VERIFY_TOLERANCES) são de 5" por corpo contra o pyephem e de 1 km na
+distância da Lua contra o próprio de421 (a série lunar do pyephem difere dele
+em dezenas de km, ver app.birth_moment), conferidas até a data atual com
+`python -m app.position_tables verify` (único uso do pyephem aqui). Datas
+futuras divergem mais, pela previsão de ΔT diferente em cada biblioteca.
+
+As tabelas param onde termina o de421 carregado (2053 no arquivo oficial);
+depois disso app.birth_moment consulta o Skyfield diretamente.
+
+Uso:
+    python -m app.position_tables build
+    python -m app.position_tables verify [amostras]
+"""
+
+import math
+import sys
+
+import numpy as np
+
+from app.config import data_path
+from app.ephemeris import (
+    apparent_geocentric,
+    current_day,
+    day_to_datetime,
+    ephemeris_days,
+    instant_to_day,
+)
+
+TABLES_FILE = data_path('position_tables.npz')
+TABLE_START = instant_to_day('1900-01-01')
+TABLE_END = instant_to_day('2100-01-01')
+
+# (nome, alvo no de421, classe do pyephem para o verify, dias por segmento,
+# grau do polinômio), na ordem usada por app.birth_moment
+BODIES = (
+    ('Sol', 'sun', 'Sun', 16, 12),
+    ('Lua', 'moon', 'Moon', 4, 12),
+    ('Mercúrio', 'mercury', 'Mercury', 8, 12),
+    ('Vênus', 'venus', 'Venus', 16, 12),
+    ('Marte', 'mars', 'Mars', 16, 12),
+    ('Júpiter', 'jupiter barycenter', 'Jupiter', 32, 10),
+    ('Saturno', 'saturn barycenter', 'Saturn', 32, 10),
+    ('Urano', 'uranus barycenter', 'Uranus', 32, 10),
+    ('Netuno', 'neptune barycenter', 'Neptune', 32, 10),
+)
+
+# Tolerâncias do verify: ângulos contra o pyephem, distância da Lua contra o de421
+ANGLE_TOLERANCE_ARCSEC = 5.0
+MOON_DISTANCE_TOLERANCE_KM = 1.0
+VERIFY_TOLERANCES = {
+    **{name: ANGLE_TOLERANCE_ARCSEC for name, *_ in BODIES},
+    'moon_distance_km': MOON_DISTANCE_TOLERANCE_KM,
+}
+
+# Instantes avaliados por lote na construção (limita a memória do Skyfield)
+_BATCH = 50000
+
+
+def _chebyshev_nodes(degree):
+    """Nós de Chebyshev em [-1, 1] e matriz T_k(nó) para a interpolação"""
+    n = degree + 1
+    nodes = np.cos(np.pi * (np.arange(n) + 0.5) / n)
+    basis = np.cos(np.outer(np.arange(n), np.pi * (np.arange(n) + 0.5) / n))
+    return nodes, basis
+
+
+class PositionTables:
+    """Coeficientes por corpo: array (segmentos, 3, grau + 1) a partir de start"""
+
+    def __init__(self, start, segment_days, coefficients):
+        self.start = float(start)
+        self.segment_days = np.array(segment_days, dtype=np.float64)
+        self.end = min(
+            self.start + days * len(c) for days, c in zip(self.segment_days, coefficients)
+        )
+
+        # Todos os corpos num único array com o mesmo número de termos (zeros à
+        # direita): os nove segmentos saem de uma só indexação. O dtype é o dos
+        # coeficientes (float32 quando lidos do artefato); a avaliação é em float64
+        terms = max(c.shape[2] for c in coefficients)
+        self._rows = np.concatenate([
+            np.pad(c, ((0, 0), (0, 0), (0, terms - c.shape[2]))) for c in coefficients
+        ])
+        self._first_row = np.cumsum([0] + [len(c) for c in coefficients[:-1]])
+        self._orders = np.arange(terms)
+
+        # Coeficientes de cada corpo como vistas de _rows (sem segunda cópia em memória)
+        self.coefficients = [
+            self._rows[first:first + len(c), :, :c.shape[2]]
+            for first, c in zip(self._first_row, coefficients)
+        ]
+
+    def covers(self, date):
+        return self.start <= date < self.end
+
+    def positions(self, date):
+        """Array (corpos, 3) com o vetor geocêntrico aparente (UA) de cada corpo no instante"""
+        if not self.covers(date):
+            raise ValueError(f"Data fora das tabelas de posições: {day_to_datetime(date)}")
+        segments, offset = np.divmod(date - self.start, self.segment_days)
+        blocks = self._rows[self._first_row + segments.astype(np.intp)]
+
+        # T_k(x) = cos(k·arccos x) em [-1, 1]
+        x = np.clip(2.0 * offset / self.segment_days - 1.0, -1.0, 1.0)
+        basis = np.cos(np.outer(np.arccos(x), self._orders))
+        return np.einsum('bck,bk->bc', blocks, basis)
+
+
+def build_tables(start=TABLE_START, end=TABLE_END):
+    """Ajusta os polinômios de todos os corpos a partir do de421 (até o fim da cobertura)"""
+    first, last = ephemeris_days()
+    start, end = max(start, first), min(end, last)
+    coefficients = []
+    for name, target, _, days, degree in BODIES:
+        # Só segmentos inteiros dentro da cobertura do de421
+        segments = int((end - start) // days)
+        nodes, basis = _chebyshev_nodes(degree)
+        starts = start + days * np.arange(segments)
+        dates = (starts[:, None] + (nodes[None, :] + 1.0) * days / 2).ravel()
+
+        values = np.empty((3, len(dates)))
+        for lo in range(0, len(dates), _BATCH):
+            values[:, lo:lo + _BATCH] = apparent_geocentric(target, dates[lo:lo + _BATCH])
+
+        # Interpolação nos nós: c_k = 2/n Σ f(x_j) T_k(x_j), com c_0 pela metade
+        samples = values.reshape(3, segments, degree + 1).transpose(1, 0, 2)
+        fitted = samples @ basis.T * (2.0 / (degree + 1))
+        fitted[:, :, 0] /= 2
+        coefficients.append(fitted)
+        print(f"   ✅ {name}: {segments} segmentos de {days} dias, grau {degree}")
+    return PositionTables(start, [body[3] for body in BODIES], coefficients)
+
+
+def save_tables(tables, path=TABLES_FILE):
+    """Grava os coeficientes (float32, ~0.01" de arredondamento) como artefato .npz"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    arrays = {f'body_{i}': c.astype(np.float32) for i, c in enumerate(tables.coefficients)}
+    np.savez(
+        path,
+        start=np.float64(tables.start),
+        segment_days=np.array(tables.segment_days),
+        **arrays,
+    )
+
+
+def load_tables(path=TABLES_FILE):
+    """Carrega os coeficientes gravados pelo builder"""
+    with np.load(path) as data:
+        segment_days = data['segment_days']
+        coefficients = [data[f'body_{i}'] for i in range(len(segment_days))]
+        return PositionTables(data['start'], segment_days, coefficients)
+
+
+_tables = None
+
+
+def get_position_tables():
+    """Tabelas do processo, ou None se o artefato não foi gerado"""
+    global _tables
+    if _tables is None and TABLES_FILE.exists():
+        _tables = load_tables(TABLES_FILE)
+    return _tables
+
+
+def verify_against_ephem(samples=2000, seed=0, tables=None):
+    """
+    Maiores diferenças por corpo (segundos de arco) contra g_ra/g_dec do
+    pyephem e na distância da Lua (km, 'moon_distance_km') contra o de421
+    """
+    import ephem
+
+    tables = tables or get_position_tables()
+    if tables is None:
+        raise FileNotFoundError(f"Tabelas de posições ausentes: {TABLES_FILE}")
+    rng = np.random.default_rng(seed)
+    dates = rng.uniform(tables.start, min(tables.end, current_day()), samples)
+    moon = next(index for index, body in enumerate(BODIES) if body[0] == 'Lua')
+    moon_distances = np.linalg.norm(apparent_geocentric(BODIES[moon][1], dates), axis=0)
+    worst = {name: 0.0 for name in VERIFY_TOLERANCES}
+    for date, moon_distance in zip(dates, moon_distances):
+        positions = tables.positions(date)
+        for index, (name, _, ephem_name, _, _) in enumerate(BODIES):
+            body = getattr(ephem, ephem_name)(ephem.Date(date))
+            ra, dec = float(body.g_ra), float(body.g_dec)
+            expected = np.array([math.cos(dec) * math.cos(ra), math.cos(dec) * math.sin(ra), math.sin(dec)])
+            distance = np.linalg.norm(positions[index])
+            angle = math.asin(min(np.linalg.norm(np.cross(positions[index] / distance, expected)), 1.0))
+            worst[name] = max(worst[name], math.degrees(angle) * 3600)
+        worst['moon_distance_km'] = max(
+            worst['moon_distance_km'],
+            float(abs(np.linalg.norm(positions[moon]) - moon_distance)) * 149597870.7
+        )
+    return worst
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command == 'build':
+        tables = build_tables()
+        save_tables(tables)
+        print(f"✅ Tabelas de posições gravadas em {TABLES_FILE} "
+              f"({day_to_datetime(tables.start):%Y-%m-%d} a {day_to_datetime(tables.end):%Y-%m-%d})")
+    elif command == 'verify':
+        samples = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+        ok = True
+        for name, value in verify_against_ephem(samples).items():
+            passed = value <= VERIFY_TOLERANCES[name]
+            ok = ok and passed
+            print(f"   {'✅' if passed else '❌'} {name}: {value:.3f} (tolerância {VERIFY_TOLERANCES[name]})")
+        print(f"{'✅' if ok else '❌'} {samples} amostras")
+        sys.exit(0 if ok else 1)
+    else:
+        print("Uso: python -m app.position_tables build | verify [amostras]")
+        sys.exit(1)
@@ -0,0 +1,109 @@
+"""
+Result Cache - Respostas completas de /result e /calculate-json
+
+Para as mesmas entradas normalizadas (data, hora, cidade, país) o resultado
+é determinístico, então o corpo já renderizado fica num LRU limitado junto
+com um ETag (hash do corpo). Visualizações repetidas custam uma consulta ao
+dicionário, e clientes que enviam If-None-Match num GET recebem 304 sem
+corpo (num POST a precondição não vale: RFC 9110 pede 412, não 304).
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+from fastapi.responses import Response
+
+from app.config import RESULT_CACHE_ENTRIES, SKY_CACHE_ENTRIES
+from app.gazetteer import normalize_name
+
+
+def result_key(kind, birth_date, birth_time, city, country):
+    """Chave normalizada de um resultado ('calculate' ou 'calculate-json')"""
+    return (kind, birth_date.strip(), birth_time.strip(), normalize_name(city), normalize_name(country))
+
+
+def _etag_matches(if_none_match, etag):
+    """Compara o cabeçalho If-None-Match (lista, '*' ou ETags fracos) com o ETag"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in candidates or any(tag.removeprefix('W/') == etag for tag in candidates)
+
+
+class CachedResult:
+    """Corpo renderizado, tipo de mídia e ETag de uma resposta"""
+
+    __slots__ = ('body', 'media_type', 'etag')
+
+    def __init__(self, body, media_type):
+        self.body = body
+        self.media_type = media_type
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+    def response(self, request, conditional=True):
+        """Resposta 200 com o corpo, ou 304 se o cliente já tem este ETag (só com conditional)"""
+        headers = {'ETag': self.etag}
+        if conditional and _etag_matches(request.headers.get('if-none-match'), self.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=self.body, media_type=self.media_type, headers=headers)
+
+
+class ResultCache:
+    """LRU limitado de CachedResult por chave normalizada"""
+
+    def __init__(self, max_entries=RESULT_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, body, media_type):
+        entry = CachedResult(body, media_type)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+        }
+
+
+_result_cache = None
+_sky_cache = None
+
+
+def get_result_cache():
+    """Retorna o cache de resultados do processo"""
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = ResultCache()
+    return _result_cache
+
+
+def get_sky_cache():
+    """Cache das camadas de /api/sky (até três por página, separado das páginas)"""
+    global _sky_cache
+    if _sky_cache is None:
+        _sky_cache = ResultCache(SKY_CACHE_ENTRIES)
+    return _sky_cache
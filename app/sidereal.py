@@ -0,0 +1,259 @@
+"""
+Sidereal - Cálculo vetorizado e em forma fechada do zênite
+
+O zênite de um observador tem declinação igual à latitude geodésica e
+ascensão reta igual ao tempo sideral local. Em vez de montar um observador
+do Skyfield e chamar from_altaz(alt_degrees=90), calculamos o GAST direto do
+instante e rotacionamos a direção do equador verdadeiro da data para o
+ICRS/J2000 (precessão IAU 1976 + termos principais da nutação IAU 1980).
+
+Todas as funções aceitam escalares ou arrays NumPy.
+
+Precisão do modelo (contra o Skyfield com o mesmo UT1): melhor que
+ZENITH_TOLERANCE_ARCSEC. O horário civil de entrada é UTC; utc_to_ut1_jd
+aplica o UT1 - UTC da escala de tempo compartilhada (app.ephemeris) antes do
+tempo sideral, como o caminho antigo (ts.from_datetime) fazia. Sem essa
+correção a diferença chegaria a ~650" em 1900 (UT1 - UTC ~44 s). A
+validação mede três faixas (o mesmo UT1; UTC de 1972 até
+UTC_OBSERVED_UNTIL_JD, com UT1 - UTC observado; UTC fora dela, com a
+tabela histórica e a previsão de ΔT do Skyfield), cada uma com sua
+tolerância em VALIDATION_TOLERANCES.
+
+Uso:
+    python -m app.sidereal validate [amostras]
+"""
+
+import sys
+
+import numpy as np
+
+from app.ephemeris import get_timescale
+from app.geometry import radec_to_unit_vectors, separation_degrees, unit_vectors_to_radec
+
+ZENITH_TOLERANCE_ARCSEC = 1.0
+
+# Tolerância (segundos de arco) de cada faixa da validação
+VALIDATION_TOLERANCES = {
+    'ut1': ZENITH_TOLERANCE_ARCSEC,
+    'utc': ZENITH_TOLERANCE_ARCSEC,
+    'utc_outside': ZENITH_TOLERANCE_ARCSEC,
+}
+
+# Faixa em que o UT1 - UTC do Skyfield é observado: 1972-01-01 a 2026-01-01
+UTC_LEAP_SECONDS_JD = 2441317.5
+UTC_OBSERVED_UNTIL_JD = 2461041.5
+
+J2000_JD = 2451545.0
+UNIX_EPOCH_JD = 2440587.5
+ARCSEC_TO_RAD = np.pi / (180.0 * 3600.0)
+
+
+def datetime64_to_jd(timestamps):
+    """Converte numpy.datetime64 (UTC) em data juliana"""
+    seconds = np.asarray(timestamps, dtype='datetime64[ms]').astype(np.float64) / 1000.0
+    return seconds / 86400.0 + UNIX_EPOCH_JD
+
+
+def utc_to_ut1_jd(jd_utc):
+    """
+    Converte data juliana UTC (escalar ou array) em data juliana UT1 com o
+    UT1 - UTC da escala de tempo compartilhada, numa única chamada vetorizada.
+    """
+    jd_utc = np.asarray(jd_utc, dtype=np.float64)
+    # Dia civil (meia-noite) e segundos no dia: o ts.utc aplica os leap
+    # seconds do dia certo e aceita dias além do fim do mês
+    days = np.floor(jd_utc - 0.5)
+    seconds = (jd_utc - 0.5 - days) * 86400.0
+    t = get_timescale().utc(1970, 1, 1 + (days - (UNIX_EPOCH_JD - 0.5)).astype(np.int64), 0, 0, seconds)
+    return np.asarray(t.ut1, dtype=np.float64)
+
+
+def _nutation(t):
+    """Termos principais da nutação IAU 1980 (Δψ, Δε em radianos)"""
+    omega = np.radians(125.04452 - 1934.136261 * t)
+    l_sun = np.radians(280.4665 + 36000.7698 * t)
+    l_moon = np.radians(218.3165 + 481267.8813 * t)
+
+    dpsi = (-17.20 * np.sin(omega) - 1.32 * np.sin(2 * l_sun)
+            - 0.23 * np.sin(2 * l_moon) + 0.21 * np.sin(2 * omega))
+    deps = (9.20 * np.cos(omega) + 0.57 * np.cos(2 * l_sun)
+            + 0.10 * np.cos(2 * l_moon) - 0.09 * np.cos(2 * omega))
+    return dpsi * ARCSEC_TO_RAD, deps * ARCSEC_TO_RAD
+
+
+def _mean_obliquity(t):
+    """Obliquidade média da eclíptica (IAU 2006) em radianos"""
+    return (84381.406 - 46.836769 * t - 0.0001831 * t ** 2
+            + 0.00200340 * t ** 3) * ARCSEC_TO_RAD
+
+
+def gmst_degrees(jd_ut1):
+    """Tempo sideral médio de Greenwich (IAU 2006) em graus"""
+    jd_ut1 = np.asarray(jd_ut1, dtype=np.float64)
+    days = jd_ut1 - J2000_JD
+    t = days / 36525.0
+
+    # Ângulo de rotação da Terra + polinômio em T (TT ≈ UT1 aqui: erro < 0.001")
+    era = 360.0 * ((0.7790572732640 + 0.00273781191135448 * days + days) % 1.0)
+    poly = (0.014506 + 4612.156534 * t + 1.3915817 * t ** 2
+            - 0.00000044 * t ** 3 - 0.000029956 * t ** 4) / 3600.0
+    return (era + poly) % 360.0
+
+
+def gast_degrees(jd_ut1):
+    """Tempo sideral aparente de Greenwich em graus (GMST + equação dos equinócios)"""
+    t = (np.asarray(jd_ut1, dtype=np.float64) - J2000_JD) / 36525.0
+    dpsi, _ = _nutation(t)
+    eq_equinoxes = np.degrees(dpsi * np.cos(_mean_obliquity(t)))
+    return (gmst_degrees(jd_ut1) + eq_equinoxes) % 360.0
+
+
+def lst_degrees(jd_ut1, longitude):
+    """Tempo sideral local aparente em graus"""
+    return (gast_degrees(jd_ut1) + np.asarray(longitude, dtype=np.float64)) % 360.0
+
+
+def _rotation_to_j2000(t):
+    """Matriz (..., 3, 3) do equador verdadeiro da data para o ICRS/J2000"""
+    t = np.asarray(t, dtype=np.float64)
+
+    # Precessão IAU 1976 (ângulos de Lieske)
+    zeta = (2306.2181 * t + 0.30188 * t ** 2 + 0.017998 * t ** 3) * ARCSEC_TO_RAD
+    z = (2306.2181 * t + 1.09468 * t ** 2 + 0.018203 * t ** 3) * ARCSEC_TO_RAD
+    theta = (2004.3109 * t - 0.42665 * t ** 2 - 0.041833 * t ** 3) * ARCSEC_TO_RAD
+
+    dpsi, deps = _nutation(t)
+    eps = _mean_obliquity(t)
+
+    precession = _rot_z(-z) @ _rot_y(theta) @ _rot_z(-zeta)
+    nutation = _rot_x(-(eps + deps)) @ _rot_z(-dpsi) @ _rot_x(eps)
+
+    # De J2000 para a data: N @ P; o inverso é a transposta
+    return np.swapaxes(nutation @ precession, -1, -2)
+
+
+def _rotation(a, axis):
+    """Matrizes (..., 3, 3) de rotação do sistema de coordenadas em torno de um eixo"""
+    c, s = np.cos(a), np.sin(a)
+    i, j = [k for k in range(3) if k != axis]
+    m = np.zeros(np.shape(a) + (3, 3))
+    m[..., axis, axis] = 1.0
+    m[..., i, i] = c
+    m[..., j, j] = c
+    # Sinais do eixo y invertidos (ordem cíclica z → x)
+    sign = -1.0 if axis == 1 else 1.0
+    m[..., i, j] = sign * s
+    m[..., j, i] = -sign * s
+    return m
+
+
+def _rot_x(a):
+    return _rotation(a, 0)
+
+
+def _rot_y(a):
+    return _rotation(a, 1)
+
+
+def _rot_z(a):
+    return _rotation(a, 2)
+
+
+def zenith_radec(jd_ut1, latitude, longitude):
+    """
+    Calcula RA/Dec (ICRS, graus) do zênite para instantes e locais.
+
+    Aceita escalares ou arrays (com broadcasting) de data juliana UT1,
+    latitude geodésica e longitude em graus. Retorna (ra, dec) em graus.
+    """
+    jd_ut1, latitude, longitude = np.broadcast_arrays(
+        np.asarray(jd_ut1, dtype=np.float64),
+        np.asarray(latitude, dtype=np.float64),
+        np.asarray(longitude, dtype=np.float64),
+    )
+    t = (jd_ut1 - J2000_JD) / 36525.0
+
+    # Direção do zênite no equador verdadeiro da data
+    v = radec_to_unit_vectors(lst_degrees(jd_ut1, longitude), latitude)
+
+    # Rotacionar para o ICRS/J2000
+    return unit_vectors_to_radec((_rotation_to_j2000(t) @ v[..., None])[..., 0])
+
+
+def horizon_matrix(jd_ut1, latitude, longitude):
+    """
+    Matriz 3×3 do ICRS/J2000 para o horizonte local (leste, norte, zênite)
+    de um observador (latitude geodésica e longitude em graus) num instante.
+    """
+    t = (float(jd_ut1) - J2000_JD) / 36525.0
+    lst = np.radians(float(lst_degrees(jd_ut1, longitude)))
+    phi = np.radians(latitude)
+    sin_lst, cos_lst = np.sin(lst), np.cos(lst)
+    sin_phi, cos_phi = np.sin(phi), np.cos(phi)
+
+    # Leste, norte e zênite no equador verdadeiro da data
+    local = np.array([
+        [-sin_lst, cos_lst, 0.0],
+        [-sin_phi * cos_lst, -sin_phi * sin_lst, cos_phi],
+        [cos_phi * cos_lst, cos_phi * sin_lst, sin_phi],
+    ])
+    # Do J2000 para a data é a transposta de _rotation_to_j2000
+    return local @ _rotation_to_j2000(t).T
+
+
+def validate_against_skyfield(samples=2000, seed=0):
+    """
+    Compara o zênite de produção (zenith_radec sobre utc_to_ut1_jd) com o
+    caminho Skyfield (wgs84 + from_altaz) e retorna o maior erro angular em
+    segundos de arco por faixa: 'ut1' (o mesmo instante como UT1, erro do
+    modelo), 'utc' (o instante como UTC via ts.from_datetime, de 1972 até
+    UTC_OBSERVED_UNTIL_JD) e 'utc_outside' (UTC antes de 1972 e depois).
+    """
+    from datetime import datetime, timedelta, timezone
+
+    from skyfield.api import wgs84
+
+    rng = np.random.default_rng(seed)
+    jd = rng.uniform(2415020.5, 2488069.5, samples)  # 1900-2100
+    lat = np.degrees(np.arcsin(rng.uniform(-1, 1, samples)))
+    lon = rng.uniform(-180, 180, samples)
+
+    ra_model, dec_model = zenith_radec(jd, lat, lon)
+    ra_fast, dec_fast = zenith_radec(utc_to_ut1_jd(jd), lat, lon)
+
+    ts = get_timescale()
+    unix_epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    observed = (jd >= UTC_LEAP_SECONDS_JD) & (jd < UTC_OBSERVED_UNTIL_JD)
+    worst = dict.fromkeys(VALIDATION_TOLERANCES, 0.0)
+    for i in range(samples):
+        observer = wgs84.latlon(lat[i], lon[i])
+        utc = ts.from_datetime(unix_epoch + timedelta(days=jd[i] - UNIX_EPOCH_JD))
+        checks = (
+            ('ut1', ts.ut1_jd(jd[i]), ra_model[i], dec_model[i]),
+            ('utc' if observed[i] else 'utc_outside', utc, ra_fast[i], dec_fast[i]),
+        )
+        for name, t, ra_zenith, dec_zenith in checks:
+            ra, dec, _ = observer.at(t).from_altaz(alt_degrees=90, az_degrees=0).radec()
+            sep = separation_degrees(ra_zenith, dec_zenith, ra.hours * 15, dec.degrees) * 3600.0
+            worst[name] = max(worst[name], float(sep))
+    return worst
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != 'validate':
+        print("Uso: python -m app.sidereal validate [amostras]")
+        sys.exit(1)
+    samples = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    worst = validate_against_skyfield(samples)
+    labels = {
+        'ut1': 'UT1',
+        'utc': 'UTC, 1972-2025',
+        'utc_outside': 'UTC, antes de 1972 e depois de 2025',
+    }
+    ok = True
+    for name, tolerance in VALIDATION_TOLERANCES.items():
+        passed = worst[name] <= tolerance
+        ok = ok and passed
+        print(f"{'✅' if passed else '❌'} Erro máximo vs Skyfield ({labels[name]}): {worst[name]:.3f}\" "
+              f"(tolerância {tolerance}\")")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,217 @@
+"""
+Sky Payload - Céu visível em arrays tipados para o visualizador (/api/sky)
+
+O result.html embutia o dicionário inteiro do resultado (com as listas
+duplicadas `objects` e `stars`, um dicionário por estrela) e o
+modern-sky-viewer.js ainda reordenava tudo no cliente. Aqui o céu do
+observador vira um corpo binário compacto, já ordenado da estrela mais
+brilhante para a mais fraca, que o navegador lê com views de ArrayBuffer
+sem parse de JSON. O custo fixo é de 13 bytes por estrela, mais o nome.
+
+O céu vem em camadas de magnitude (app.visible_sky): a camada 0 traz as
+estrelas mais brilhantes, a estrela zenital e as estrelas da sua
+constelação; as seguintes, cascas cada vez mais fracas, pedidas pelo
+visualizador só quando o zoom precisa delas.
+
+Formato (little-endian):
+
+    0   4s   "MSKY"
+    4   u16  versão do formato (SKY_FORMAT_VERSION)
+    6   u16  número de cores da paleta (P)
+    8   u32  número de estrelas (N)
+    12  u32  tamanho da tabela de strings em bytes (S)
+    16  i32  linha da estrela zenital (-1 se ficou de fora ou em outra camada)
+    20  u16  camada desta resposta
+    22  u16  número de camadas
+    24  f32  magnitude limite da camada
+    28       float32[N] x, float32[N] y (projeção de app.visible_sky:
+             zênite em (0, 0), horizonte no raio 1, norte em +y)
+             float32[N] magnitude
+             uint8[N]   índice da cor na paleta
+             S bytes    UTF-8: as P cores e os N nomes, separados por "\n"
+
+Uso:
+    python -m app.sky_payload sizes [amostras]
+"""
+
+import json
+import struct
+import sys
+
+import numpy as np
+
+from app.config import SKY_MIN_ALTITUDE
+from app.geometry import radec_to_unit_vectors, within_cone
+from app.visible_sky import get_bright_star_index, visible_stars
+
+SKY_MEDIA_TYPE = 'application/vnd.murphy.sky'
+SKY_FORMAT_MAGIC = b'MSKY'
+SKY_FORMAT_VERSION = 2
+
+# Cores por magnitude (as mesmas do visualizador) e a cor da estrela zenital
+PALETTE = ('#9bb0ff', '#aabfff', '#cad7ff', '#f8f7ff', '#fff4ea', '#ffd2a1', '#ffcc6f', '#FFD700')
+ZENITH_COLOR = len(PALETTE) - 1
+_MAGNITUDE_EDGES = np.array([0.0, 1.0, 2.0, 3.0, 4.0, 5.0])
+
+# Estrelas do índice a até este raio da estrela zenital ou de uma estrela da
+# constelação são a mesma estrela com outro nome ("Adhara" em star_data,
+# "HIP 33579" no índice): cobre o arredondamento das coordenadas de
+# star_data e o movimento próprio desde J1991.25, e fica abaixo de um pixel
+# do visualizador
+DUPLICATE_RADIUS_ARCMIN = 2.0
+
+_HEADER = struct.Struct('<4sHHIIiHHf')
+
+
+def color_indices(magnitude):
+    """Índice na PALETTE da cor de cada magnitude (< 0, < 1, ..., < 5, demais)"""
+    return np.searchsorted(_MAGNITUDE_EDGES, magnitude, side='right').astype(np.uint8)
+
+
+class SkyColumns:
+    """Colunas do céu do visualizador, da estrela mais brilhante para a mais fraca"""
+
+    def __init__(self, names, x, y, magnitude, colors, zenith_row=-1, tier=0):
+        self.tier = tier
+        order = np.argsort(np.asarray(magnitude, dtype=np.float32), kind='stable')
+        self.names = [names[i] for i in order.tolist()]
+        self.x = np.asarray(x, dtype=np.float32)[order]
+        self.y = np.asarray(y, dtype=np.float32)[order]
+        self.magnitude = np.asarray(magnitude, dtype=np.float32)[order]
+        self.colors = np.asarray(colors, dtype=np.uint8)[order]
+        self.zenith_row = int(np.flatnonzero(order == zenith_row)[0]) if zenith_row >= 0 else -1
+
+    def __len__(self):
+        return len(self.names)
+
+
+def sky_columns(zenith, instant, latitude, longitude, tier=0, min_altitude=SKY_MIN_ALTITUDE):
+    """
+    Camada `tier` do céu para o observador no instante "AAAA-MM-DD HH:MM"
+    (UT): as estrelas visíveis da camada e, na camada 0, também a estrela
+    zenital e as estrelas da sua constelação acima do horizonte. Nenhuma
+    camada repete essas estrelas: a comparação é por posição, não por nome.
+    """
+    sky = visible_stars(instant, latitude, longitude, min_altitude=min_altitude, tier=tier)
+    constellation_stars = [
+        star for star in zenith.get('constellation_stars', []) if star['name'] != zenith['name']
+    ]
+    _, _, zenith_x, zenith_y = sky.observe(zenith['ra_degrees'], zenith['dec_degrees'])
+    altitudes, _, xs, ys = sky.observe(
+        [star['ra'] for star in constellation_stars],
+        [star['dec'] for star in constellation_stars],
+    )
+    above = np.flatnonzero(altitudes >= min_altitude)
+
+    names = [zenith['name']] + [constellation_stars[i]['name'] for i in above.tolist()]
+    shown = radec_to_unit_vectors(
+        [zenith['ra_degrees']] + [constellation_stars[i]['ra'] for i in above.tolist()],
+        [zenith['dec_degrees']] + [constellation_stars[i]['dec'] for i in above.tolist()],
+    )
+    cosines = radec_to_unit_vectors(sky.ra_degrees, sky.dec_degrees) @ shown.T
+    visible = ~within_cone(cosines, DUPLICATE_RADIUS_ARCMIN / 60.0).any(axis=1)
+    visible_names = [name for name, keep in zip(sky.names, visible.tolist()) if keep]
+    if tier > 0:
+        return SkyColumns(
+            visible_names, sky.x[visible], sky.y[visible], sky.magnitude[visible],
+            color_indices(sky.magnitude[visible]), tier=tier,
+        )
+
+    constellation_magnitude = np.array([star['mag'] for star in constellation_stars], dtype=np.float64)[above]
+    magnitude = np.concatenate([[zenith['magnitude']], constellation_magnitude, sky.magnitude[visible]])
+    colors = color_indices(magnitude)
+    colors[0] = ZENITH_COLOR
+    return SkyColumns(
+        names + visible_names,
+        np.concatenate([np.atleast_1d(zenith_x), xs[above], sky.x[visible]]),
+        np.concatenate([np.atleast_1d(zenith_y), ys[above], sky.y[visible]]),
+        magnitude,
+        colors,
+        zenith_row=0,
+    )
+
+
+def pack_sky(columns):
+    """Corpo binário de /api/sky (formato no docstring do módulo)"""
+    index = get_bright_star_index()
+    strings = '\n'.join(PALETTE + tuple(columns.names)).encode('utf-8')
+    return b''.join([
+        _HEADER.pack(SKY_FORMAT_MAGIC, SKY_FORMAT_VERSION, len(PALETTE), len(columns), len(strings),
+                     columns.zenith_row, columns.tier, index.tiers, index.tier_magnitudes[columns.tier]),
+        columns.x.astype('<f4').tobytes(),
+        columns.y.astype('<f4').tobytes(),
+        columns.magnitude.astype('<f4').tobytes(),
+        columns.colors.tobytes(),
+        strings,
+    ])
+
+
+def unpack_sky(body):
+    """Lê um corpo de pack_sky de volta (como o visualizador faz no navegador)"""
+    magic, version, palette_size, count, strings_size, zenith_row, tier, tiers, max_magnitude = (
+        _HEADER.unpack_from(body)
+    )
+    if magic != SKY_FORMAT_MAGIC or version != SKY_FORMAT_VERSION:
+        raise ValueError(f"Formato de céu desconhecido: {magic!r} v{version}")
+    offset = _HEADER.size
+    arrays = {}
+    for name, dtype in (('x', '<f4'), ('y', '<f4'), ('magnitude', '<f4'), ('colors', np.uint8)):
+        arrays[name] = np.frombuffer(body, dtype=dtype, count=count, offset=offset)
+        offset += arrays[name].nbytes
+    strings = body[offset:offset + strings_size].decode('utf-8').split('\n')
+    return {
+        'palette': strings[:palette_size],
+        'names': strings[palette_size:],
+        'zenith_row': zenith_row,
+        'tier': tier,
+        'tiers': tiers,
+        'max_magnitude': max_magnitude,
+        **arrays,
+    }
+
+
+def _json_size(columns, palette):
+    """Tamanho da lista de dicionários por estrela que o result.html embutia"""
+    objects = [
+        {'name': name, 'magnitude': magnitude, 'x': x, 'y': y, 'color': palette[color],
+         'isZenith': row == columns.zenith_row, 'type': 'star'}
+        for row, (name, magnitude, x, y, color) in enumerate(zip(
+            columns.names, columns.magnitude.tolist(), columns.x.tolist(), columns.y.tolist(),
+            columns.colors.tolist()
+        ))
+    ]
+    return len(json.dumps({'objects': objects, 'stars': objects}, ensure_ascii=False).encode('utf-8'))
+
+
+def payload_sizes(samples=20, seed=0):
+    """Estrelas e bytes médios de cada camada, no binário e no JSON equivalente"""
+    rng = np.random.default_rng(seed)
+    index = get_bright_star_index()
+    sizes = {}
+    for tier in range(index.tiers):
+        stars = binary = text = 0
+        for _ in range(samples):
+            instant = f"{rng.integers(1900, 2050)}-{rng.integers(1, 13):02d}-{rng.integers(1, 29):02d} 22:00"
+            latitude = float(np.degrees(np.arcsin(rng.uniform(-0.99, 0.99))))
+            sky = visible_stars(instant, latitude, 0.0, tier=tier)
+            columns = SkyColumns(sky.names, sky.x, sky.y, sky.magnitude, color_indices(sky.magnitude), tier=tier)
+            body = pack_sky(columns)
+            unpacked = unpack_sky(body)
+            assert unpacked['names'] == columns.names and np.array_equal(unpacked['x'], columns.x)
+            stars += len(columns)
+            binary += len(body)
+            text += _json_size(columns, PALETTE)
+        sizes[tier] = (index.tier_magnitudes[tier], stars / samples, binary / samples, text / samples)
+    return sizes
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command == 'sizes':
+        samples = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+        for tier, (magnitude, stars, binary, text) in payload_sizes(samples).items():
+            print(f"   camada {tier} (mag ≤ {magnitude}): {stars:.0f} estrelas, binário {binary / 1024:.1f} KB "
+                  f"({binary / stars:.1f} B/estrela), JSON {text / 1024:.1f} KB")
+    else:
+        print("Uso: python -m app.sky_payload sizes [amostras]")
+        sys.exit(1)
@@ -0,0 +1,99 @@
+"""
+Stage Cache - Caches por etapa chaveados apenas pelas entradas de cada etapa
+
+Eventos estelares e coincidências dependem só da data; próximas lunações e
+posições geocêntricas dos corpos (app/birth_moment.py) só do instante;
+apenas zênite, marés, altitudes/azimutes e o perfil astrológico dependem do
+observador. Com uma chave por dimensão real, uma data ou minuto populares
+são calculados uma vez e compartilhados por todas as cidades.
+
+Somente valores efetivamente calculados entram no cache: exceções são
+propagadas (e tratadas pelos fallbacks de quem chama) sem gravar nada.
+"""
+
+import copy
+import functools
+import threading
+from collections import OrderedDict
+
+from app.config import STAGE_CACHE_ENTRIES
+
+
+class StageCache:
+    """LRU limitado com contadores de acerto de uma etapa"""
+
+    def __init__(self, name, max_entries=STAGE_CACHE_ENTRIES):
+        self.name = name
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key, compute, copy_value=True):
+        """
+        Valor em cache para a chave ou compute().
+
+        Por padrão devolve uma cópia profunda (quem chama pode alterar o
+        resultado); objetos imutáveis podem dispensar a cópia.
+        """
+        clone = copy.deepcopy if copy_value else (lambda value: value)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return clone(self._entries[key])
+            self.misses += 1
+
+        value = compute()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return clone(value)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+            'entries': len(self._entries),
+        }
+
+
+_caches = {}
+_registry_lock = threading.Lock()
+
+
+def get_stage_cache(name):
+    """Cache da etapa (criado na primeira utilização)"""
+    with _registry_lock:
+        if name not in _caches:
+            _caches[name] = StageCache(name)
+        return _caches[name]
+
+
+def cached_stage(name, key, copy=True):
+    """
+    Decorador: memoriza a função no cache da etapa `name`.
+
+    `key` recebe os mesmos argumentos da função e retorna a chave, contendo
+    apenas as entradas de que a etapa realmente depende. Com copy=False o
+    próprio objeto em cache é devolvido (para valores que ninguém altera).
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args):
+            return get_stage_cache(name).get_or_compute(key(*args), lambda: func(*args), copy)
+        wrapper.uncached = func
+        return wrapper
+    return decorator
+
+
+def stage_cache_stats():
+    """Taxa de acertos por etapa"""
+    with _registry_lock:
+        caches = list(_caches.values())
+    return {cache.name: cache.stats() for cache in caches}
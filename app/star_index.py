@@ -0,0 +1,225 @@
+"""
+Star Index - Consultas espaciais vetorizadas sobre catálogos de estrelas
+
+NamedStarIndex: as estrelas nomeadas (NAMED_STARS) mantidas uma única vez
+como matriz NumPy de vetores unitários. Vizinho mais próximo, k vizinhos e
+"todas dentro do raio" viram um único produto escalar seguido de
+argmax/argpartition, sem laço em Python.
+
+CatalogIndex: KD-tree sobre os vetores unitários do catálogo Hipparcos
+completo (~118 mil estrelas), com busca em cone e vizinho mais próximo
+com limite de magnitude em tempo sub-milissegundo.
+"""
+
+import numpy as np
+
+from app.catalog import get_star_catalog
+from app.geometry import (
+    chord_length,
+    chord_to_degrees,
+    cosine_to_degrees,
+    radec_to_unit_vectors,
+    within_cone,
+)
+from app.star_data import NAMED_STARS
+
+
+class NamedStarIndex:
+    """Índice de vetores unitários sobre um dicionário de estrelas nomeadas"""
+
+    def __init__(self, stars):
+        self.names = list(stars)
+        self.stars = [stars[name] for name in self.names]
+        self.vectors = radec_to_unit_vectors(
+            [star['ra_degrees'] for star in self.stars],
+            [star['dec_degrees'] for star in self.stars],
+        )
+
+    def __len__(self):
+        return len(self.names)
+
+    def _dots(self, ra_degrees, dec_degrees):
+        """Cossenos das distâncias entre a(s) posição(ões) e todas as estrelas"""
+        return radec_to_unit_vectors(ra_degrees, dec_degrees) @ self.vectors.T
+
+    def nearest(self, ra_degrees, dec_degrees):
+        """Índice(s) e distância(s) em graus da estrela mais próxima"""
+        dots = self._dots(ra_degrees, dec_degrees)
+        index = np.argmax(dots, axis=-1)
+        best = np.take_along_axis(dots, np.expand_dims(index, -1), -1)[..., 0]
+        return index, cosine_to_degrees(best)
+
+    def k_nearest(self, ra_degrees, dec_degrees, k):
+        """Índices e distâncias das k estrelas mais próximas, em ordem crescente"""
+        dots = self._dots(ra_degrees, dec_degrees)
+        k = min(k, len(self))
+        if k < len(self):
+            part = np.argpartition(-dots, k - 1, axis=-1)[..., :k]
+        else:
+            part = np.broadcast_to(np.arange(k), dots.shape).copy()
+        part_dots = np.take_along_axis(dots, part, -1)
+        order = np.argsort(-part_dots, axis=-1, kind='stable')
+        indices = np.take_along_axis(part, order, -1)
+        return indices, cosine_to_degrees(np.take_along_axis(part_dots, order, -1))
+
+    def within(self, ra_degrees, dec_degrees, radius_degrees):
+        """Índices e distâncias de todas as estrelas dentro do raio (posição escalar)"""
+        dots = self._dots(ra_degrees, dec_degrees)
+        indices = np.flatnonzero(within_cone(dots, radius_degrees))
+        indices = indices[np.argsort(-dots[indices], kind='stable')]
+        return indices, cosine_to_degrees(dots[indices])
+
+
+_named_star_index = None
+
+
+def get_named_star_index():
+    """Retorna o índice de NAMED_STARS do processo (construído uma vez)"""
+    global _named_star_index
+    if _named_star_index is None:
+        _named_star_index = NamedStarIndex(NAMED_STARS)
+    return _named_star_index
+
+
+class CatalogIndex:
+    """KD-tree sobre os vetores unitários de um StarCatalog"""
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.magnitude = np.asarray(catalog.magnitude)
+        self.hip = np.asarray(catalog.hip)
+        self._trees = {}
+        self._hip_to_named = {
+            star['hip']: name for name, star in NAMED_STARS.items() if star.get('hip')
+        }
+
+    def _tree(self, max_magnitude=None):
+        """KD-tree (e índices no catálogo) para um limite de magnitude, construída uma vez"""
+        if max_magnitude not in self._trees:
+            from scipy.spatial import cKDTree
+
+            if max_magnitude is None:
+                members = np.arange(len(self.catalog))
+            else:
+                members = np.flatnonzero(self.magnitude < max_magnitude)
+            vectors = np.asarray(self.catalog.xyz, dtype=np.float64)[members]
+            self._trees[max_magnitude] = (cKDTree(vectors), members)
+        return self._trees[max_magnitude]
+
+    def warm_up(self, limits=(None, 3.0, 6.5)):
+        """Constrói antecipadamente as KD-trees usadas pelas consultas do zênite"""
+        for max_magnitude in limits:
+            self._tree(max_magnitude)
+
+    def nearest(self, ra_degrees, dec_degrees, max_magnitude=None):
+        """Índice no catálogo e distância (graus) da estrela mais próxima"""
+        tree, members = self._tree(max_magnitude)
+        chord, position = tree.query(radec_to_unit_vectors(ra_degrees, dec_degrees))
+        return members[position], chord_to_degrees(chord)
+
+    def cone(self, ra_degrees, dec_degrees, radius_degrees, max_magnitude=None):
+        """Índices e distâncias de todas as estrelas no cone, da mais próxima à mais distante"""
+        tree, members = self._tree(max_magnitude)
+        center = radec_to_unit_vectors(ra_degrees, dec_degrees)
+        positions = np.asarray(tree.query_ball_point(center, chord_length(radius_degrees)), dtype=np.intp)
+        indices = members[positions]
+        chords = np.linalg.norm(np.asarray(self.catalog.xyz[indices], dtype=np.float64) - center, axis=-1)
+        order = np.argsort(chords, kind='stable')
+        return indices[order], chord_to_degrees(chords[order])
+
+    def index_of_hip(self, hip):
+        """Índice no catálogo (ordenado por HIP) do número HIP dado, ou None"""
+        if not hip:
+            return None
+        position = int(np.searchsorted(self.hip, hip))
+        if position < len(self.hip) and self.hip[position] == hip:
+            return position
+        return None
+
+    def _named_lookup(self):
+        """Arrays auxiliares (HIP ordenado → NAMED_STARS e NAMED_STARS → catálogo)"""
+        if not hasattr(self, '_named_hips'):
+            named = get_named_star_index()
+            hips = np.array([star.get('hip') or -1 for star in named.stars])
+            order = np.argsort(hips, kind='stable')
+            self._named_hips = (hips[order], order)
+            positions = [self.index_of_hip(hip) for hip in hips]
+            self._named_catalog_index = np.array(
+                [-1 if position is None else position for position in positions], dtype=np.intp
+            )
+        return self._named_hips, self._named_catalog_index
+
+    def named_indices(self, indices):
+        """Índices em NAMED_STARS (ou -1) das estrelas do catálogo dadas"""
+        (sorted_hips, order), _ = self._named_lookup()
+        hips = self.hip[indices]
+        position = np.clip(np.searchsorted(sorted_hips, hips), 0, len(sorted_hips) - 1)
+        return np.where(sorted_hips[position] == hips, order[position], -1)
+
+    def zenith_candidates(self, ra_degrees, dec_degrees, max_magnitude=6.5):
+        """
+        Versão vetorizada de zenith_candidate para arrays de posições.
+
+        Retorna arrays (índice no catálogo ou -1, índice em NAMED_STARS ou -1, distância).
+        """
+        vectors = radec_to_unit_vectors(ra_degrees, dec_degrees)
+
+        # 3) Mais próxima até o limite de magnitude
+        tree, members = self._tree(max_magnitude)
+        chord, position = tree.query(vectors)
+        indices = members[position]
+        distances = chord_to_degrees(chord)
+
+        # 2) Brilhante (mag < 3) a até 3°
+        tree, members = self._tree(3.0)
+        chord, position = tree.query(vectors, distance_upper_bound=chord_length(3.0))
+        bright = np.isfinite(chord)
+        indices[bright] = members[position[bright]]
+        distances[bright] = chord_to_degrees(chord[bright])
+        named_indices = self.named_indices(indices)
+
+        # 1) Estrela nomeada a até 0.5°
+        nearest_named, named_distance = get_named_star_index().nearest(ra_degrees, dec_degrees)
+        close = named_distance <= 0.5
+        _, named_catalog_index = self._named_lookup()
+        indices[close] = named_catalog_index[nearest_named[close]]
+        named_indices[close] = nearest_named[close]
+        distances[close] = named_distance[close]
+        return indices, named_indices, distances
+
+    def named_star(self, index):
+        """Nome em NAMED_STARS da estrela do catálogo, se houver"""
+        return self._hip_to_named.get(int(self.hip[index]))
+
+    def zenith_candidate(self, ra_degrees, dec_degrees, max_magnitude=6.5):
+        """
+        Escolhe a estrela do zênite pelo sistema de prioridades:
+        1) estrela nomeada a até 0.5°; 2) estrela brilhante (mag < 3) a até 3°;
+        3) estrela mais próxima até o limite de magnitude.
+
+        Retorna (índice no catálogo ou None, nome em NAMED_STARS ou None, distância).
+        """
+        named = get_named_star_index()
+        indices, distances = named.within(ra_degrees, dec_degrees, 0.5)
+        if len(indices):
+            name = named.names[indices[0]]
+            return self.index_of_hip(NAMED_STARS[name].get('hip')), name, float(distances[0])
+
+        indices, distances = self.cone(ra_degrees, dec_degrees, 3.0, max_magnitude=3.0)
+        if len(indices):
+            index = int(indices[0])
+            return index, self.named_star(index), float(distances[0])
+
+        index, distance = self.nearest(ra_degrees, dec_degrees, max_magnitude)
+        return int(index), self.named_star(index), float(distance)
+
+
+_catalog_index = None
+
+
+def get_catalog_index():
+    """Retorna o índice espacial do catálogo Hipparcos do processo"""
+    global _catalog_index
+    if _catalog_index is None:
+        _catalog_index = CatalogIndex(get_star_catalog())
+    return _catalog_index
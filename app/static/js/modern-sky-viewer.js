@@ -63,7 +63,10 @@ class ModernSkyViewer {
             // Animation
             rotationSpeed: 0.00005,
             twinkleSpeed: 0.003,
-            parallaxFactor: 0.3
+            parallaxFactor: 0.3,
+            
+            // Magnitude tiers: each step of zoom beyond 1x reveals the next fainter tier
+            tierZoomStep: 0.75
         };
         
         // State management
@@ -94,6 +97,10 @@ class ModernSkyViewer {
             touchStartY: 0
         };
         
+        // Tier 0 comes with the data; fainter tiers are fetched through data.loadTier
+        this.loadedTiers = 1;
+        this.loadingTier = false;
+        
         // Performance optimization
         this.layers = {
             background: null,
@@ -416,9 +423,11 @@ class ModernSkyViewer {
     getObjectAtPosition(x, y) {
         if (!this.data || !this.data.objects) return null;
         
-        // Check objects in reverse order (top to bottom)
-        for (let i = this.data.objects.length - 1; i >= 0; i--) {
+        // Check objects from top to bottom (brightest are drawn last, on top)
+        const visibleTier = this.visibleTier();
+        for (let i = 0; i < this.data.objects.length; i++) {
             const obj = this.data.objects[i];
+            if (obj.tier > visibleTier) continue;
             const screenPos = this.worldToScreen(obj.x, obj.y);
             
             const distance = Math.sqrt(
@@ -476,10 +485,38 @@ class ModernSkyViewer {
         // Gentle rotation for dynamic feel
         this.state.rotation += this.config.rotationSpeed;
         
+        // Fetch fainter tiers once the zoom needs them
+        this.requestTiers();
+        
         // Update shooting stars
         this.updateShootingStars();
     }
     
+    visibleTier() {
+        const tiers = this.data?.tiers || 1;
+        const tier = Math.floor((this.state.zoom - 1) / this.config.tierZoomStep);
+        return Math.max(0, Math.min(tiers - 1, tier));
+    }
+    
+    requestTiers() {
+        if (this.loadingTier || !this.data?.loadTier || this.loadedTiers > this.visibleTier()) {
+            return;
+        }
+        const tier = this.loadedTiers;
+        this.loadingTier = true;
+        this.data.loadTier(tier).then(sky => {
+            // Tiers are successive magnitude shells: appending keeps the brightest-first order
+            this.data.objects = this.data.objects.concat(sky.objects);
+            this.loadedTiers = tier + 1;
+            console.log(`✨ Tier ${tier} loaded: ${sky.objects.length} stars (mag ≤ ${sky.maxMagnitude})`);
+        }).catch(error => {
+            console.error(`❌ Failed to load tier ${tier}:`, error);
+            this.data.loadTier = null;  // no retries every frame
+        }).finally(() => {
+            this.loadingTier = false;
+        });
+    }
+    
     updateShootingStars() {
         // Remove finished shooting stars
         this.state.shootingStars = this.state.shootingStars.filter(star => star.life > 0);
@@ -634,26 +671,18 @@ class ModernSkyViewer {
     }
     
     drawCelestialObjects() {
-        console.log('🎨 drawCelestialObjects called');
-        console.log('🎨 this.data:', this.data);
-        console.log('🎨 this.data.objects:', this.data?.objects);
-        
         if (!this.data || !this.data.objects) {
-            console.warn('⚠️ No data or objects found to render');
             return;
         }
         
-        console.log(`🎨 Rendering ${this.data.objects.length} objects`);
-        
-        // Sort objects by magnitude (dimmer first)
-        const sortedObjects = [...this.data.objects].sort((a, b) => b.magnitude - a.magnitude);
-        
-        console.log('🎨 Sorted objects:', sortedObjects.map(obj => `${obj.name}(${obj.magnitude})`));
-        
-        sortedObjects.forEach((obj, index) => {
-            console.log(`🎨 Drawing object ${index + 1}: ${obj.name} at (${obj.x}, ${obj.y})`);
-            this.drawCelestialObject(obj);
-        });
+        // Objects arrive sorted by magnitude (brightest first): drawing from the
+        // end leaves the brightest on top, with no per-frame sort
+        const objects = this.data.objects;
+        const visibleTier = this.visibleTier();
+        for (let i = objects.length - 1; i >= 0; i--) {
+            if (objects[i].tier > visibleTier) continue;
+            this.drawCelestialObject(objects[i]);
+        }
     }
     
     drawCelestialObject(obj) {
@@ -662,6 +691,15 @@ class ModernSkyViewer {
         const isSelected = this.state.selectedObject === obj;
         const isZenithStar = obj.isZenith || obj.is_zenith || (this.data.zenith && obj.name === this.data.zenith.name);
         
+        // Fainter tiers hold thousands of stars: a plain dot instead of glow and spikes
+        if (obj.tier > 0 && !isHovered && !isSelected) {
+            this.ctx.fillStyle = obj.color || this.getStarColor(obj);
+            this.ctx.beginPath();
+            this.ctx.arc(screenPos.x, screenPos.y, Math.max(1, (7 - obj.magnitude) * this.state.zoom * 0.5), 0, Math.PI * 2);
+            this.ctx.fill();
+            return;
+        }
+        
         // Calculate dynamic size - INCREASED SIGNIFICANTLY for visibility
         const baseSize = Math.max(4, 12 - obj.magnitude) * 2; // Doubled base size
         const zoomSize = baseSize * this.state.zoom;
@@ -951,6 +989,66 @@ class ModernSkyViewer {
     }
 }
 
+// Packed sky from /api/sky (layout documented in app/sky_payload.py).
+// Typed arrays are read as little-endian, the byte order of every browser platform.
+const SKY_FORMAT_MAGIC = 'MSKY';
+const SKY_FORMAT_VERSION = 2;
+
+function parseSkyPayload(buffer) {
+    const view = new DataView(buffer);
+    const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+    const version = view.getUint16(4, true);
+    if (magic !== SKY_FORMAT_MAGIC || version !== SKY_FORMAT_VERSION) {
+        throw new Error(`Unknown sky payload: ${magic} v${version}`);
+    }
+    const paletteSize = view.getUint16(6, true);
+    const count = view.getUint32(8, true);
+    const stringsSize = view.getUint32(12, true);
+    const zenithRow = view.getInt32(16, true);
+    const tier = view.getUint16(20, true);
+    const tiers = view.getUint16(22, true);
+    const maxMagnitude = view.getFloat32(24, true);
+    
+    let offset = 28;
+    const x = new Float32Array(buffer, offset, count);
+    offset += 4 * count;
+    const y = new Float32Array(buffer, offset, count);
+    offset += 4 * count;
+    const magnitude = new Float32Array(buffer, offset, count);
+    offset += 4 * count;
+    const colors = new Uint8Array(buffer, offset, count);
+    offset += count;
+    const strings = new TextDecoder().decode(new Uint8Array(buffer, offset, stringsSize)).split('\n');
+    const palette = strings.slice(0, paletteSize);
+    const names = strings.slice(paletteSize);
+    
+    // One lightweight object per star for hit testing and the info panel
+    const objects = new Array(count);
+    for (let i = 0; i < count; i++) {
+        const isZenith = i === zenithRow;
+        objects[i] = {
+            name: names[i],
+            x: x[i],
+            y: y[i],
+            magnitude: magnitude[i],
+            color: palette[colors[i]],
+            isZenith: isZenith,
+            size: isZenith ? 25 : Math.max(4, 15 - magnitude[i] * 2),
+            type: 'star',
+            tier: tier
+        };
+    }
+    return { objects, x, y, magnitude, colors, palette, names, zenithRow, tier, tiers, maxMagnitude };
+}
+
+async function loadSkyPayload(url) {
+    const response = await fetch(url);
+    if (!response.ok) {
+        throw new Error(`Sky payload request failed: HTTP ${response.status}`);
+    }
+    return parseSkyPayload(await response.arrayBuffer());
+}
+
 // Initialize the viewer
 function initializeModernSkyViewer(canvasId, skyData) {
     return new ModernSkyViewer(canvasId, skyData);
@@ -958,4 +1056,5 @@ function initializeModernSkyViewer(canvasId, skyData) {
 
 // Export for use
 window.ModernSkyViewer = ModernSkyViewer;
+window.loadSkyPayload = loadSkyPayload;
 window.initializeModernSkyViewer = initializeModernSkyViewer; 
\ No newline at end of file
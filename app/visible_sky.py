@@ -0,0 +1,199 @@
+"""
+Visible Sky - Estrelas acima do horizonte do observador no instante
+
+O campo de estrelas do visualizador era montado com deslocamentos de RA/Dec
+em torno da estrela zenital, mais 20 estrelas "HD-xxxxx" sorteadas, sem
+relação com o céu que estava de fato acima do observador. Aqui as estrelas
+brilhantes do snapshot Hipparcos vão para altitude/azimute numa única
+passada NumPy: a matriz 3×3 do ICRS para o horizonte local
+(app.sidereal.horizon_matrix) aplicada aos vetores unitários do catálogo,
+mais a refração da atmosfera padrão (app.birth_moment.refract), com os
+kernels de app.geometry. Aberração anual e deflexão da luz (até ~20") ficam
+de fora: não aparecem na escala do visualizador.
+
+As estrelas ficam num índice ordenado por magnitude, montado uma vez por
+processo, e o resultado já sai da mais brilhante para a mais fraca. O
+índice é dividido em camadas de magnitude (SKY_TIER_MAGNITUDES): os limites
+de cada camada são faixas de linhas contíguas calculadas uma vez por
+catálogo, e cada consulta transforma só as linhas da camada pedida. O
+visualizador pinta a camada 0 e busca as mais fracas sob demanda.
+
+Projeção: azimutal equidistante centrada no zênite, com o horizonte no
+círculo de raio 1, norte em +y e leste em +x (as direções desenhadas pelo
+visualizador).
+
+Uso:
+    python -m app.visible_sky validate [amostras]
+"""
+
+import sys
+
+import numpy as np
+
+from app.birth_moment import refract
+from app.catalog import get_star_catalog
+from app.config import SKY_MIN_ALTITUDE, SKY_TIER_MAGNITUDES
+from app.ephemeris import DAY_EPOCH_JD, instant_to_day
+from app.geometry import horizontal, project_zenithal, radec_to_unit_vectors, vector_separation_degrees
+from app.sidereal import horizon_matrix, utc_to_ut1_jd
+from app.star_data import NAMED_STARS
+
+# Magnitude limite do índice (a da camada mais fraca)
+INDEX_MAX_MAGNITUDE = SKY_TIER_MAGNITUDES[-1]
+
+# Tolerância da validação contra o Skyfield (aberração e deflexão ficam de fora)
+VALIDATION_TOLERANCE_ARCSEC = 30.0
+
+_HIP_NAMES = {star['hip']: name for name, star in NAMED_STARS.items()}
+
+
+class BrightStarIndex:
+    """Estrelas até INDEX_MAX_MAGNITUDE ordenadas por magnitude, com vetores ICRS contíguos"""
+
+    def __init__(self, catalog, tier_magnitudes=SKY_TIER_MAGNITUDES):
+        indices = catalog.brighter_than(tier_magnitudes[-1])
+        order = indices[np.argsort(catalog.magnitude[indices], kind='stable')]
+        self.hip = np.asarray(catalog.hip[order])
+        self.ra_degrees = np.asarray(catalog.ra_degrees[order], dtype=np.float64)
+        self.dec_degrees = np.asarray(catalog.dec_degrees[order], dtype=np.float64)
+        self.magnitude = np.asarray(catalog.magnitude[order], dtype=np.float64)
+        self.xyz = np.ascontiguousarray(catalog.xyz[order], dtype=np.float64)
+        for array in (self.hip, self.ra_degrees, self.dec_degrees, self.magnitude, self.xyz):
+            array.flags.writeable = False
+
+        # Linhas [tier_bounds[k], tier_bounds[k + 1]) de cada camada de magnitude
+        self.tier_magnitudes = tuple(tier_magnitudes)
+        self.tier_bounds = np.concatenate([[0], np.searchsorted(self.magnitude, tier_magnitudes, side='right')])
+        self.tier_bounds[-1] = len(self.magnitude)
+        self.tier_bounds.flags.writeable = False
+
+    def __len__(self):
+        return len(self.hip)
+
+    def brighter_than(self, max_magnitude):
+        """Quantas estrelas do início do índice têm magnitude até o limite"""
+        return int(np.searchsorted(self.magnitude, max_magnitude, side='right'))
+
+    @property
+    def tiers(self):
+        return len(self.tier_magnitudes)
+
+    def tier_rows(self, tier):
+        """Faixa de linhas do índice da camada (0 = as mais brilhantes)"""
+        if not 0 <= tier < self.tiers:
+            raise ValueError(f"Camada de magnitude inexistente: {tier} (0 a {self.tiers - 1})")
+        return slice(int(self.tier_bounds[tier]), int(self.tier_bounds[tier + 1]))
+
+
+_index = None
+
+
+def get_bright_star_index():
+    """Índice do processo (montado na primeira consulta ou no startup)"""
+    global _index
+    if _index is None:
+        _index = BrightStarIndex(get_star_catalog())
+    return _index
+
+
+def _apparent_horizontal(xyz, matrix):
+    """Altitude aparente (com refração) e azimute (radianos) de vetores ICRS (N, 3)"""
+    altitude, azimuth = horizontal(xyz, matrix)
+    return refract(altitude), azimuth
+
+
+class VisibleSky:
+    """Estrelas acima da altitude mínima, da mais brilhante para a mais fraca"""
+
+    def __init__(self, matrix, hip, ra_degrees, dec_degrees, magnitude, altitude, azimuth):
+        self.matrix = matrix
+        self.hip = hip
+        self.ra_degrees = ra_degrees
+        self.dec_degrees = dec_degrees
+        self.magnitude = magnitude
+        self.altitude = altitude
+        self.azimuth = azimuth
+        self.x, self.y = project_zenithal(altitude, azimuth)
+
+    def __len__(self):
+        return len(self.hip)
+
+    @property
+    def names(self):
+        """Nome próprio das estrelas conhecidas, HIP nas demais"""
+        return [_HIP_NAMES.get(hip, f"HIP {hip}") for hip in self.hip.tolist()]
+
+    def observe(self, ra_degrees, dec_degrees):
+        """Altitude, azimute (graus) e posição projetada de outras coordenadas no mesmo céu"""
+        altitude, azimuth = _apparent_horizontal(radec_to_unit_vectors(ra_degrees, dec_degrees), self.matrix)
+        altitude, azimuth = np.degrees(altitude), np.degrees(azimuth)
+        x, y = project_zenithal(altitude, azimuth)
+        return altitude, azimuth, x, y
+
+
+def visible_stars(instant, latitude, longitude, min_altitude=SKY_MIN_ALTITUDE, tier=0, limit=None):
+    """
+    Estrelas de uma camada de magnitude do índice (0 = as mais brilhantes)
+    com altitude aparente a partir de min_altitude (graus) para o observador
+    no instante "AAAA-MM-DD HH:MM" (UT), limitadas às `limit` mais brilhantes.
+    """
+    index = get_bright_star_index()
+    rows = index.tier_rows(tier)
+    jd_ut1 = float(utc_to_ut1_jd(instant_to_day(instant) + DAY_EPOCH_JD))
+    matrix = horizon_matrix(jd_ut1, latitude, longitude)
+
+    altitude, azimuth = _apparent_horizontal(index.xyz[rows], matrix)
+    above = np.flatnonzero(altitude >= np.radians(min_altitude))[:limit]
+    selected = rows.start + above
+    return VisibleSky(
+        matrix,
+        index.hip[selected],
+        index.ra_degrees[selected],
+        index.dec_degrees[selected],
+        index.magnitude[selected],
+        np.degrees(altitude[above]),
+        np.degrees(azimuth[above]),
+    )
+
+
+def validate_against_skyfield(samples=200, seed=0, stars=50):
+    """Maior diferença (segundos de arco) contra altaz() do Skyfield, sem refração"""
+    from skyfield.api import Star, wgs84
+
+    from app.ephemeris import get_ephemeris, get_timescale
+
+    rng = np.random.default_rng(seed)
+    index = get_bright_star_index()
+    earth, timescale = get_ephemeris()['earth'], get_timescale()
+    worst = 0.0
+    for _ in range(samples):
+        jd = rng.uniform(2415020.5, 2470000.5)
+        latitude = float(np.degrees(np.arcsin(rng.uniform(-0.99, 0.99))))
+        longitude = float(rng.uniform(-180, 180))
+        rows = rng.choice(len(index), stars, replace=False)
+
+        altitude, azimuth = horizontal(index.xyz[rows], horizon_matrix(jd, latitude, longitude))
+        observer = earth + wgs84.latlon(latitude, longitude)
+        star = Star(ra_hours=index.ra_degrees[rows] / 15.0, dec_degrees=index.dec_degrees[rows])
+        expected_alt, expected_az, _ = observer.at(timescale.ut1_jd(jd)).observe(star).apparent().altaz()
+
+        # Separação angular entre as direções (estável perto do zênite)
+        a = radec_to_unit_vectors(np.degrees(azimuth), np.degrees(altitude))
+        b = radec_to_unit_vectors(expected_az.degrees, expected_alt.degrees)
+        separation = vector_separation_degrees(a, b) * 3600
+        worst = max(worst, float(separation.max()))
+    return worst
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command == 'validate':
+        samples = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+        worst = validate_against_skyfield(samples)
+        ok = worst < VALIDATION_TOLERANCE_ARCSEC
+        print(f"{'✅' if ok else '❌'} Maior diferença contra o Skyfield: {worst:.2f}\" "
+              f"(tolerância {VALIDATION_TOLERANCE_ARCSEC}\")")
+        sys.exit(0 if ok else 1)
+    else:
+        print("Uso: python -m app.visible_sky validate [amostras]")
+        sys.exit(1)
@@ -4,111 +4,68 @@ Zenith Calculator - Calcula a estrela no zênite para um momento específico
 
 from datetime import datetime
 import pytz
-from skyfield.api import load, Topos, wgs84
-from skyfield.units import Angle
-from skyfield.timelib import Time
-from skyfield.data import hipparcos
-from app.star_data import find_nearest_named_star
-import pandas as pd
-import math
+from skyfield.api import load_constellation_map, load_constellation_names, position_of_radec
+from app.star_data import NAMED_STARS, find_nearest_named_star
+from app.catalog import get_star_catalog
+from app.ephemeris import get_timescale, get_ephemeris
+from app.sidereal import zenith_radec, datetime64_to_jd, utc_to_ut1_jd, UNIX_EPOCH_JD
+from app.zenith_lut import get_zenith_lut
+from app.star_index import get_catalog_index, get_named_star_index
+from app.config import ZENITH_SOURCE
+from app.geometry import separation_degrees
+import zlib
 import numpy as np
-import os
-from pathlib import Path
 
-# Cache global para dados astronômicos
-_ts = None
-_planets = None
+# Estrelas nomeadas na ordem do dicionário (mesma ordem da tabela zenital)
+_NAMED_STAR_ITEMS = list(NAMED_STARS.items())
+_NAMED_STAR_RA = np.array([star['ra_degrees'] for _, star in _NAMED_STAR_ITEMS])
+_NAMED_STAR_DEC = np.array([star['dec_degrees'] for _, star in _NAMED_STAR_ITEMS])
 
 def _get_astronomical_data():
-    """Lazy loading dos dados astronômicos"""
-    global _ts, _planets
-    if _ts is None:
-        _ts = load.timescale()
-        _planets = load('de421.bsp')
-    return _ts, _planets
+    """Retorna timescale e efemérides do registro compartilhado do processo"""
+    return get_timescale(), get_ephemeris()
 
 def load_hipparcos_data():
-    """Load Hipparcos catalog data"""
-    # Create data directory if it doesn't exist
-    data_dir = Path(__file__).parent / 'data'
-    data_dir.mkdir(exist_ok=True)
-    
-    # Download and load the catalog
-    with load.open(hipparcos.URL) as f:
-        df = pd.read_csv(f, sep='|', skiprows=1)
-    
-    return df
+    """Load Hipparcos catalog data from the memory-mapped snapshot"""
+    return get_star_catalog().to_dataframe()
 
-def find_zenith_star(birth_date, birth_time, latitude, longitude):
-    """Find the star that was at zenith at the given time and location"""
+def find_zenith_star(birth_date, birth_time, latitude, longitude, source=None):
+    """
+    Find the star that was at zenith at the given time and location
+    
+    source: 'named' (NAMED_STARS) ou 'catalog' (Hipparcos completo com
+    enriquecimento pelas estrelas nomeadas); padrão em MURPHY_ZENITH_SOURCE.
+    """
     try:
         # Parse birth datetime and add UTC timezone
         birth_datetime = datetime.strptime(f"{birth_date} {birth_time}", "%Y-%m-%d %H:%M")
         # Add UTC timezone to avoid Skyfield error
         birth_datetime = birth_datetime.replace(tzinfo=pytz.UTC)
         
-        # Create time object
-        ts = load.timescale()
-        t = ts.from_datetime(birth_datetime)
-        
-        # Create location object
-        location = wgs84.latlon(latitude, longitude)
-        
-        # Calculate zenith position (RA and Dec at local time)
-        observer = location
-        alt = 90  # zenith altitude
-        az = 0   # arbitrary azimuth for zenith
-        
-        # Get the apparent position at the observer's location
-        astrometric = observer.at(t)
-        altaz = astrometric.from_altaz(alt_degrees=alt, az_degrees=az)
-        ra, dec, distance = altaz.radec()
-        
-        zenith_ra = ra.hours * 15  # convert hours to degrees
-        zenith_dec = dec.degrees
+        # Zênite em forma fechada: Dec = latitude geodésica, RA = tempo sideral
+        # local rotacionado para o ICRS (ver app/sidereal.py), no UT1
+        jd = utc_to_ut1_jd(birth_datetime.timestamp() / 86400.0 + UNIX_EPOCH_JD)
+        zenith_ra, zenith_dec = (float(v) for v in zenith_radec(jd, latitude, longitude))
         
         print(f"🔍 Zenith position: RA={zenith_ra:.2f}°, Dec={zenith_dec:.2f}°")
         
-        # Load our detailed star catalog
-        from app.star_data import NAMED_STARS
+        if (source or ZENITH_SOURCE) == 'catalog':
+            result = _find_catalog_zenith_star(zenith_ra, zenith_dec)
+            if result is not None:
+                return result
         
-        # Find the closest star in our catalog
-        min_distance = float('inf')
+        # Find the closest star in our catalog (tabela RA×Dec + verificação exata)
         closest_star = None
         star_name = None
         
-        for name, star in NAMED_STARS.items():
-            distance = angular_distance(
-                zenith_ra, zenith_dec,
-                star['ra_degrees'], star['dec_degrees']
-            )
-            if distance < min_distance:
-                min_distance = distance
-                closest_star = star
-                star_name = name
+        index, min_distance = find_named_star_index(zenith_ra, zenith_dec)
+        if index is not None:
+            star_name, closest_star = _NAMED_STAR_ITEMS[index]
         
         print(f"⭐ Found closest star: {star_name} (distance: {min_distance:.2f}°)")
         
         if closest_star:
-            return {
-                'name': star_name,
-                'hip': closest_star.get('hip', 0),
-                'ra_degrees': closest_star['ra_degrees'],
-                'dec_degrees': closest_star['dec_degrees'],
-                'magnitude': closest_star['magnitude'],
-                'distance_ly': closest_star['distance_ly'],
-                'spectral_class': closest_star['spectral_class'],
-                'constellation': closest_star['constellation'],
-                'angular_distance': min_distance,
-                'age_billion_years': closest_star.get('age_billion_years', 5.0),
-                'mass_solar': closest_star.get('mass_solar', 1.0),
-                'temperature_k': closest_star.get('temperature_k', 5778),
-                'history': closest_star.get('history', f'{star_name} é uma estrela fascinante.'),
-                'constellation_stars': closest_star.get('constellation_stars', []),
-                'zenith_ra': zenith_ra,
-                'zenith_dec': zenith_dec,
-                'is_generic': False  # Flag indicating we have detailed data
-            }
+            return _named_star_result(star_name, closest_star, min_distance, zenith_ra, zenith_dec)
         else:
             # Return generic star data if no star found (should never happen with 60 stars)
             return {
@@ -135,15 +92,234 @@ def find_zenith_star(birth_date, birth_time, latitude, longitude):
         print(f"❌ Error in find_zenith_star: {str(e)}")
         raise Exception(f"Error finding zenith star: {str(e)}")
 
-def angular_distance(ra1, dec1, ra2, dec2):
-    """Calcula distância angular entre duas posições em graus"""
-    ra1, dec1, ra2, dec2 = map(math.radians, [ra1, dec1, ra2, dec2])
+def find_zenith_stars_batch(birth_dates, birth_times, latitudes, longitudes, source=None):
+    """
+    Resolve a estrela zenital de muitos nascimentos em uma única passada vetorizada.
     
-    cos_dist = (math.sin(dec1) * math.sin(dec2) + 
-               math.cos(dec1) * math.cos(dec2) * math.cos(ra1 - ra2))
+    Recebe sequências paralelas de data (YYYY-MM-DD), hora (HH:MM, UTC),
+    latitude e longitude e retorna um dicionário colunar (listas paralelas).
+    """
+    count = len(birth_dates)
+    if not (len(birth_times) == len(latitudes) == len(longitudes) == count):
+        raise ValueError("Colunas do lote com tamanhos diferentes")
     
-    cos_dist = max(-1, min(1, cos_dist))
-    return math.degrees(math.acos(cos_dist))
+    stamps = _batch_stamps(birth_dates, birth_times)
+    
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    if np.any(np.abs(latitudes) > 90) or np.any(np.abs(longitudes) > 180):
+        raise ValueError("Coordenadas fora do intervalo válido no lote")
+    
+    # Zênite de todos os registros de uma vez, no UT1 (ver app/sidereal.py)
+    zenith_ra, zenith_dec = zenith_radec(utc_to_ut1_jd(datetime64_to_jd(stamps)), latitudes, longitudes)
+    
+    named = get_named_star_index()
+    named_columns = _named_star_columns()
+    
+    if (source or ZENITH_SOURCE) == 'catalog':
+        catalog_index = get_catalog_index()
+        indices, named_indices, distances = catalog_index.zenith_candidates(zenith_ra, zenith_dec)
+        catalog = catalog_index.catalog
+        
+        safe = np.maximum(indices, 0)
+        hip = np.asarray(catalog.hip[safe], dtype=np.int64)
+        ra = np.asarray(catalog.ra_degrees[safe], dtype=np.float64)
+        dec = np.asarray(catalog.dec_degrees[safe], dtype=np.float64)
+        magnitude = np.round(np.asarray(catalog.magnitude[safe], dtype=np.float64), 2)
+        parallax = np.asarray(catalog.parallax_mas[safe], dtype=np.float64)
+        with np.errstate(divide='ignore'):
+            distance_ly = np.where(parallax > 0, np.round(3261.56 / parallax, 1), np.nan)
+        for i in np.flatnonzero(~(parallax > 0)):
+            distance_ly[i] = estimate_distance(magnitude[i])
+        names = np.array([f"HIP {h}" for h in hip], dtype=object)
+        spectral_class = _estimate_spectral_classes(magnitude)
+        constellation = constellations_at(ra, dec)
+        
+        # Sobrescrever com os dados detalhados quando a estrela é nomeada
+        is_named = named_indices >= 0
+        chosen = named_indices[is_named]
+        names[is_named] = named_columns['name'][chosen]
+        hip[is_named] = named_columns['hip'][chosen]
+        ra[is_named] = named_columns['ra_degrees'][chosen]
+        dec[is_named] = named_columns['dec_degrees'][chosen]
+        magnitude[is_named] = named_columns['magnitude'][chosen]
+        distance_ly[is_named] = named_columns['distance_ly'][chosen]
+        spectral_class[is_named] = named_columns['spectral_class'][chosen]
+        constellation[is_named] = named_columns['constellation'][chosen]
+        is_generic = ~is_named
+    else:
+        chosen, distances = named.nearest(zenith_ra, zenith_dec)
+        names = named_columns['name'][chosen]
+        hip = named_columns['hip'][chosen]
+        ra = named_columns['ra_degrees'][chosen]
+        dec = named_columns['dec_degrees'][chosen]
+        magnitude = named_columns['magnitude'][chosen]
+        distance_ly = named_columns['distance_ly'][chosen]
+        spectral_class = named_columns['spectral_class'][chosen]
+        constellation = named_columns['constellation'][chosen]
+        is_generic = np.zeros(count, dtype=bool)
+    
+    return {
+        'birth_date': list(birth_dates),
+        'birth_time': list(birth_times),
+        'latitude': latitudes.tolist(),
+        'longitude': longitudes.tolist(),
+        'zenith_ra': zenith_ra.tolist(),
+        'zenith_dec': zenith_dec.tolist(),
+        'name': names.tolist(),
+        'hip': hip.tolist(),
+        'ra_degrees': ra.tolist(),
+        'dec_degrees': dec.tolist(),
+        'magnitude': magnitude.tolist(),
+        'distance_ly': distance_ly.tolist(),
+        'spectral_class': spectral_class.tolist(),
+        'constellation': constellation.tolist(),
+        'angular_distance': np.asarray(distances).tolist(),
+        'is_generic': is_generic.tolist(),
+    }
+
+def _batch_stamps(birth_dates, birth_times):
+    """
+    Instantes datetime64[m] do lote, com o mesmo formato aceito por
+    find_zenith_star (strptime "%Y-%m-%d %H:%M"). O parse vetorizado só
+    aceita ISO com zeros ("1990-01-05", "09:05"); se falhar, cada registro
+    passa pelo strptime ("1990-1-5", "9:05").
+    """
+    try:
+        return np.array(
+            [f"{d}T{t}" for d, t in zip(birth_dates, birth_times)], dtype='datetime64[m]'
+        )
+    except ValueError:
+        pass
+    try:
+        return np.array(
+            [datetime.strptime(f"{d} {t}", "%Y-%m-%d %H:%M") for d, t in zip(birth_dates, birth_times)],
+            dtype='datetime64[m]'
+        )
+    except ValueError as e:
+        raise ValueError(f"Data/hora inválida no lote: {e}")
+
+_named_columns = None
+
+def _named_star_columns():
+    """Colunas NumPy dos dados de NAMED_STARS (mesma ordem do índice nomeado)"""
+    global _named_columns
+    if _named_columns is None:
+        stars = get_named_star_index().stars
+        _named_columns = {
+            'name': np.array(get_named_star_index().names, dtype=object),
+            'hip': np.array([star.get('hip', 0) for star in stars], dtype=np.int64),
+            'ra_degrees': np.array([star['ra_degrees'] for star in stars], dtype=np.float64),
+            'dec_degrees': np.array([star['dec_degrees'] for star in stars], dtype=np.float64),
+            'magnitude': np.array([star['magnitude'] for star in stars], dtype=np.float64),
+            'distance_ly': np.array([star['distance_ly'] for star in stars], dtype=np.float64),
+            'spectral_class': np.array([star['spectral_class'] for star in stars], dtype=object),
+            'constellation': np.array([star['constellation'] for star in stars], dtype=object),
+        }
+    return _named_columns
+
+def _named_star_result(star_name, closest_star, min_distance, zenith_ra, zenith_dec):
+    """Monta o resultado a partir de uma estrela de NAMED_STARS"""
+    return {
+        'name': star_name,
+        'hip': closest_star.get('hip', 0),
+        'ra_degrees': closest_star['ra_degrees'],
+        'dec_degrees': closest_star['dec_degrees'],
+        'magnitude': closest_star['magnitude'],
+        'distance_ly': closest_star['distance_ly'],
+        'spectral_class': closest_star['spectral_class'],
+        'constellation': closest_star['constellation'],
+        'angular_distance': min_distance,
+        'age_billion_years': closest_star.get('age_billion_years', 5.0),
+        'mass_solar': closest_star.get('mass_solar', 1.0),
+        'temperature_k': closest_star.get('temperature_k', 5778),
+        'history': closest_star.get('history', f'{star_name} é uma estrela fascinante.'),
+        'constellation_stars': closest_star.get('constellation_stars', []),
+        'zenith_ra': zenith_ra,
+        'zenith_dec': zenith_dec,
+        'is_generic': False  # Flag indicating we have detailed data
+    }
+
+def _find_catalog_zenith_star(zenith_ra, zenith_dec):
+    """Busca a estrela zenital no Hipparcos completo, enriquecendo com NAMED_STARS"""
+    try:
+        catalog_index = get_catalog_index()
+        index, named, distance = catalog_index.zenith_candidate(zenith_ra, zenith_dec)
+    except Exception as e:
+        print(f"⚠️ Índice do catálogo indisponível, usando estrelas nomeadas: {e}")
+        return None
+    
+    if named:
+        print(f"⭐ Found catalog star: {named} (distance: {distance:.2f}°)")
+        return _named_star_result(named, NAMED_STARS[named], distance, zenith_ra, zenith_dec)
+    
+    catalog = catalog_index.catalog
+    hip = int(catalog.hip[index])
+    ra = float(catalog.ra_degrees[index])
+    dec = float(catalog.dec_degrees[index])
+    magnitude = round(float(catalog.magnitude[index]), 2)
+    parallax = float(catalog.parallax_mas[index])
+    star_name = f"HIP {hip}"
+    constellation = constellation_at(ra, dec)
+    
+    # Enriquecer com a estrela nomeada mais próxima (vizinha famosa no céu)
+    nearby_name, nearby_distance, nearby_star = find_nearest_named_star(ra, dec)
+    
+    print(f"⭐ Found catalog star: {star_name} (distance: {distance:.2f}°)")
+    
+    return {
+        'name': star_name,
+        'hip': hip,
+        'ra_degrees': ra,
+        'dec_degrees': dec,
+        'magnitude': magnitude,
+        'distance_ly': round(3261.56 / parallax, 1) if parallax > 0 else estimate_distance(magnitude),
+        'spectral_class': estimate_spectral_class(magnitude),
+        'constellation': constellation,
+        'angular_distance': distance,
+        'age_billion_years': 5.0,
+        'mass_solar': 1.0,
+        'temperature_k': 5778,
+        'history': (f'{star_name} é uma estrela do catálogo Hipparcos na constelação de {constellation}. '
+                    f'Sua vizinha famosa mais próxima no céu é {nearby_name}, a {nearby_distance:.1f}°.'),
+        'constellation_stars': nearby_star.get('constellation_stars', []) if nearby_star['constellation'] == constellation else [],
+        'nearest_named_star': {'name': nearby_name, 'angular_distance': nearby_distance},
+        'zenith_ra': zenith_ra,
+        'zenith_dec': zenith_dec,
+        'is_generic': True  # Dados detalhados estimados a partir do catálogo
+    }
+
+_constellation_map = None
+_constellation_names = None
+
+def constellations_at(ra_degrees, dec_degrees):
+    """Nomes das constelações (IAU) que contêm as posições, pelos limites embutidos no Skyfield"""
+    global _constellation_map, _constellation_names
+    if _constellation_map is None:
+        _constellation_map = load_constellation_map()
+        _constellation_names = dict(load_constellation_names())
+    abbreviations = _constellation_map(position_of_radec(np.asarray(ra_degrees) / 15.0, np.asarray(dec_degrees)))
+    return np.array([_constellation_names.get(str(a), str(a)) for a in np.atleast_1d(abbreviations)], dtype=object)
+
+def constellation_at(ra_degrees, dec_degrees):
+    """Nome da constelação (IAU) que contém a posição"""
+    return str(constellations_at(ra_degrees, dec_degrees)[0])
+
+def find_named_star_index(ra_degrees, dec_degrees, lut=None):
+    """
+    Retorna (índice em NAMED_STARS, distância) da estrela mais próxima.
+    
+    Consulta a célula da tabela pré-calculada e verifica exatamente apenas as
+    candidatas, com o mesmo critério (e desempate) da busca linear.
+    """
+    lut = lut or get_zenith_lut()
+    candidates = lut.candidate_indices(ra_degrees, dec_degrees)
+    distances = separation_degrees(
+        ra_degrees, dec_degrees, _NAMED_STAR_RA[candidates], _NAMED_STAR_DEC[candidates]
+    )
+    # Candidatas em ordem crescente: argmin desempata pelo menor índice
+    best = int(np.argmin(distances))
+    return int(candidates[best]), float(distances[best])
 
 
 def estimate_spectral_class(magnitude):
@@ -164,6 +340,12 @@ def estimate_spectral_class(magnitude):
         return 'M0V'
 
 
+def _estimate_spectral_classes(magnitudes):
+    """Versão vetorizada de estimate_spectral_class"""
+    classes = np.array(['O5V', 'B2V', 'A0V', 'F5V', 'G2V', 'K0V', 'M0V'], dtype=object)
+    return classes[np.digitize(magnitudes, [0, 1, 2, 3, 4, 5])]
+
+
 def estimate_distance(magnitude):
     """Estima distância em anos-luz baseada na magnitude"""
     # Fórmula simples: mais brilhante geralmente = mais próximo
@@ -192,8 +374,7 @@ def get_star_color(spectral_class):
 
 
 def generate_velocity_description(star_name):
-    """Gera descrição da velocidade radial"""
-    import random
+    """Gera descrição da velocidade radial (estável por estrela)"""
     descriptions = [
         f"{star_name} está se aproximando lentamente",
         f"{star_name} está se afastando gradualmente", 
@@ -201,7 +382,7 @@ def generate_velocity_description(star_name):
         f"{star_name} está se movendo lentamente",
         f"{star_name} está se aproximando rapidamente"
     ]
-    return random.choice(descriptions)
+    return descriptions[zlib.crc32(star_name.encode('utf-8')) % len(descriptions)]
 
 
 # Importar função necessária
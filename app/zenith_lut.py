@@ -0,0 +1,191 @@
+"""
+Zenith LUT - Tabela pré-calculada (RA do zênite × latitude) de estrelas candidatas
+
+A estrela zenital depende apenas do tempo sideral local (RA do zênite) e da
+latitude (Dec do zênite), então o espaço de respostas é uma grade 2D pequena.
+Para cada célula da grade guardamos o conjunto de NAMED_STARS que pode ser a
+mais próxima de algum ponto da célula (pela desigualdade triangular). Em
+tempo de execução basta um índice no array e a verificação exata das poucas
+candidatas, com resultado idêntico à busca linear.
+
+O artefato guarda uma impressão digital (SHA-256 dos nomes e das posições
+de NAMED_STARS); se ela não bate com o dicionário atual a tabela é
+recalculada em memória.
+
+Uso:
+    python -m app.zenith_lut build
+    python -m app.zenith_lut verify [amostras]
+"""
+
+import hashlib
+import sys
+
+import numpy as np
+
+from app.config import data_path
+from app.geometry import radec_to_unit_vectors, separation_degrees, vector_separation_degrees
+from app.star_data import NAMED_STARS
+from app.star_index import get_named_star_index
+
+LUT_FILE = data_path('zenith_lut.npz')
+GRID_STEP_DEGREES = 1.0
+
+# Folga para erros de arredondamento na distância entre centro e estrela
+_MARGIN_DEGREES = 1e-6
+
+
+def stars_fingerprint(stars=None):
+    """SHA-256 dos nomes e das posições (RA/Dec) das estrelas nomeadas, em ordem"""
+    stars = NAMED_STARS if stars is None else stars
+    digest = hashlib.sha256()
+    for name, star in stars.items():
+        digest.update(name.encode('utf-8') + b'\0')
+        digest.update(np.array([star['ra_degrees'], star['dec_degrees']], dtype='<f8').tobytes())
+    return digest.hexdigest()
+
+
+def candidate_dtype(star_count):
+    """Menor inteiro sem sinal que indexa star_count estrelas"""
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if star_count <= np.iinfo(dtype).max + 1:
+            return dtype
+    return np.int64
+
+
+class ZenithLUT:
+    """Grade RA×Dec com listas (CSR) de estrelas candidatas por célula"""
+
+    def __init__(self, step, offsets, candidates, star_names, fingerprint):
+        self.step = float(step)
+        self.n_ra = int(round(360.0 / self.step))
+        self.n_dec = int(round(180.0 / self.step))
+        self.offsets = offsets
+        self.candidates = candidates
+        self.star_names = list(star_names)
+        self.fingerprint = str(fingerprint)
+
+    def cell_index(self, ra_degrees, dec_degrees):
+        """Índice linear da célula que contém (RA, Dec)"""
+        i_ra = int((ra_degrees % 360.0) / self.step) % self.n_ra
+        i_dec = min(max(int((dec_degrees + 90.0) / self.step), 0), self.n_dec - 1)
+        return i_dec * self.n_ra + i_ra
+
+    def candidate_indices(self, ra_degrees, dec_degrees):
+        """Índices (ordem de NAMED_STARS) das estrelas candidatas para (RA, Dec)"""
+        cell = self.cell_index(ra_degrees, dec_degrees)
+        return self.candidates[self.offsets[cell]:self.offsets[cell + 1]]
+
+
+def build_lut(step=GRID_STEP_DEGREES):
+    """Avalia as estrelas candidatas em toda a grade RA×Dec"""
+    index = get_named_star_index()
+    names = index.names
+    stars = index.vectors
+
+    n_ra = int(round(360.0 / step))
+    n_dec = int(round(180.0 / step))
+    ra_edges = np.arange(n_ra + 1) * step
+    dec_edges = np.arange(n_dec + 1) * step - 90.0
+    ra_centers = (ra_edges[:-1] + ra_edges[1:]) / 2
+    dec_centers = (dec_edges[:-1] + dec_edges[1:]) / 2
+
+    # Centros das células (n_dec, n_ra, 3), na mesma ordem de cell_index
+    dec_grid, ra_grid = np.meshgrid(dec_centers, ra_centers, indexing='ij')
+    centers = radec_to_unit_vectors(ra_grid, dec_grid)
+
+    # Raio de cada célula: maior distância do centro aos cantos e pontos médios
+    radius = np.zeros(dec_grid.shape)
+    for d_ra in (-step / 2, 0.0, step / 2):
+        for d_dec in (-step / 2, 0.0, step / 2):
+            probe = radec_to_unit_vectors(ra_grid + d_ra, np.clip(dec_grid + d_dec, -90, 90))
+            radius = np.maximum(radius, vector_separation_degrees(centers, probe))
+    radius = radius * 1.01 + _MARGIN_DEGREES
+
+    # Uma estrela só pode vencer em algum ponto da célula se d(c, s) <= d_min + 2r
+    distances = vector_separation_degrees(centers[..., None, :], stars)
+    limit = distances.min(axis=-1) + 2 * radius + _MARGIN_DEGREES
+    mask = (distances <= limit[..., None]).reshape(-1, len(names))
+
+    counts = mask.sum(axis=1)
+    offsets = np.zeros(len(counts) + 1, dtype=np.int32)
+    np.cumsum(counts, out=offsets[1:])
+    candidates = np.nonzero(mask)[1].astype(candidate_dtype(len(names)))
+    return ZenithLUT(step, offsets, candidates, names, stars_fingerprint())
+
+
+def save_lut(lut, path=LUT_FILE):
+    """Grava a tabela como artefato .npz compacto"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(
+        path,
+        step=np.float64(lut.step),
+        offsets=lut.offsets,
+        candidates=lut.candidates,
+        star_names=np.array(lut.star_names),
+        fingerprint=np.array(lut.fingerprint),
+    )
+
+
+def load_lut(path=LUT_FILE):
+    """Carrega a tabela gravada pelo builder (artefatos antigos ficam sem impressão digital)"""
+    with np.load(path) as data:
+        return ZenithLUT(
+            data['step'], data['offsets'], data['candidates'],
+            [str(n) for n in data['star_names']],
+            str(data['fingerprint']) if 'fingerprint' in data.files else '',
+        )
+
+
+_lut = None
+
+
+def get_zenith_lut():
+    """Retorna a tabela do processo (gerada em memória se o artefato faltar ou estiver obsoleto)"""
+    global _lut
+    if _lut is None:
+        lut = None
+        if LUT_FILE.exists():
+            lut = load_lut(LUT_FILE)
+            if lut.fingerprint != stars_fingerprint():
+                print("⚠️ Tabela zenital obsoleta (nomes ou posições de NAMED_STARS mudaram), recalculando em memória")
+                lut = None
+        _lut = lut or build_lut()
+    return _lut
+
+
+def verify_lut(samples=100000, seed=0):
+    """Compara a busca pela tabela com a busca linear; retorna o número de divergências"""
+    from app.zenith_calculator import find_named_star_index
+
+    rng = np.random.default_rng(seed)
+    ra = rng.uniform(0, 360, samples)
+    dec = np.degrees(np.arcsin(rng.uniform(-1, 1, samples)))
+    star_ra = np.array([star['ra_degrees'] for star in NAMED_STARS.values()])
+    star_dec = np.array([star['dec_degrees'] for star in NAMED_STARS.values()])
+    lut = get_zenith_lut()
+
+    # Busca linear: todas as estrelas de uma vez, empate para o menor índice (argmin)
+    linear = np.argmin(separation_degrees(ra[:, None], dec[:, None], star_ra, star_dec), axis=-1)
+
+    mismatches = 0
+    for r, d, expected in zip(ra.tolist(), dec.tolist(), linear.tolist()):
+        if find_named_star_index(r, d, lut)[0] != expected:
+            mismatches += 1
+    return mismatches
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command == 'build':
+        lut = build_lut()
+        save_lut(lut)
+        print(f"✅ Tabela zenital gravada em {LUT_FILE}: {lut.n_ra}×{lut.n_dec} células, "
+              f"{len(lut.candidates)} candidatas (média {len(lut.candidates) / (lut.n_ra * lut.n_dec):.2f})")
+    elif command == 'verify':
+        samples = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+        mismatches = verify_lut(samples)
+        print(f"{'✅' if mismatches == 0 else '❌'} {mismatches} divergências em {samples} amostras")
+        sys.exit(1 if mismatches else 0)
+    else:
+        print("Uso: python -m app.zenith_lut build|verify [amostras]")
+        sys.exit(1)
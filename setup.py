@@ -14,12 +14,8 @@ def read_requirements():
         "aiofiles>=23.0.0",
         "skyfield>=1.47",
         "pytz>=2023.3",
-        "requests>=2.31.0",
-        "geopy>=2.4.0",
         "numpy>=1.24.0",
         "pandas>=2.0.0",
-        "matplotlib>=3.7.0",
-        "astropy>=5.3.0",
         "scipy>=1.11.0"
     ]
     return requirements
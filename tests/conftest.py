@@ -0,0 +1,22 @@
+"""
+Testes de precisão: envolvem os verificadores contra o pyephem (os mesmos
+das CLIs `python -m app.<módulo> verify`) com poucas amostras e as
+tolerâncias dos módulos. Rodar com `python -m pytest` na raiz do projeto.
+"""
+
+import pytest
+
+from app.ephemeris import EPHEMERIS_FILE, get_loader
+
+
+@pytest.fixture
+def de421():
+    """Pula o teste sem o de421 no bundle de dados (nunca baixa)"""
+    if not get_loader().exists(EPHEMERIS_FILE):
+        pytest.skip(f"{EPHEMERIS_FILE} ausente do bundle de dados")
+
+
+@pytest.fixture
+def ephem(de421):
+    """pyephem (referência dos verificadores); pula o teste se não estiver instalado"""
+    return pytest.importorskip('ephem')
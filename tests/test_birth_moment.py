@@ -0,0 +1,7 @@
+from app.birth_moment import VERIFY_TOLERANCES, verify_against_ephem
+
+
+def test_positions_match_ephem(ephem):
+    worst = verify_against_ephem(samples=100)
+    for name, value in worst.items():
+        assert value <= VERIFY_TOLERANCES[name], name
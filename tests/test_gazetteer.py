@@ -0,0 +1,29 @@
+from app.gazetteer import Gazetteer, build_gazetteer
+
+
+def _city(geonameid, name, alternates, latitude, longitude, country, population):
+    fields = [str(geonameid), name, name, ','.join(alternates), str(latitude), str(longitude),
+              'P', 'PPL', country, '', '', '', '', '', str(population), '', '', '', '']
+    return '\t'.join(fields)
+
+
+def test_primary_name_wins_over_more_populous_alternate(tmp_path):
+    cities = tmp_path / 'cities15000.txt'
+    cities.write_text('\n'.join([
+        # A cidade maior tem "Santa Rita" como nome alternativo
+        _city(1, 'João Pessoa', ['Santa Rita', 'Joao Pessoa'], -7.115, -34.863, 'BR', 800000),
+        _city(2, 'Santa Rita', [], -7.114, -34.978, 'BR', 120000),
+        _city(3, 'Cabedelo', ['Porto'], -6.981, -34.834, 'BR', 60000),
+        _city(4, 'Porto', [], -8.0, -35.0, 'BR', 15000),
+    ]) + '\n', encoding='utf-8')
+    country_info = tmp_path / 'countryInfo.txt'
+    country_info.write_text('#ISO\tISO3\tISO-Numeric\tfips\tCountry\nBR\tBRA\t076\tBR\tBrazil\n', encoding='utf-8')
+
+    path = tmp_path / 'gazetteer.sqlite3'
+    build_gazetteer(cities, country_info, path)
+    gazetteer = Gazetteer(path)
+
+    assert gazetteer.lookup('Santa Rita', 'Brasil') == (-7.114, -34.978)
+    assert gazetteer.lookup('porto', 'BR') == (-8.0, -35.0)
+    # Nome alternativo sem conflito continua resolvendo
+    assert gazetteer.lookup('Joao Pessoa', 'Brazil') == (-7.115, -34.863)
@@ -0,0 +1,17 @@
+import pytest
+
+from app.ephemeris import ephemeris_days
+from app.lunations import EVENT_TOLERANCE_SECONDS, lunation_table_for, verify_against_ephem
+
+
+def test_events_and_lunations_match_ephem(ephem):
+    result = verify_against_ephem(samples=100)
+    assert result['event_seconds'] < EVENT_TOLERANCE_SECONDS
+    assert result['lunation_mismatches'] == 0
+
+
+def test_dates_outside_de421_are_rejected(de421):
+    first, last = ephemeris_days()
+    for date in (first - 30, last + 30):
+        with pytest.raises(ValueError, match="de421"):
+            lunation_table_for(date)
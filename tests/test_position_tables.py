@@ -0,0 +1,21 @@
+import pytest
+
+from app.ephemeris import instant_to_day
+from app.position_tables import VERIFY_TOLERANCES, build_tables, verify_against_ephem
+
+
+@pytest.fixture
+def tables(de421):
+    """Um ano de tabelas ajustadas do de421 (rápido; o artefato cobre 1900-2100)"""
+    return build_tables(instant_to_day('2000-01-01'), instant_to_day('2001-01-01'))
+
+
+def test_positions_match_ephem(ephem, tables):
+    worst = verify_against_ephem(samples=100, tables=tables)
+    for name, value in worst.items():
+        assert value <= VERIFY_TOLERANCES[name], name
+
+
+def test_dates_outside_tables_are_rejected(tables):
+    with pytest.raises(ValueError, match="fora das tabelas"):
+        tables.positions(tables.end + 1)
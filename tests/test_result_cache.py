@@ -0,0 +1,62 @@
+import asyncio
+import inspect
+
+import pytest
+from starlette.templating import Jinja2Templates
+
+import app.astro_data as astro_data
+import app.main as main
+from app.pipeline import run_calculation_pipeline
+from app.result_cache import get_result_cache
+
+
+@pytest.fixture
+def broken_tides(monkeypatch):
+    """Etapa de marés sempre falhando"""
+    def broken(*args):
+        raise RuntimeError("falha simulada")
+
+    monkeypatch.setattr(astro_data, '_tidal_influence', broken)
+
+
+@pytest.fixture
+def client(de421, monkeypatch):
+    """TestClient com a localização sempre resolvida (sem gazetteer nem rede)"""
+    from fastapi.testclient import TestClient
+
+    # Os templates usam a assinatura TemplateResponse(name, context) do Starlette fixado
+    parameters = list(inspect.signature(Jinja2Templates.TemplateResponse).parameters)
+    if parameters[1] == 'request':
+        pytest.skip("Starlette instalado exige TemplateResponse(request, name); requirements.txt fixa o anterior")
+
+    async def locate(city, country):
+        return -23.5505, -46.6333, True
+
+    monkeypatch.setattr(main, 'locate', locate)
+    return TestClient(main.app)
+
+
+def _result(client, birth_date):
+    params = {'birth_date': birth_date, 'birth_time': '14:30', 'city': 'São Paulo', 'country': 'Brasil'}
+    return client.get('/result', params=params)
+
+
+def test_failed_stage_is_reported_as_degraded(broken_tides):
+    stages = asyncio.run(run_calculation_pipeline('1991-06-20', '14:30', -23.5505, -46.6333))
+    assert 'tides' in stages['degraded']
+    assert stages['tidal_data'] == astro_data.tidal_influence_fallback()
+
+
+def test_complete_result_is_cached(client):
+    response = _result(client, '1990-05-15')
+    assert response.status_code == 200
+    assert _result(client, '1990-05-15').headers['etag'] == response.headers['etag']
+
+
+def test_failed_stage_leaves_result_uncached(client, broken_tides):
+    entries = get_result_cache().stats()['entries']
+
+    response = _result(client, '1991-06-20')
+    assert response.status_code == 200
+    assert 'etag' not in response.headers
+    assert get_result_cache().stats()['entries'] == entries